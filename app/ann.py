@@ -0,0 +1,168 @@
+"""
+FAISS index factory for the semantic search engine.
+
+Supported types (INDEX_TYPE):
+- ``flat``: exact inner-product search (default; right for a few thousand chunks)
+- ``hnsw``: graph index, no training, very fast queries, higher memory
+- ``ivf_flat``: inverted lists over full vectors; `nprobe` trades recall for speed
+- ``ivf_pq``: inverted lists over product-quantized codes; smallest memory
+- ``opq``: IVF-PQ behind a learned rotation (OPQ), better PQ recall
+
+Every index is wrapped in an IndexIDMap2 so results are chunk ids regardless of
+the type. Build parameters are part of the index artifact key; search-time
+parameters (`nprobe`, `ef_search`) are applied after load and can change freely.
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict
+
+import faiss
+import numpy as np
+
+from .core.config import settings
+from .core.exceptions import ConfigurationException
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq", "opq")
+
+# faiss warns below this many training points per IVF centroid
+_MIN_POINTS_PER_CENTROID = 39
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Index type plus build-time and search-time parameters."""
+    type: str = "flat"
+    nlist: int = 1024
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    pq_m: int = 64
+    pq_nbits: int = 8
+    ef_search: int = 64
+    nprobe: int = 16
+
+    def __post_init__(self):
+        if self.type not in INDEX_TYPES:
+            raise ConfigurationException(f"Unknown INDEX_TYPE '{self.type}', expected one of {INDEX_TYPES}")
+
+    @classmethod
+    def from_settings(cls) -> "IndexSpec":
+        return cls(
+            type=settings.INDEX_TYPE.lower(),
+            nlist=settings.INDEX_NLIST,
+            hnsw_m=settings.INDEX_HNSW_M,
+            ef_construction=settings.INDEX_HNSW_EF_CONSTRUCTION,
+            pq_m=settings.INDEX_PQ_M,
+            pq_nbits=settings.INDEX_PQ_NBITS,
+            ef_search=settings.INDEX_HNSW_EF_SEARCH,
+            nprobe=settings.INDEX_NPROBE,
+        )
+
+    def build_params(self) -> Dict[str, Any]:
+        """Parameters that change the built index (and therefore the artifact key)."""
+        params = asdict(self)
+        del params["ef_search"], params["nprobe"]
+        return params
+
+    @property
+    def exact_scores(self) -> bool:
+        # PQ codes only approximate the inner product
+        return self.type not in ("ivf_pq", "opq")
+
+    def factory_string(self, n: int, d: int) -> str:
+        """faiss index_factory string for `n` training vectors of dimension `d`."""
+        if self.type == "flat":
+            return "Flat"
+        if self.type == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+
+        nlist = max(1, min(self.nlist, n // _MIN_POINTS_PER_CENTROID))
+        if self.type == "ivf_flat":
+            return f"IVF{nlist},Flat"
+
+        if d % self.pq_m:
+            raise ConfigurationException(f"INDEX_PQ_M={self.pq_m} must divide the embedding dimension {d}")
+        pq = f"PQ{self.pq_m}x{self.pq_nbits}"
+        if self.type == "ivf_pq":
+            return f"IVF{nlist},{pq}"
+        return f"OPQ{self.pq_m},IVF{nlist},{pq}"
+
+    def min_training_points(self) -> int:
+        if self.type in ("ivf_pq", "opq"):
+            return 2 ** self.pq_nbits
+        if self.type == "ivf_flat":
+            return _MIN_POINTS_PER_CENTROID
+        return 0
+
+
+def build_index(embeddings: np.ndarray, ids: np.ndarray, spec: IndexSpec) -> faiss.Index:
+    """Train (if needed) and fill an IndexIDMap2 of the configured type."""
+    n, d = len(embeddings), embeddings.shape[1]
+    if n < spec.min_training_points():
+        # Too few vectors to train quantizers; exact search is also the fastest option here
+        logger.info(f"{n} vectors are too few to train a {spec.type} index, using flat")
+        spec = IndexSpec(type="flat")
+
+    factory = spec.factory_string(n, d)
+    base = faiss.index_factory(d, factory, faiss.METRIC_INNER_PRODUCT)
+    if spec.type == "hnsw":
+        faiss.downcast_index(base).hnsw.efConstruction = spec.ef_construction
+
+    index = faiss.IndexIDMap2(base)
+    if not index.is_trained and n:
+        logger.info(f"Training {factory} index on {n} vectors...")
+        index.train(embeddings)
+    if n:
+        index.add_with_ids(embeddings, ids)
+    configure_search(index, spec)
+    return index
+
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    """The quantizing index underneath the IndexIDMap2 and optional OPQ transform."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(base, faiss.IndexPreTransform):
+        base = faiss.downcast_index(base.index)
+    return base
+
+
+def configure_search(index: faiss.Index, spec: IndexSpec) -> None:
+    """Apply search-time parameters (nprobe / efSearch) to a built or loaded index."""
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = spec.ef_search
+    elif isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(spec.nprobe, base.nlist)
+
+
+def index_description(index: faiss.Index) -> Dict[str, Any]:
+    """Type and effective search parameters of an index, for stats endpoints."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    description = {"ntotal": int(index.ntotal)}
+    if isinstance(base, faiss.IndexPreTransform):
+        description["pretransform"] = True
+        base = faiss.downcast_index(base.index)
+    description["type"] = type(base).__name__
+    if isinstance(base, faiss.IndexHNSW):
+        description["ef_search"] = base.hnsw.efSearch
+    elif isinstance(base, faiss.IndexIVF):
+        description["nlist"] = base.nlist
+        description["nprobe"] = base.nprobe
+    return description
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Search parameters restricting `index` to the ids accepted by `selector`.
+
+    IVF and HNSW reject plain SearchParameters and would otherwise fall back to
+    the parameter defaults, so the index's current nprobe / efSearch are copied over.
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    return faiss.SearchParameters(sel=selector)
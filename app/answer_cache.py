@@ -0,0 +1,154 @@
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """A full RAG response stored in the semantic answer cache."""
+    answer: str
+    attachments: List[Any]
+    chunk_ids: Tuple[str, ...]
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by query embedding.
+
+    A new query is served from the cache when a stored query lies within
+    `threshold` cosine similarity of it and both retrieved exactly the same
+    chunks, so paraphrased questions skip the LLM call. Lookups go through a
+    FAISS inner-product index over the (normalized) query vectors.
+    """
+
+    def __init__(self, threshold: float, maxsize: int, ttl: int, neighbours: int = 4):
+        self._threshold = threshold
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._neighbours = neighbours
+        self._lock = Lock()
+        self._index = None
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._version: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def set_version(self, version: str) -> None:
+        """Drop all answers when the underlying index version changes."""
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._reset()
+                self._version = version
+
+    def _reset(self) -> None:
+        if self._index is not None:
+            self._index.reset()
+        self._entries.clear()
+
+    def _remove(self, entry_ids: List[int]) -> None:
+        if not entry_ids:
+            return
+        self._index.remove_ids(np.array(entry_ids, dtype=np.int64))
+        for entry_id in entry_ids:
+            self._entries.pop(entry_id, None)
+
+    def lookup(self, query_vec: np.ndarray, chunk_ids: Tuple[str, ...]) -> Optional[CachedAnswer]:
+        """Return a cached answer for a near-identical query with the same context."""
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self._misses += 1
+                return None
+
+            k = min(self._neighbours, self._index.ntotal)
+            D, I = self._index.search(np.asarray([query_vec], dtype=np.float32), k)
+            now = time.time()
+            expired = []
+            found = None
+            for score, entry_id in zip(D[0], I[0]):
+                if entry_id == -1 or score < self._threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if entry.expires_at < now:
+                    expired.append(int(entry_id))
+                    continue
+                if entry.chunk_ids == chunk_ids:
+                    self._entries.move_to_end(int(entry_id))
+                    found = entry
+                    break
+
+            self._remove(expired)
+            if found is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return found
+
+    def store(self, query_vec: np.ndarray, chunk_ids: Tuple[str, ...], answer: str, attachments: List[Any]) -> None:
+        """Cache a full response, evicting the least recently used entry when full."""
+        if self._maxsize <= 0 or not answer:
+            return
+        vec = np.asarray([query_vec], dtype=np.float32)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vec.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vec, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = CachedAnswer(
+                answer=answer,
+                attachments=attachments,
+                chunk_ids=chunk_ids,
+                expires_at=time.time() + self._ttl,
+            )
+
+            overflow = len(self._entries) - self._maxsize
+            if overflow > 0:
+                self._remove(list(islice(self._entries.keys(), overflow)))
+                self._evictions += overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": settings.ANSWER_CACHE_ENABLED,
+                "version": self._version,
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+                "threshold": self._threshold,
+                "ttl": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global answer cache instance
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    maxsize=settings.ANSWER_CACHE_SIZE,
+    ttl=settings.CACHE_PURA_DATA_TTL,
+)
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from app.db import (
-    get_db_connection, fetch_pura_data, get_pura_gambar, 
+    fetch_pura_data, get_pura_gambar, 
     get_pura_by_id_cached, get_kabupaten_list_cached, 
     get_jenis_pura_list_cached, invalidate_pura_cache, invalidate_filter_cache
 )
 from app.data_loader import load_corpus
 from app.search import SemanticSearch
 from app.gen import generate_response
+from app.database.models import PuraRepository
 from typing import List, Optional
 
 router = APIRouter(prefix="/api")
@@ -68,7 +69,7 @@ async def handle_prompt(payload: PromptRequest):
                     kabupaten=meta["kabupaten"],
                     deskripsi=meta.get("chunk", ""),
                     link_lokasi=extract_lokasi(meta),
-                    link_gambar=get_gambar(meta["id"])
+                    link_gambar=meta.get("link_gambar") or get_gambar(meta["id"])
                 ))
 
         return PromptResponse(answer=answer, attachments=attachments)
@@ -77,9 +78,7 @@ async def handle_prompt(payload: PromptRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def extract_lokasi(meta: dict) -> str:
-    if meta["type"] == "lokasi" and "https://" in meta["chunk"]:
-        return meta["chunk"].replace("Lokasi Google Maps: ", "").strip()
-    return ""
+    return meta.get("link_lokasi") or ""
 
 def get_gambar(pura_id: str) -> str:
     """Get image link for a pura - uses cached version"""
@@ -94,79 +93,8 @@ def get_all_pura(
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
     limit: int = Query(12, ge=1, le=100, description="Number of items per page (max 100)")
 ):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    # Calculate offset
-    offset = (page - 1) * limit
-    
-    # Base query for counting total records
-    count_sql = """
-        SELECT COUNT(*) as total
-        FROM pura p
-        LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-        LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-        WHERE 1=1
-    """
-    
-    # Main query for fetching data
-    sql = """
-        SELECT p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri, p.link_lokasi, p.latitude, p.longitude, p.link_gambar, j.nama_jenis_pura, k.nama_kabupaten
-        FROM pura p
-        LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-        LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-        WHERE 1=1
-    """
-    
-    params = []
-    if q:
-        sql += " AND (p.nama_pura LIKE %s OR p.deskripsi_singkat LIKE %s)"
-        count_sql += " AND (p.nama_pura LIKE %s OR p.deskripsi_singkat LIKE %s)"
-        params.extend([f"%{q}%", f"%{q}%"])
-    if jenis:
-        sql += " AND j.nama_jenis_pura = %s"
-        count_sql += " AND j.nama_jenis_pura = %s"
-        params.append(jenis)
-    if kabupaten:
-        sql += " AND k.nama_kabupaten = %s"
-        count_sql += " AND k.nama_kabupaten = %s"
-        params.append(kabupaten)
-    
-    # Add ORDER BY and LIMIT to main query
-    sql += " ORDER BY p.nama_pura ASC LIMIT %s OFFSET %s"
-    params.extend([limit, offset])
-    
-    # Execute count query with regular cursor
-    count_cursor = conn.cursor()
-    count_cursor.execute(count_sql, params[:-2] if len(params) > 2 else [])
-    count_result = count_cursor.fetchone()
-    total_count = int(count_result[0]) if count_result else 0
-    count_cursor.close()
-    
-    # Execute main query
-    cursor.execute(sql, params)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    # Calculate pagination metadata
-    total_pages = (total_count + limit - 1) // limit
-    has_next = page < total_pages
-    has_prev = page > 1
-    
-    return {
-        "data": rows,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total_count,
-            "total_pages": total_pages,
-            "has_next": has_next,
-            "has_prev": has_prev,
-            "next_page": page + 1 if has_next else None,
-            "prev_page": page - 1 if has_prev else None
-        }
-    }
+    # Pooled connection and the same SQL as the v1 API
+    return PuraRepository().search_pura(query=q, jenis=jenis, kabupaten=kabupaten, page=page, limit=limit)
 
 @router.get("/pura/{id_pura}")
 def get_pura_by_id(id_pura: str):
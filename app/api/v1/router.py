@@ -2,46 +2,74 @@
 API v1 router with all endpoints.
 """
 
-from fastapi import APIRouter, HTTPException, Query, status
+import json
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 
 from ...schemas.pura import PuraResponse, PuraListResponse, PuraDetailResponse
 from ...schemas.chat import PromptRequest, PromptResponse, PuraAttachment
 from ...schemas.common import PaginationResponse
-from ...database.models import PuraRepository, KabupatenRepository, JenisPuraRepository
-from ...core.exceptions import NotFoundException
+from ...database.models import PuraRepository
+from ...database.async_models import AsyncPuraRepository, AsyncKabupatenRepository, AsyncJenisPuraRepository
+from ...database.async_connection import get_async_db_connection
+from ...core.exceptions import PuraBaliException, AIException, SearchException, NotFoundException, ValidationException
 from ...core.logging import get_logger
-from ...data_loader import load_corpus
-from ...search import SemanticSearch
-from ...gen import generate_response
+from ...search import SemanticSearch, query_embedding_cache, retrieval_cache
+from ...data_loader import display_fields
+from ...index_manager import index_manager
+from ...catalogue import catalogue
+from ...gen import generate_response_async, stream_response
+from ...executor import search_executor, llm_limiter
+from ...embed import query_batcher
+from ...answer_cache import answer_cache
+from ...reranker import reranker
+from ...core.config import settings
 
 logger = get_logger(__name__)
 
 # Create router
 api_router = APIRouter()
 
-# Initialize repositories
+# Initialize repositories: async ones for handlers, the sync one for threadpool code
 pura_repo = PuraRepository()
-kabupaten_repo = KabupatenRepository()
-jenis_pura_repo = JenisPuraRepository()
-
-# Load corpus and initialize search engine (singleton)
-try:
-    texts, metadata = load_corpus()
-    search_engine = SemanticSearch(texts, metadata)
-except Exception as e:
-    logger.error(f"Error initializing search engine: {e}")
-    texts, metadata = [], []
-    search_engine = None
+async_pura_repo = AsyncPuraRepository()
+kabupaten_repo = AsyncKabupatenRepository()
+jenis_pura_repo = AsyncJenisPuraRepository()
+
+def require_engine() -> SemanticSearch:
+    """The live search engine; callers keep this reference for the whole request."""
+    engine = index_manager.engine
+    if engine is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search index is not ready"
+        )
+    return engine
 
 def extract_lokasi(meta: dict) -> str:
-    if meta.get("type") == "lokasi" and "https://" in meta.get("chunk", ""):
-        return meta["chunk"].replace("Lokasi Google Maps: ", "").strip()
-    return ""
+    return meta.get("link_lokasi") or ""
 
-def get_gambar(pura_id: str) -> str:
-    # Use the repository for image lookup
-    return pura_repo.get_pura_gambar(pura_id)
+def display_metadata(retrieved: list[dict]) -> dict:
+    """
+    First chunk metadata per pura id, in retrieval order. Chunks from load_corpus
+    carry the display fields already; any that don't are filled in with a
+    single batched query.
+    """
+    by_id = {}
+    for r in retrieved:
+        meta = r["meta"]
+        by_id.setdefault(meta.get("id"), meta)
+    missing = [pura_id for pura_id, meta in by_id.items() if "link_gambar" not in meta]
+    if missing:
+        snapshot = catalogue.snapshot
+        rows = snapshot.get_many(missing) if snapshot else pura_repo.get_pura_by_ids(missing)
+        for row in rows:
+            pura_id = row["id_pura"]
+            if pura_id in by_id:
+                by_id[pura_id] = {**by_id[pura_id], **display_fields(row)}
+    return by_id
 
 @api_router.get("/pura", response_model=PuraListResponse)
 async def get_all_pura(
@@ -49,17 +77,40 @@ async def get_all_pura(
     jenis: str = Query(None, description="Filter by temple type"),
     kabupaten: str = Query(None, description="Filter by regency"),
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
-    limit: int = Query(12, ge=1, le=100, description="Number of items per page (max 100)")
+    limit: int = Query(12, ge=1, le=100, description="Number of items per page (max 100)"),
+    cursor: str = Query(None, description="pagination.next_cursor of the previous page (keyset pagination)")
 ):
     """Get all pura with optional filtering and pagination."""
     try:
-        result = pura_repo.search_pura(
-            query=q,
-            jenis=jenis,
-            kabupaten=kabupaten,
-            page=page,
-            limit=limit
-        )
+        engine = index_manager.engine
+        # Served from the in-memory catalogue; MySQL only until the first snapshot is built
+        snapshot = catalogue.snapshot
+        if q and engine:
+            # Ranked by the in-process BM25 index instead of a LIKE '%q%' scan
+            ranked_ids = engine.search_pura_ids(q, jenis=jenis, kabupaten=kabupaten)
+            # Ranked pages carry an offset cursor; a keyset cursor from the name order is rejected
+            if snapshot:
+                result = snapshot.rank(ranked_ids, page=page, limit=limit, cursor=cursor)
+            else:
+                result = await async_pura_repo.rank_pura(ranked_ids, page=page, limit=limit, cursor=cursor)
+        elif snapshot:
+            result = snapshot.search(
+                query=q,
+                jenis=jenis,
+                kabupaten=kabupaten,
+                page=page,
+                limit=limit,
+                cursor=cursor
+            )
+        else:
+            result = await async_pura_repo.search_pura(
+                query=q,
+                jenis=jenis,
+                kabupaten=kabupaten,
+                page=page,
+                limit=limit,
+                cursor=cursor
+            )
         
         # Convert to response models
         pura_list = [PuraResponse(**pura) for pura in result["data"]]
@@ -67,6 +118,8 @@ async def get_all_pura(
         
         return PuraListResponse(data=pura_list, pagination=pagination)
         
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
     except Exception as e:
         logger.error(f"Error fetching pura list: {e}")
         raise HTTPException(
@@ -79,7 +132,11 @@ async def get_all_pura(
 async def get_pura_by_id(id_pura: str):
     """Get pura details by ID."""
     try:
-        pura_data = pura_repo.get_pura_by_id(id_pura)
+        snapshot = catalogue.snapshot
+        if snapshot:
+            pura_data = snapshot.get(id_pura)
+        else:
+            pura_data = await async_pura_repo.get_pura_by_id(id_pura)
         if not pura_data:
             raise NotFoundException(f"Pura with ID {id_pura} not found")
         
@@ -100,7 +157,10 @@ async def get_pura_by_id(id_pura: str):
 async def get_all_kabupaten():
     """Get all kabupaten with pura count."""
     try:
-        kabupaten_list = kabupaten_repo.get_all_kabupaten()
+        snapshot = catalogue.snapshot
+        if snapshot:
+            return snapshot.kabupaten_facets()
+        kabupaten_list = await kabupaten_repo.get_all_kabupaten()
         return kabupaten_list
         
     except Exception as e:
@@ -115,7 +175,10 @@ async def get_all_kabupaten():
 async def get_all_jenis_pura():
     """Get all jenis pura with pura count."""
     try:
-        jenis_pura_list = jenis_pura_repo.get_all_jenis_pura()
+        snapshot = catalogue.snapshot
+        if snapshot:
+            return snapshot.jenis_pura_facets()
+        jenis_pura_list = await jenis_pura_repo.get_all_jenis_pura()
         return jenis_pura_list
         
     except Exception as e:
@@ -131,75 +194,97 @@ def is_list_query(query: str) -> bool:
     keywords = ["daftar", "list", "semua", "berikan semua", "tampilkan semua", "sebutkan semua", "apa saja", "semuanya"]
     return any(kw in query.lower() for kw in keywords)
 
-def extract_category(query: str, jenis_list) -> str:
-    # Try to extract the category from the query using the dynamic list
-    for jenis in jenis_list:
-        if jenis and jenis.lower() in query.lower():
-            return jenis
-    return ""
+def retrieve_context(search_engine: SemanticSearch, user_query: str) -> list[dict]:
+    """Run retrieval for a prompt (blocking: embedding, FAISS and DB lookups)."""
+    # Detect if this is a list/daftar query
+    if is_list_query(user_query):
+        # The engine's entity matcher already holds the jenis_pura vocabulary
+        category = search_engine.detect_filters(user_query).get("jenis", "")
+        # Retrieve all matching temples for the category (cap at 30)
+        if category:
+            # Filter metadata for this category
+            indices = [i for i, meta in enumerate(search_engine.metadata) if meta.get("jenis") == category]
+            # If none found, fallback to normal search
+            if not indices:
+                return search_engine.search(user_query, top_k=10)
+            # Build results for all
+            results = []
+            for idx in indices[:30]:
+                results.append({
+                    "score": 1.0,  # Not used for list
+                    "text": search_engine.texts[idx],
+                    "meta": search_engine.metadata[idx]
+                })
+            return results
+        # No category found, fallback to normal search
+        return search_engine.search(user_query, top_k=10)
+    # Default: short semantic search; a cross-encoder ranks well enough to send Gemini fewer chunks
+    top_k = settings.RERANK_TOP_K if reranker.enabled else settings.SEARCH_DEFAULT_TOP_K
+    return search_engine.search(user_query, top_k=top_k)
+
+
+def build_attachments(user_query: str, retrieved: list[dict]) -> List[PuraAttachment]:
+    """Build pura attachments for the retrieved chunks (at most one DB round trip)."""
+    want_attachment = any(kw in user_query.lower() for kw in ["di mana", "lokasi", "maps", "gambar", "foto", "pura", "daftar", "list", "semua"])
+    attachments = []
+    if want_attachment:
+        for pura_id, meta in display_metadata(retrieved).items():
+            attachments.append(PuraAttachment(
+                id_pura=pura_id,
+                nama_pura=meta.get("nama", ""),
+                jenis_pura=meta.get("jenis", ""),
+                kabupaten=meta.get("kabupaten", ""),
+                deskripsi=meta.get("chunk", ""),
+                link_lokasi=extract_lokasi(meta),
+                link_gambar=meta.get("link_gambar") or "",
+                latitude=meta.get("latitude"),
+                longitude=meta.get("longitude")
+            ))
+    return attachments
+
+
+def retrieved_chunk_ids(retrieved: list[dict]) -> tuple:
+    return tuple(r["meta"].get("hash") for r in retrieved)
+
+
+def prepare_context(search_engine: SemanticSearch, user_query: str):
+    """
+    Retrieve context and check the semantic answer cache.
+    Returns (retrieved, query_vec, cached_answer); the last two are None when
+    the answer cache is disabled.
+    """
+    retrieved = retrieve_context(search_engine, user_query)
+    if not settings.ANSWER_CACHE_ENABLED:
+        return retrieved, None, None
+    query_vec = search_engine.embed_query_cached(user_query)
+    answer_cache.set_version(search_engine.index_key)
+    cached = answer_cache.lookup(query_vec, retrieved_chunk_ids(retrieved))
+    return retrieved, query_vec, cached
+
 
 @api_router.post("/prompt", response_model=PromptResponse)
 async def handle_prompt(payload: PromptRequest):
     """Handle chat prompt with RAG capabilities (enhanced for list queries, dynamic category)."""
-    if not search_engine:
-        raise HTTPException(status_code=500, detail="Search engine not initialized")
+    engine = require_engine()
     try:
         user_query = payload.message
-        # Detect if this is a list/daftar query
-        if is_list_query(user_query):
-            # Dynamically get all available jenis_pura
-            jenis_list = [j.get("nama_jenis_pura") for j in jenis_pura_repo.get_all_jenis_pura()]
-            category = extract_category(user_query, jenis_list)
-            # Retrieve all matching temples for the category (cap at 30)
-            if category:
-                # Filter metadata for this category
-                indices = [i for i, meta in enumerate(search_engine.metadata) if meta.get("jenis") == category]
-                # If none found, fallback to normal search
-                if not indices:
-                    retrieved = search_engine.search(user_query, top_k=10)
-                else:
-                    # Build results for all
-                    results = []
-                    for idx in indices[:30]:
-                        results.append({
-                            "score": 1.0,  # Not used for list
-                            "text": search_engine.texts[idx],
-                            "meta": search_engine.metadata[idx]
-                        })
-                    retrieved = results
-            else:
-                # No category found, fallback to normal search
-                retrieved = search_engine.search(user_query, top_k=10)
-            answer = generate_response(user_query, retrieved)
-        else:
-            # Default: top-3 semantic search
-            retrieved = search_engine.search(user_query, top_k=3)
-            answer = generate_response(user_query, retrieved)
+        # Retrieval is CPU-bound; run it on the bounded search executor
+        retrieved, query_vec, cached = await search_executor.run(prepare_context, engine, user_query)
+        if cached is not None:
+            return PromptResponse(answer=cached.answer, attachments=cached.attachments)
+        answer = await generate_response_async(user_query, retrieved)
         if not answer:
-            raise HTTPException(status_code=500, detail="Failed to generate response")
-        want_attachment = any(kw in user_query.lower() for kw in ["di mana", "lokasi", "maps", "gambar", "foto", "pura", "daftar", "list", "semua"])
-        attachments = []
-        if want_attachment:
-            seen_ids = set()
-            for r in retrieved:
-                meta = r["meta"]
-                pura_id = meta.get("id")
-                if pura_id in seen_ids:
-                    continue
-                seen_ids.add(pura_id)
-                attachments.append(PuraAttachment(
-                    id_pura=pura_id,
-                    nama_pura=meta.get("nama", ""),
-                    jenis_pura=meta.get("jenis", ""),
-                    kabupaten=meta.get("kabupaten", ""),
-                    deskripsi=meta.get("chunk", ""),
-                    link_lokasi=extract_lokasi(meta),
-                    link_gambar=get_gambar(pura_id)
-                ))
+            raise AIException("Failed to generate response", error_code="GENERATION_FAILED")
+        attachments = await run_in_threadpool(build_attachments, user_query, retrieved)
+        if query_vec is not None:
+            answer_cache.store(query_vec, retrieved_chunk_ids(retrieved), answer, attachments)
         return PromptResponse(answer=answer, attachments=attachments)
+    except PuraBaliException:
+        raise
     except Exception as e:
-        logger.error(f"Error in RAG /prompt: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        # The cause stays in the log; clients only get the generic message
+        logger.error(f"Error in RAG /prompt: {e}", exc_info=True)
+        raise AIException("Failed to generate response", error_code="RAG_FAILED") from e
 
 
 @api_router.get("/cache/stats")
@@ -217,6 +302,95 @@ async def get_cache_stats():
         )
 
 
+def sse_event(event: str, data) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@api_router.post("/prompt/stream")
+async def handle_prompt_stream(payload: PromptRequest, request: Request):
+    """
+    Streaming variant of /prompt as server-sent events.
+    
+    Emits `attachments` as soon as retrieval finishes, then one `token` event per
+    Gemini chunk, and finally `done` (or `error`). Generation is cancelled when
+    the client disconnects.
+    """
+    engine = require_engine()
+    
+    user_query = payload.message
+    try:
+        retrieved, query_vec, cached = await search_executor.run(prepare_context, engine, user_query)
+        if cached is not None:
+            attachments = cached.attachments
+        else:
+            attachments = await run_in_threadpool(build_attachments, user_query, retrieved)
+    except Exception as e:
+        logger.error(f"Error in RAG /prompt/stream retrieval: {e}", exc_info=True)
+        raise SearchException("Failed to retrieve context", error_code="RETRIEVAL_FAILED") from e
+    
+    async def event_stream():
+        yield sse_event("attachments", [a.model_dump() for a in attachments])
+        if cached is not None:
+            yield sse_event("token", {"text": cached.answer})
+            yield sse_event("done", {})
+            return
+        tokens = stream_response(user_query, retrieved)
+        parts = []
+        try:
+            async for text in tokens:
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, cancelling generation")
+                    break
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            else:
+                if query_vec is not None:
+                    answer_cache.store(query_vec, retrieved_chunk_ids(retrieved), "".join(parts).strip(), attachments)
+                yield sse_event("done", {})
+        except Exception as e:
+            logger.error(f"Error in RAG /prompt/stream generation: {e}", exc_info=True)
+            yield sse_event("error", {"detail": "Failed to generate response"})
+        finally:
+            await tokens.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@api_router.get("/rag/stats")
+async def get_rag_stats():
+    """Get RAG executor and concurrency statistics."""
+    # One read: a rebuild may swap the engine between a check and a second access
+    engine = index_manager.engine
+    return {
+        "index": engine.get_index_stats() if engine is not None else None,
+        "index_build": index_manager.get_status(),
+        "search_executor": search_executor.get_stats(),
+        "query_batcher": query_batcher.get_stats(),
+        "query_embedding_cache": query_embedding_cache.get_stats(),
+        "retrieval_cache": retrieval_cache.get_stats(),
+        "reranker": reranker.get_stats(),
+        "answer_cache": answer_cache.get_stats(),
+        "llm": llm_limiter.get_stats(),
+    }
+
+
+@api_router.get("/db/stats")
+async def get_db_stats():
+    """Get async database pool statistics."""
+    return get_async_db_connection().get_stats()
+
+
+@api_router.get("/catalogue/stats")
+async def get_catalogue_stats():
+    """Get in-memory catalogue snapshot statistics."""
+    return catalogue.get_stats()
+
+
 @api_router.post("/cache/clear")
 async def clear_cache():
     """Clear all cache entries."""
@@ -230,4 +404,20 @@ async def clear_cache():
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to clear cache"
-        ) 
\ No newline at end of file
+        )
+
+
+@api_router.post("/index/reindex")
+async def reindex_search_engine(background: bool = Query(False, description="Return immediately instead of waiting for the build")):
+    """Rebuild the search index from fresh data and swap it in; only changed chunks are re-embedded."""
+    if background:
+        index_manager.schedule("manual")
+        return {"message": "Search index rebuild started", **index_manager.get_status()}
+    result = await index_manager.rebuild("manual")
+    if result["last_error"]:
+        logger.error(f"Error reindexing search engine: {result['last_error']}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to reindex search engine"
+        )
+    return {"message": "Search index updated", **result}
@@ -0,0 +1,116 @@
+import time
+import queue
+import logging
+from collections import deque
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingBatcher:
+    """
+    Micro-batching scheduler for query embeddings.
+
+    Callers from any thread submit a single query and block on a future. A
+    background thread collects queries that arrive within `max_wait_ms` of the
+    first one (up to `max_batch_size`), encodes them with one call to
+    `encode_fn` and hands each vector back to its caller.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self._encode_fn = encode_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._start_lock = Lock()
+
+        # Statistics
+        self._stats_lock = Lock()
+        self._batches = 0
+        self._queries = 0
+        self._max_seen_batch = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._queue_waits = deque(maxlen=1024)
+        self._encode_time = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="query-embed-batcher", daemon=True)
+                self._thread.start()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one query, sharing an encode call with concurrent callers."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    # Window closed: still take whatever is already queued
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = self._encode_fn(texts)
+                for (_, future, _), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                logger.error(f"Query embedding batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self._record(batch, started, time.perf_counter())
+
+    def _record(self, batch: list, started: float, finished: float) -> None:
+        with self._stats_lock:
+            size = len(batch)
+            self._batches += 1
+            self._queries += size
+            self._max_seen_batch = max(self._max_seen_batch, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._encode_time += finished - started
+            for _, _, enqueued in batch:
+                self._queue_waits.append(started - enqueued)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            waits = np.array(self._queue_waits) * 1000 if self._queue_waits else np.zeros(1)
+            return {
+                "max_batch_size": self._max_batch_size,
+                "max_wait_ms": self._max_wait * 1000,
+                "batches": self._batches,
+                "queries": self._queries,
+                "avg_batch_size": round(self._queries / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._max_seen_batch,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_wait_ms": {
+                    "avg": round(float(waits.mean()), 3),
+                    "p50": round(float(np.percentile(waits, 50)), 3),
+                    "p99": round(float(np.percentile(waits, 99)), 3),
+                },
+                "avg_encode_ms": round(self._encode_time / self._batches * 1000, 3) if self._batches else 0.0,
+                "pending": self._queue.qsize(),
+            }
@@ -1,24 +1,41 @@
 import os
 import time
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Dict, Hashable, Optional
 from threading import Lock
 import logging
 from app.config import CacheConfig
+from app.core.cache_engine import SingleFlight, read_through
+from app.core.cache_backends import create_cache_backend
 
 # Configure logging
 logging.basicConfig(level=getattr(logging, CacheConfig.get_log_level()))
 logger = logging.getLogger(__name__)
 
+# Generation tokens live in the cache backend itself; the TTL only keeps them from expiring
+GENERATION_PREFIX = "generation"
+GENERATION_TTL = 10 * 365 * 24 * 3600
+
 class InMemoryCache:
     """
     Thread-safe in-memory cache for production use only.
     Provides TTL (Time To Live) functionality and automatic cache invalidation.
+    Storage is a pluggable backend (CACHE_BACKEND): the bounded per-process
+    CacheEngine, or a SQLite database on tmpfs shared by all workers.
     """
     
     def __init__(self, default_ttl: Optional[int] = None):  # Use config default if None
-        self._cache: Dict[str, Tuple[Any, float]] = {}
-        self._lock = Lock()
         self._default_ttl = default_ttl or CacheConfig.DEFAULT_TTL
+        self._engine = create_cache_backend(
+            CacheConfig.BACKEND,
+            namespace="data",
+            max_entries=CacheConfig.MAX_ENTRIES,
+            max_bytes=CacheConfig.MAX_BYTES,
+            default_ttl=self._default_ttl,
+            stripes=CacheConfig.LOCK_STRIPES,
+            sqlite_path=CacheConfig.SQLITE_PATH,
+        )
         self._enabled = CacheConfig.get_cache_enabled()
         
         if self._enabled:
@@ -26,23 +43,6 @@ class InMemoryCache:
         else:
             logger.info("In-memory cache disabled for non-production environment")
     
-    def _is_expired(self, timestamp: float) -> bool:
-        """Check if a cache entry has expired based on its timestamp."""
-        return time.time() > timestamp
-    
-    def _cleanup_expired(self):
-        """Remove expired entries from cache."""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self._cache.items()
-            if self._is_expired(timestamp)
-        ]
-        for key in expired_keys:
-            del self._cache[key]
-        
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
-    
     def get(self, key: str) -> Optional[Any]:
         """
         Get a value from cache.
@@ -51,16 +51,7 @@ class InMemoryCache:
         if not self._enabled:
             return None
         
-        with self._lock:
-            if key not in self._cache:
-                return None
-            
-            value, timestamp = self._cache[key]
-            if self._is_expired(timestamp):
-                del self._cache[key]
-                return None
-            
-            return value
+        return self._engine.get(key)
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """
@@ -71,11 +62,8 @@ class InMemoryCache:
             return
         
         ttl = ttl or self._default_ttl
-        timestamp = time.time() + ttl
-        
-        with self._lock:
-            self._cache[key] = (value, timestamp)
-            logger.debug(f"Cached key: {key} with TTL: {ttl}s")
+        self._engine.set(key, value, ttl)
+        logger.debug(f"Cached key: {key} with TTL: {ttl}s")
     
     def delete(self, key: str) -> bool:
         """
@@ -85,40 +73,40 @@ class InMemoryCache:
         if not self._enabled:
             return False
         
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                logger.debug(f"Deleted cache key: {key}")
-                return True
-            return False
+        deleted = self._engine.delete(key)
+        if deleted:
+            logger.debug(f"Deleted cache key: {key}")
+        return deleted
     
     def clear(self) -> None:
         """Clear all cache entries."""
         if not self._enabled:
             return
         
-        with self._lock:
-            self._cache.clear()
-            logger.info("Cache cleared")
+        self._engine.clear()
+        logger.info("Cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        with self._lock:
-            self._cleanup_expired()
-            total_entries = len(self._cache)
-            
-            # Calculate memory usage (rough estimate)
-            memory_usage = sum(
-                len(str(key)) + len(str(value)) 
-                for key, (value, _) in self._cache.items()
-            )
-            
-            return {
-                "enabled": self._enabled,
-                "total_entries": total_entries,
-                "memory_usage_bytes": memory_usage,
-                "default_ttl": self._default_ttl
-            }
+        stats = self._engine.get_stats()
+        stats.update({
+            "enabled": self._enabled,
+            "default_ttl": self._default_ttl,
+            "coalesced_misses": _flight.coalesced
+        })
+        return stats
+    
+    def generation(self, name: str) -> Any:
+        """
+        Change token for `name`, or None before the first bump. Stored in the
+        backend even when caching is disabled, so with the sqlite backend every
+        worker sees a bump made by any of them.
+        """
+        return self._engine.get(f"{GENERATION_PREFIX}:{name}")
+    
+    def bump_generation(self, name: str) -> None:
+        # A fresh token rather than an increment: concurrent bumps can't collide
+        self._engine.set(f"{GENERATION_PREFIX}:{name}", time.time_ns(), GENERATION_TTL)
     
     def invalidate_pattern(self, pattern: str) -> int:
         """
@@ -128,18 +116,94 @@ class InMemoryCache:
         if not self._enabled:
             return 0
         
-        with self._lock:
-            keys_to_delete = [key for key in self._cache.keys() if pattern in key]
-            for key in keys_to_delete:
-                del self._cache[key]
-            
-            if keys_to_delete:
-                logger.info(f"Invalidated {len(keys_to_delete)} cache entries matching pattern: {pattern}")
-            
-            return len(keys_to_delete)
+        removed = self._engine.invalidate_pattern(pattern)
+        if removed:
+            logger.info(f"Invalidated {removed} cache entries matching pattern: {pattern}")
+        return removed
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Invalidate all keys stored with `tag` or under that key prefix. Served
+        from the tag index, so it costs O(matching keys) rather than a scan.
+        """
+        if not self._enabled:
+            return 0
+        
+        removed = self._engine.invalidate_tag(tag)
+        if removed:
+            logger.info(f"Invalidated {removed} cache entries tagged: {tag}")
+        return removed
 
 # Global cache instance
 cache = InMemoryCache()
+_flight = SingleFlight()
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with hit/miss counters.
+    Entries are tagged with a version; changing the version drops everything,
+    which ties the cache lifetime to e.g. the search index version.
+    """
+    
+    def __init__(self, maxsize: int, name: str = "lru"):
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+        self._maxsize = maxsize
+        self._name = name
+        self._version: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    def set_version(self, version: str) -> None:
+        """Clear the cache if `version` differs from the current one."""
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                if self._data:
+                    logger.info(f"{self._name} cache invalidated for version {version}")
+                self._data.clear()
+                self._version = version
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self._name,
+                "version": self._version,
+                "size": len(self._data),
+                "maxsize": self._maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
 
 def cache_key_generator(*args, **kwargs) -> str:
     """
@@ -158,30 +222,32 @@ def cache_key_generator(*args, **kwargs) -> str:
     
     return "|".join(key_parts)
 
-def cached(ttl: Optional[int] = None, key_prefix: str = ""):
+def cached(ttl: Optional[int] = None, key_prefix: str = "", stale_ttl: int = 0):
     """
     Decorator to cache function results.
     
+    Concurrent misses for the same key are coalesced: one caller runs the
+    function while the others wait for its result.
+    
     Args:
         ttl: Time to live in seconds (uses default if None)
         key_prefix: Prefix for cache key
+        stale_ttl: Seconds an expired value may still be served while a
+            single background refresh runs (0 disables stale-while-revalidate)
     """
     def decorator(func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key
             func_key = f"{key_prefix}:{func.__name__}:{cache_key_generator(*args, **kwargs)}"
             
-            # Try to get from cache
-            cached_result = cache.get(func_key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(func_key, result, ttl)
-            logger.debug(f"Cache miss for {func.__name__}, cached result")
-            
-            return result
+            return read_through(
+                cache,
+                _flight,
+                func_key,
+                lambda: func(*args, **kwargs),
+                ttl or cache._default_ttl,
+                stale_ttl,
+            )
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -0,0 +1,270 @@
+"""
+In-process snapshot of the pura catalogue for the read endpoints.
+
+The catalogue is small enough to hold in full, so `/api/pura`,
+`/api/pura/{id}`, `/api/kabupaten` and `/api/jenis_pura` are answered from an
+immutable snapshot instead of MySQL. The snapshot keeps one tuple per column
+with rows in (name, id) order, so a position is also a rank. A hash map
+resolves ids, posting lists of positions serve the kabupaten/jenis filters,
+and facet counts are computed once at build time. Invalidating the pura or
+filter caches makes the snapshot stale, and so does age (CACHE_PURA_DATA_TTL),
+since database edits arrive without an invalidation. A stale snapshot is
+rebuilt on a background thread and swapped in with one reference assignment;
+requests keep the snapshot they started with.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .core.config import settings
+from .database.models import PURA_COLUMNS, decode_cursor, encode_cursor, paginate, ranked_offset, ranked_page
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = tuple(column.strip().split(".")[-1] for column in PURA_COLUMNS.split(","))
+
+
+def sort_key(nama_pura: Optional[str], id_pura: Any) -> Tuple[str, str]:
+    # Case-insensitive like the MySQL collation ORDER BY nama_pura, id_pura runs under
+    return ((nama_pura or "").casefold(), str(id_pura))
+
+
+def _intersect(a: Sequence[int], b: Sequence[int]) -> List[int]:
+    """Sorted intersection of two sorted position lists."""
+    if len(a) > len(b):
+        a, b = b, a
+    members = set(b)
+    return [pos for pos in a if pos in members]
+
+
+class CatalogueSnapshot:
+    """Immutable columnar copy of the catalogue with its lookup structures."""
+
+    def __init__(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        kabupaten: Iterable[Dict[str, Any]] = (),
+        jenis_pura: Iterable[Dict[str, Any]] = (),
+        generation: Any = None,
+    ):
+        self.generation = generation
+        self.built_at = time.time()
+
+        rows = sorted(rows, key=lambda row: sort_key(row.get("nama_pura"), row.get("id_pura")))
+        self.size = len(rows)
+        self._columns = {column: tuple(row.get(column) for row in rows) for column in COLUMNS}
+        self._keys = [sort_key(row.get("nama_pura"), row.get("id_pura")) for row in rows]
+        # LIKE '%q%' on nama_pura / deskripsi_singkat, case-insensitive
+        self._haystack = tuple(
+            f"{row.get('nama_pura') or ''}\n{row.get('deskripsi_singkat') or ''}".casefold() for row in rows
+        )
+        self._by_id = {str(row["id_pura"]): pos for pos, row in enumerate(rows)}
+
+        # Posting lists, ascending positions (= name order)
+        self._by_kabupaten: Dict[str, Tuple[int, ...]] = self._postings("nama_kabupaten")
+        self._by_jenis: Dict[str, Tuple[int, ...]] = self._postings("nama_jenis_pura")
+
+        self._kabupaten_facets = self._facets(kabupaten, "id_kabupaten", "nama_kabupaten", self._by_kabupaten)
+        self._jenis_facets = self._facets(jenis_pura, "id_jenis_pura", "nama_jenis_pura", self._by_jenis)
+
+    def _postings(self, column: str) -> Dict[str, Tuple[int, ...]]:
+        postings: Dict[str, List[int]] = {}
+        for pos, value in enumerate(self._columns[column]):
+            if value is not None:
+                postings.setdefault(value, []).append(pos)
+        return {value: tuple(positions) for value, positions in postings.items()}
+
+    @staticmethod
+    def _facets(entries, id_column: str, name_column: str, postings) -> Tuple[Dict[str, Any], ...]:
+        """The GROUP BY/COUNT lists of the filter endpoints, zero counts included."""
+        facets = {
+            entry[name_column]: {id_column: entry[id_column], name_column: entry[name_column], "pura_count": 0}
+            for entry in entries
+        }
+        for name, positions in postings.items():
+            facets.setdefault(name, {id_column: None, name_column: name, "pura_count": 0})["pura_count"] = len(positions)
+        return tuple(facets[name] for name in sorted(facets, key=lambda name: name.casefold()))
+
+    def row(self, pos: int) -> Dict[str, Any]:
+        return {column: values[pos] for column, values in self._columns.items()}
+
+    def get(self, id_pura: str) -> Optional[Dict[str, Any]]:
+        pos = self._by_id.get(str(id_pura))
+        return None if pos is None else self.row(pos)
+
+    def get_many(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """Rows for `ids`, in that order, skipping unknown ids."""
+        return [self.row(self._by_id[i]) for i in map(str, ids) if i in self._by_id]
+
+    def select(self, query: Optional[str] = None, jenis: Optional[str] = None, kabupaten: Optional[str] = None) -> Sequence[int]:
+        """Positions matching the filters, in name order."""
+        positions: Optional[Sequence[int]] = None
+        for postings, value in ((self._by_jenis, jenis), (self._by_kabupaten, kabupaten)):
+            if value:
+                matches = postings.get(value, ())
+                positions = matches if positions is None else _intersect(positions, matches)
+        if positions is None:
+            positions = range(self.size)
+        if query:
+            needle = query.casefold()
+            positions = [pos for pos in positions if needle in self._haystack[pos]]
+        return positions
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        jenis: Optional[str] = None,
+        kabupaten: Optional[str] = None,
+        page: int = 1,
+        limit: int = 12,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Same result shape as PuraRepository.search_pura."""
+        positions = self.select(query, jenis, kabupaten)
+        if cursor:
+            # First position ranked after the cursor row, then its offset in the filtered list
+            rank = bisect.bisect_right(self._keys, sort_key(*decode_cursor(cursor)))
+            start = bisect.bisect_left(positions, rank)
+        else:
+            start = (page - 1) * limit
+        window = positions[start:start + limit]
+        has_next = start + limit < len(positions)
+        data = [self.row(pos) for pos in window]
+        next_cursor = encode_cursor(data[-1]) if has_next and data else None
+        return paginate(data, None if cursor else page, limit, len(positions), has_next=has_next, next_cursor=next_cursor)
+
+    def rank(self, ranked_ids: Sequence[str], page: int = 1, limit: int = 12, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Paginate an already ranked list of pura ids (same shape as PuraRepository.rank_pura)."""
+        offset = ranked_offset(page, limit, cursor)
+        data = self.get_many(ranked_ids[offset:offset + limit])
+        return ranked_page(data, offset, limit, len(ranked_ids), None if cursor else page)
+
+    def kabupaten_facets(self) -> List[Dict[str, Any]]:
+        return list(self._kabupaten_facets)
+
+    def jenis_pura_facets(self) -> List[Dict[str, Any]]:
+        return list(self._jenis_facets)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pura": self.size,
+            "kabupaten": len(self._kabupaten_facets),
+            "jenis_pura": len(self._jenis_facets),
+            "generation": self.generation,
+            "age_s": round(time.time() - self.built_at, 1),
+        }
+
+
+class Catalogue:
+    """Holds the live snapshot and rebuilds it in the background once it is stale."""
+
+    def __init__(
+        self,
+        loader: Callable[[], tuple],
+        generation: Callable[[], Any],
+        ttl_seconds: float = 1800,
+        retry_seconds: float = 30,
+    ):
+        self._loader = loader
+        self._generation = generation
+        # Database edits arrive without an invalidation, so snapshots also expire
+        self._ttl = ttl_seconds
+        self._retry = retry_seconds
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._builds = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+        self._last_failure_at: Optional[float] = None
+        self._last_duration: Optional[float] = None
+
+    def _is_stale(self, snapshot: CatalogueSnapshot) -> bool:
+        return snapshot.generation != self._generation() or time.time() - snapshot.built_at >= self._ttl
+
+    @property
+    def snapshot(self) -> Optional[CatalogueSnapshot]:
+        """The live snapshot (None until the first build); triggers a rebuild when stale."""
+        snapshot = self._snapshot
+        if snapshot is None or self._is_stale(snapshot):
+            self.refresh_in_background()
+        return snapshot
+
+    def refresh(self) -> CatalogueSnapshot:
+        """Build a snapshot from current data and swap it in."""
+        started = time.perf_counter()
+        # Read before loading: an invalidation during the build leaves the result stale
+        generation = self._generation()
+        try:
+            rows, kabupaten, jenis_pura = self._loader()
+            snapshot = CatalogueSnapshot(rows, kabupaten, jenis_pura, generation=generation)
+        except Exception as e:
+            self._failures += 1
+            self._last_error = str(e)
+            self._last_failure_at = time.time()
+            raise
+        self._snapshot = snapshot
+        self._builds += 1
+        self._last_error = None
+        self._last_failure_at = None
+        self._last_duration = round(time.perf_counter() - started, 4)
+        logger.info(f"Catalogue snapshot built: {snapshot.size} pura in {self._last_duration}s")
+        return snapshot
+
+    def refresh_in_background(self) -> None:
+        """Start a rebuild unless one is running or the last one failed within the retry delay."""
+        with self._lock:
+            if self._building:
+                return
+            if self._last_failure_at is not None and time.time() - self._last_failure_at < self._retry:
+                return
+            self._building = True
+        threading.Thread(target=self._refresh_once, name="catalogue-build", daemon=True).start()
+
+    def _refresh_once(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Catalogue snapshot build failed: {e}")
+        finally:
+            with self._lock:
+                self._building = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "ready": snapshot is not None,
+            "stale": snapshot is not None and self._is_stale(snapshot),
+            "building": self._building,
+            "builds": self._builds,
+            "failures": self._failures,
+            "last_error": self._last_error,
+            "last_duration_s": self._last_duration,
+            "ttl_s": self._ttl,
+            "snapshot": snapshot.get_stats() if snapshot else None,
+        }
+
+
+def _load_catalogue():
+    # Straight from MySQL: a TTL refresh must not pick up the cached rows it is replacing
+    from .db import stream_pura_data
+    from .database.connection import get_db_connection
+    from .database.models import KABUPATEN_QUERY, JENIS_PURA_QUERY
+    db = get_db_connection()
+    return list(stream_pura_data()), db.execute_query(KABUPATEN_QUERY), db.execute_query(JENIS_PURA_QUERY)
+
+
+def _catalogue_generation():
+    from .db import pura_cache_generation, filter_cache_generation
+    return pura_cache_generation(), filter_cache_generation()
+
+
+catalogue = Catalogue(
+    _load_catalogue,
+    _catalogue_generation,
+    ttl_seconds=settings.CACHE_PURA_DATA_TTL,
+    retry_seconds=settings.CATALOGUE_RETRY_SECONDS,
+)
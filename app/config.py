@@ -16,6 +16,16 @@ class CacheConfig:
     PURA_GAMBAR_TTL = int(os.getenv("CACHE_PURA_GAMBAR_TTL", "3600"))  # 1 hour
     PURA_DETAIL_TTL = int(os.getenv("CACHE_PURA_DETAIL_TTL", "3600"))  # 1 hour
     FILTER_TTL = int(os.getenv("CACHE_FILTER_TTL", "7200"))  # 2 hours
+    STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "300"))  # serve stale up to 5 min while refreshing
+    
+    # Cache budget
+    MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 64 MB
+    LOCK_STRIPES = int(os.getenv("CACHE_LOCK_STRIPES", "16"))
+    
+    # Cache backend: "memory" (per worker) or "sqlite" (shared by all workers)
+    BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")  # defaults to /dev/shm
     
     # Logging
     CACHE_LOGGING = os.getenv("CACHE_LOGGING", "INFO").upper()
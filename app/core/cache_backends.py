@@ -0,0 +1,328 @@
+"""
+Pluggable storage backends for the application caches.
+
+- ``memory``: per-process CacheEngine (fastest, but every uvicorn worker has
+  its own copy and invalidations only reach the worker that received them)
+- ``sqlite``: one SQLite database on tmpfs shared by all workers on the host,
+  so a miss filled by one worker is a hit for the others and invalidations
+  reach everyone
+"""
+
+import os
+import re
+import stat
+import time
+import pickle
+import sqlite3
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .cache_engine import CacheEngine, key_prefix
+from .exceptions import ConfigurationException
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Storage interface used by InMemoryCache and CacheService."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def invalidate_tag(self, tag: str) -> int: ...
+
+    @abstractmethod
+    def invalidate_pattern(self, pattern: str) -> int: ...
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]: ...
+
+
+CacheBackend.register(CacheEngine)
+
+
+def default_sqlite_path() -> str:
+    """
+    Prefer tmpfs so the shared cache never touches a real disk. The file sits in
+    a per-user 0700 directory: rows are unpickled, so nobody else may write it.
+    """
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+    directory = base / f"purabali-cache-{os.getuid()}"
+    directory.mkdir(mode=0o700, exist_ok=True)
+    _check_private(directory, stat.S_ISDIR, 0o077)
+    return str(directory / "cache.sqlite3")
+
+
+def _check_private(path: Path, is_type, forbidden_mode: int) -> None:
+    """Refuse a path another user owns or can write to (it could feed us a malicious pickle)."""
+    st = os.lstat(path)
+    if not is_type(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & forbidden_mode:
+        raise ConfigurationException(
+            f"Refusing to use cache path {path}: it must be a {'directory' if is_type is stat.S_ISDIR else 'file'} "
+            f"owned by uid {os.getuid()} and not writable by other users"
+        )
+
+
+def _check_database_files(path: str) -> None:
+    for candidate in (path, f"{path}-wal", f"{path}-shm"):
+        if os.path.lexists(candidate):
+            _check_private(Path(candidate), stat.S_ISREG, 0o022)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache shared between processes through a SQLite database (WAL mode).
+
+    Each namespace gets its own table so independent caches sharing the file
+    can be cleared separately. Hit/miss counters are kept per process and
+    flushed to a stats table so `get_stats` reports totals across workers.
+    Values are pickled, so the database and its WAL files must belong to the
+    current user and not be writable by anyone else; this is checked on open.
+    """
+
+    _CLEANUP_EVERY = 64
+    _FLUSH_EVERY = 256
+    # Stats rows of workers that stopped flushing this long ago are dropped
+    _STATS_RETENTION = 24 * 3600
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str = "cache",
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: int = 3600,
+    ):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", namespace):
+            raise ConfigurationException(f"Invalid cache namespace: {namespace}")
+
+        self._path = path
+        self._table = f"cache_{namespace}"
+        self._namespace = namespace
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._default_ttl = default_ttl
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._ops = 0
+        self._sets = 0
+
+        Path(path).parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_database_files(path)
+        if not os.path.exists(path):
+            # Create it owner-only before SQLite opens it with the umask default
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        conn = self._conn()
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {self._table} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                prefix TEXT NOT NULL,
+                tags TEXT NOT NULL DEFAULT '',
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_{self._table}_prefix ON {self._table}(prefix);
+            CREATE INDEX IF NOT EXISTS idx_{self._table}_expires ON {self._table}(expires_at);
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                namespace TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                evictions INTEGER NOT NULL DEFAULT 0,
+                expirations INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, pid)
+            );
+        """)
+        logger.info(f"SQLite cache backend '{namespace}' at {path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; each worker thread opens its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            self._counters[name] += amount
+            self._ops += 1
+            flush = self._ops % self._FLUSH_EVERY == 0
+        if flush:
+            self._flush_counters()
+
+    def _flush_counters(self) -> None:
+        with self._counter_lock:
+            counters = dict(self._counters)
+            for name in self._counters:
+                self._counters[name] = 0
+        if not any(counters.values()):
+            return
+        self._conn().execute(
+            """
+            INSERT INTO cache_stats (namespace, pid, hits, misses, evictions, expirations, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(namespace, pid) DO UPDATE SET
+                hits = hits + excluded.hits,
+                misses = misses + excluded.misses,
+                evictions = evictions + excluded.evictions,
+                expirations = expirations + excluded.expirations,
+                updated_at = excluded.updated_at
+            """,
+            (self._namespace, os.getpid(), counters["hits"], counters["misses"],
+             counters["evictions"], counters["expirations"], time.time()),
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        if row[1] <= time.time():
+            self._count("expirations")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> None:
+        ttl = ttl or self._default_ttl
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        tag_list = ",".join(tags)
+        self._conn().execute(
+            f"""
+            INSERT OR REPLACE INTO {self._table} (key, value, expires_at, prefix, tags, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (key, blob, time.time() + ttl, key_prefix(key), f",{tag_list}," if tag_list else "", len(blob) + len(key)),
+        )
+        with self._counter_lock:
+            self._sets += 1
+            cleanup = self._sets % self._CLEANUP_EVERY == 0
+        if cleanup:
+            self._cleanup()
+
+    def _cleanup(self) -> None:
+        """Drop expired rows, then the soonest-expiring rows while over budget."""
+        conn = self._conn()
+        expired = conn.execute(f"DELETE FROM {self._table} WHERE expires_at <= ?", (time.time(),)).rowcount
+        if expired:
+            self._count("expirations", expired)
+
+        count, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self._table}").fetchone()
+        overflow = max(0, count - self._max_entries)
+        if total > self._max_bytes and count:
+            # Approximate the rows to drop from the average entry size
+            overflow = max(overflow, int((total - self._max_bytes) / (total / count)) + 1)
+        if overflow:
+            conn.execute(
+                f"""
+                DELETE FROM {self._table} WHERE key IN (
+                    SELECT key FROM {self._table} ORDER BY expires_at LIMIT ?
+                )
+                """,
+                (overflow,),
+            )
+            self._count("evictions", overflow)
+
+        conn.execute("DELETE FROM cache_stats WHERE updated_at < ?", (time.time() - self._STATS_RETENTION,))
+
+    def delete(self, key: str) -> bool:
+        return self._conn().execute(f"DELETE FROM {self._table} WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        self._conn().execute(f"DELETE FROM {self._table}")
+
+    def invalidate_tag(self, tag: str) -> int:
+        return self._conn().execute(
+            f"DELETE FROM {self._table} WHERE prefix = ? OR tags LIKE ?", (tag, f"%,{tag},%")
+        ).rowcount
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        # Tagged rows and rows whose key contains the pattern, in one statement
+        escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return self._conn().execute(
+            f"DELETE FROM {self._table} WHERE prefix = ? OR tags LIKE ? OR key LIKE ? ESCAPE '\\'",
+            (pattern, f"%,{pattern},%", f"%{escaped}%"),
+        ).rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._flush_counters()
+        conn = self._conn()
+        entries, total = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self._table} WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        hits, misses, evictions, expirations, workers = conn.execute(
+            """
+            SELECT COALESCE(SUM(hits), 0), COALESCE(SUM(misses), 0), COALESCE(SUM(evictions), 0),
+                   COALESCE(SUM(expirations), 0), COUNT(*)
+            FROM cache_stats WHERE namespace = ?
+            """,
+            (self._namespace,),
+        ).fetchone()
+        lookups = hits + misses
+        return {
+            "backend": "sqlite",
+            "path": self._path,
+            "total_entries": entries,
+            "memory_usage_bytes": total,
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": evictions,
+            "expirations": expirations,
+            "workers": workers,
+        }
+
+
+def create_cache_backend(
+    backend: str,
+    namespace: str,
+    max_entries: int,
+    max_bytes: int,
+    default_ttl: int,
+    stripes: int = 16,
+    sqlite_path: str = "",
+) -> CacheBackend:
+    """Build the configured cache backend."""
+    backend = backend.lower()
+    if backend == "memory":
+        return CacheEngine(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            stripes=stripes,
+            default_ttl=default_ttl,
+        )
+    if backend == "sqlite":
+        return SQLiteCacheBackend(
+            sqlite_path or default_sqlite_path(),
+            namespace=namespace,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            default_ttl=default_ttl,
+        )
+    raise ConfigurationException(f"Unknown cache backend: {backend}")
@@ -0,0 +1,353 @@
+"""
+Bounded in-memory cache engine shared by the application caches.
+
+Features:
+- max-entries and max-bytes budgets with LRU eviction
+- expiry heap for O(log n) TTL expiry instead of full scans
+- prefix/tag index so tag invalidation touches only matching keys
+- lock striping so concurrent readers of different keys don't contend
+- statistics maintained incrementally on every operation
+- single-flight recomputation and stale-while-revalidate for read-through use
+"""
+
+import re
+import sys
+import time
+import heapq
+import zlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Keys look like "prefix:func:args" or "prefix|func|args"; the first segment is the prefix tag
+_PREFIX_SPLIT = re.compile(r"[:|]")
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Rough deep size of a cached value in bytes. Computed once when a value is
+    stored, never on the stats path.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
+
+def key_prefix(key: str) -> str:
+    """Prefix tag of a cache key."""
+    return _PREFIX_SPLIT.split(key, 1)[0]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    size: int
+    tags: Tuple[str, ...]
+
+
+@dataclass
+class _Stripe:
+    lock: Lock = field(default_factory=Lock)
+    entries: "OrderedDict[str, _Entry]" = field(default_factory=OrderedDict)
+    expiry_heap: List[Tuple[float, str]] = field(default_factory=list)
+    tag_index: Dict[str, Set[str]] = field(default_factory=dict)
+    bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class CacheEngine:
+    """
+    Thread-safe TTL cache with a memory budget.
+
+    Keys are hashed onto `stripes` independent shards, each with its own lock,
+    LRU order, expiry heap and tag index. Budgets are split evenly between
+    stripes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        stripes: int = 16,
+        default_ttl: int = 3600,
+    ):
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._stripe_max_entries = max(1, max_entries // len(self._stripes))
+        self._stripe_max_bytes = max(1, max_bytes // len(self._stripes))
+        self._default_ttl = default_ttl
+
+    def _stripe_for(self, key: str) -> _Stripe:
+        return self._stripes[zlib.crc32(key.encode("utf-8")) % len(self._stripes)]
+
+    # Internal helpers (caller holds stripe.lock)
+
+    def _unlink(self, stripe: _Stripe, key: str) -> Optional[_Entry]:
+        entry = stripe.entries.pop(key, None)
+        if entry is None:
+            return None
+        stripe.bytes -= entry.size
+        for tag in entry.tags:
+            keys = stripe.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del stripe.tag_index[tag]
+        return entry
+
+    def _expire(self, stripe: _Stripe, now: float) -> None:
+        heap = stripe.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = stripe.entries.get(key)
+            # Heap entries are lazy: skip keys that were overwritten since
+            if entry is not None and entry.expires_at == expires_at:
+                self._unlink(stripe, key)
+                stripe.expirations += 1
+        # Overwrites leave stale heap items behind; compact when they dominate
+        if len(heap) > 2 * len(stripe.entries) + 64:
+            stripe.expiry_heap = [(e.expires_at, k) for k, e in stripe.entries.items()]
+            heapq.heapify(stripe.expiry_heap)
+
+    def _evict(self, stripe: _Stripe) -> None:
+        while stripe.entries and (
+            len(stripe.entries) > self._stripe_max_entries
+            or stripe.bytes > self._stripe_max_bytes
+        ):
+            key = next(iter(stripe.entries))
+            self._unlink(stripe, key)
+            stripe.evictions += 1
+
+    # Public API
+
+    def get(self, key: str) -> Optional[Any]:
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            if entry is None:
+                stripe.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                self._unlink(stripe, key)
+                stripe.expirations += 1
+                stripe.misses += 1
+                return None
+            stripe.entries.move_to_end(key)
+            stripe.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> None:
+        ttl = ttl or self._default_ttl
+        size = estimate_size(key) + estimate_size(value)
+        all_tags = tuple(dict.fromkeys((key_prefix(key), *tags)))
+        stripe = self._stripe_for(key)
+        now = time.time()
+        expires_at = now + ttl
+
+        with stripe.lock:
+            self._unlink(stripe, key)
+            if size > self._stripe_max_bytes:
+                # Larger than the whole stripe budget: never cacheable
+                stripe.evictions += 1
+                return
+            stripe.entries[key] = _Entry(value, expires_at, size, all_tags)
+            stripe.bytes += size
+            for tag in all_tags:
+                stripe.tag_index.setdefault(tag, set()).add(key)
+            heapq.heappush(stripe.expiry_heap, (expires_at, key))
+            self._expire(stripe, now)
+            self._evict(stripe)
+
+    def delete(self, key: str) -> bool:
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            return self._unlink(stripe, key) is not None
+
+    def clear(self) -> None:
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+                stripe.expiry_heap.clear()
+                stripe.tag_index.clear()
+                stripe.bytes = 0
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Remove every key carrying `tag` (including its prefix tag)."""
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                keys = stripe.tag_index.get(tag)
+                if not keys:
+                    continue
+                for key in list(keys):
+                    self._unlink(stripe, key)
+                    removed += 1
+        return removed
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        """
+        Remove keys containing `pattern` and keys tagged with it. A pattern that
+        is also a tag still needs the scan: it can occur inside other keys.
+        """
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                keys = set(stripe.tag_index.get(pattern, ()))
+                keys.update(k for k in stripe.entries if pattern in k)
+                for key in keys:
+                    self._unlink(stripe, key)
+                    removed += 1
+        return removed
+
+    def purge_expired(self) -> None:
+        """Drop expired entries; cost is proportional to what expired."""
+        now = time.time()
+        for stripe in self._stripes:
+            with stripe.lock:
+                self._expire(stripe, now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aggregate per-stripe counters. O(stripes), never touches values."""
+        totals = {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                totals["entries"] += len(stripe.entries)
+                totals["bytes"] += stripe.bytes
+                totals["hits"] += stripe.hits
+                totals["misses"] += stripe.misses
+                totals["evictions"] += stripe.evictions
+                totals["expirations"] += stripe.expirations
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "backend": "memory",
+            "total_entries": totals["entries"],
+            "memory_usage_bytes": totals["bytes"],
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "hits": totals["hits"],
+            "misses": totals["misses"],
+            "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+            "evictions": totals["evictions"],
+            "expirations": totals["expirations"],
+            "stripes": len(self._stripes),
+        }
+
+
+class _Call:
+    """An in-flight computation that followers wait on."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, everyone else arriving meanwhile waits for and shares its result.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+@dataclass
+class _Stamped:
+    """Cached value plus the time it stops being fresh."""
+    value: Any
+    fresh_until: float
+
+
+def read_through(
+    store: Any,
+    flight: SingleFlight,
+    cache_key: str,
+    compute: Callable[[], Any],
+    ttl: int,
+    stale_ttl: int = 0,
+) -> Any:
+    """
+    Cache-aside lookup with single-flight recomputation.
+
+    With `stale_ttl` > 0 a value stays servable for `stale_ttl` seconds after
+    it expires; the first caller to see it stale starts one background refresh
+    and everybody keeps getting the stale value until the refresh lands.
+    """
+    def load() -> Any:
+        result = compute()
+        if result is not None:
+            store.set(cache_key, _Stamped(result, time.time() + ttl), ttl + stale_ttl)
+        return result
+
+    stamped = store.get(cache_key)
+    if isinstance(stamped, _Stamped):
+        if stamped.fresh_until > time.time():
+            return stamped.value
+        if stale_ttl > 0:
+            if not flight.in_flight(cache_key):
+                Thread(target=_refresh, args=(flight, cache_key, load), daemon=True).start()
+            return stamped.value
+
+    return flight.do(cache_key, load)
+
+
+def _refresh(flight: SingleFlight, cache_key: str, load: Callable[[], Any]) -> None:
+    try:
+        flight.do(cache_key, load)
+    except Exception as e:
+        logger.warning(f"Background refresh of {cache_key} failed: {e}")
@@ -29,6 +29,18 @@ class Config:
     MYSQL_USER = os.environ.get("MYSQL_USER", "root")
     MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD", "")
     MYSQL_DATABASE = os.environ.get("MYSQL_DATABASE", "purabali")
+    # Async pool used by the API handlers
+    DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+    DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+    DB_POOL_ACQUIRE_TIMEOUT = float(os.environ.get("DB_POOL_ACQUIRE_TIMEOUT", "5"))
+    DB_POOL_MAX_WAITERS = int(os.environ.get("DB_POOL_MAX_WAITERS", "100"))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "3600"))
+    # MATCH ... AGAINST for /api/pura?q= on MySQL; needs ft_pura_text from migrations/001_pura_search_indexes.sql
+    DB_FULLTEXT_SEARCH = os.environ.get("DB_FULLTEXT_SEARCH", "false").lower() == "true"
+    # Server's innodb_ft_min_token_size; shorter words are left out of the MATCH terms
+    DB_FULLTEXT_MIN_TOKEN = int(os.environ.get("DB_FULLTEXT_MIN_TOKEN", "3"))
+    # Sync pool kept for scripts and thread-pool code
+    DB_SYNC_POOL_SIZE = int(os.environ.get("DB_SYNC_POOL_SIZE", "5"))
 
     # Cache
     CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
@@ -37,7 +49,13 @@ class Config:
     CACHE_PURA_GAMBAR_TTL = int(os.environ.get("CACHE_PURA_GAMBAR_TTL", "3600"))
     CACHE_PURA_DETAIL_TTL = int(os.environ.get("CACHE_PURA_DETAIL_TTL", "3600"))
     CACHE_FILTER_TTL = int(os.environ.get("CACHE_FILTER_TTL", "7200"))
+    CACHE_STALE_TTL = int(os.environ.get("CACHE_STALE_TTL", "300"))
     CACHE_LOG_LEVEL = os.environ.get("CACHE_LOG_LEVEL", "INFO")
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_LOCK_STRIPES = int(os.environ.get("CACHE_LOCK_STRIPES", "16"))
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+    CACHE_SQLITE_PATH = os.environ.get("CACHE_SQLITE_PATH", "")
 
     # Gemini
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
@@ -46,15 +64,70 @@ class Config:
     GEMINI_TEMPERATURE = float(os.environ.get("GEMINI_TEMPERATURE", "0.2"))
     GEMINI_TOP_P = float(os.environ.get("GEMINI_TOP_P", "0.9"))
     GEMINI_MAX_TOKENS = int(os.environ.get("GEMINI_MAX_TOKENS", "512"))
+    GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "32"))
 
     # Model
     MODEL_CACHE_DIR = os.environ.get("MODEL_CACHE_DIR", "./models")
     MODEL_NAME = os.environ.get("MODEL_NAME", "intfloat/multilingual-e5-large")
     MODEL_CACHE_VERSION = os.environ.get("MODEL_CACHE_VERSION", "1.0")
+    MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "torch")  # torch | torch-int8
+    MODEL_LAZY_LOAD = os.environ.get("MODEL_LAZY_LOAD", "false").lower() == "true"
+    MODEL_VERIFY_CHECKSUMS = os.environ.get("MODEL_VERIFY_CHECKSUMS", "false").lower() == "true"
+
+    # Query embedding micro-batching
+    EMBED_BATCH_ENABLED = os.environ.get("EMBED_BATCH_ENABLED", "true").lower() == "true"
+    EMBED_BATCH_MAX_SIZE = int(os.environ.get("EMBED_BATCH_MAX_SIZE", "32"))
+    EMBED_BATCH_WAIT_MS = float(os.environ.get("EMBED_BATCH_WAIT_MS", "5"))
+    EMBED_DOC_BATCH_SIZE = int(os.environ.get("EMBED_DOC_BATCH_SIZE", "32"))
+
+    # Offline indexing pipeline (build_index.py)
+    INDEX_BUILD_WORK_DIR = os.environ.get("INDEX_BUILD_WORK_DIR", "./models/index_build")
+    INDEX_BUILD_WORKERS = int(os.environ.get("INDEX_BUILD_WORKERS", "2"))
+    INDEX_BUILD_SHARD_SIZE = int(os.environ.get("INDEX_BUILD_SHARD_SIZE", "1024"))
 
     # Search
     SEARCH_DEFAULT_TOP_K = int(os.environ.get("SEARCH_DEFAULT_TOP_K", "3"))
     SEARCH_MAX_CANDIDATES = int(os.environ.get("SEARCH_MAX_CANDIDATES", "10"))
+    SEARCH_FILTER_EXACT_MAX = int(os.environ.get("SEARCH_FILTER_EXACT_MAX", "4096"))
+    SEARCH_EXECUTOR_WORKERS = int(os.environ.get("SEARCH_EXECUTOR_WORKERS", "8"))
+    SEARCH_MAX_PENDING = int(os.environ.get("SEARCH_MAX_PENDING", "64"))
+    SEARCH_EMBED_CACHE_SIZE = int(os.environ.get("SEARCH_EMBED_CACHE_SIZE", "2048"))
+    SEARCH_RESULT_CACHE_SIZE = int(os.environ.get("SEARCH_RESULT_CACHE_SIZE", "2048"))
+    SEARCH_HYBRID_ENABLED = os.environ.get("SEARCH_HYBRID_ENABLED", "true").lower() == "true"
+    SEARCH_HYBRID_CANDIDATES = int(os.environ.get("SEARCH_HYBRID_CANDIDATES", "20"))
+    SEARCH_RRF_K = int(os.environ.get("SEARCH_RRF_K", "60"))
+
+    # Cross-encoder reranking (CPU); disabled unless configured
+    RERANK_ENABLED = os.environ.get("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL = os.environ.get("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", "20"))
+    RERANK_TOP_K = int(os.environ.get("RERANK_TOP_K", "2"))
+    RERANK_BUDGET_MS = float(os.environ.get("RERANK_BUDGET_MS", "150"))
+    RERANK_MAX_LENGTH = int(os.environ.get("RERANK_MAX_LENGTH", "256"))
+    RERANK_CACHE_SIZE = int(os.environ.get("RERANK_CACHE_SIZE", "8192"))
+    # Seconds between probe batches while the measured speed says a batch can't fit the budget
+    RERANK_PROBE_SECONDS = float(os.environ.get("RERANK_PROBE_SECONDS", "10"))
+
+    # Semantic answer cache (TTL follows CACHE_PURA_DATA_TTL)
+    ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "1024"))
+
+    # Index
+    INDEX_CACHE_DIR = os.environ.get("INDEX_CACHE_DIR", "./models/index")
+    INDEX_MMAP = os.environ.get("INDEX_MMAP", "true").lower() == "true"
+    INDEX_TYPE = os.environ.get("INDEX_TYPE", "flat")  # flat | hnsw | ivf_flat | ivf_pq | opq
+    INDEX_NLIST = int(os.environ.get("INDEX_NLIST", "1024"))
+    INDEX_NPROBE = int(os.environ.get("INDEX_NPROBE", "16"))
+    INDEX_HNSW_M = int(os.environ.get("INDEX_HNSW_M", "32"))
+    INDEX_HNSW_EF_CONSTRUCTION = int(os.environ.get("INDEX_HNSW_EF_CONSTRUCTION", "200"))
+    INDEX_HNSW_EF_SEARCH = int(os.environ.get("INDEX_HNSW_EF_SEARCH", "64"))
+    INDEX_PQ_M = int(os.environ.get("INDEX_PQ_M", "64"))
+    INDEX_PQ_NBITS = int(os.environ.get("INDEX_PQ_NBITS", "8"))
+    INDEX_REBUILD_INTERVAL = float(os.environ.get("INDEX_REBUILD_INTERVAL", "0"))  # seconds, 0 = on demand only
+    INDEX_BUILD_RETRY_SECONDS = float(os.environ.get("INDEX_BUILD_RETRY_SECONDS", "30"))
+    # Delay before retrying a failed catalogue snapshot build
+    CATALOGUE_RETRY_SECONDS = float(os.environ.get("CATALOGUE_RETRY_SECONDS", "30"))
 
     @classmethod
     def is_production(cls):
@@ -4,6 +4,10 @@ from app.db import fetch_pura_data
 def hash_chunk(text: str) -> str:
     return hashlib.md5(text.strip().lower().encode()).hexdigest()
 
+def chunk_id(chunk_hash: str) -> int:
+    # Stable 60-bit FAISS id derived from the chunk hash
+    return int(chunk_hash[:15], 16)
+
 def build_chunks_from_row(row: dict):
     chunks = []
     chunks.append(("intro", f"{row['nama_pura']} adalah pura jenis {row['nama_jenis_pura']} yang berada di Kabupaten {row['nama_kabupaten']}."))
@@ -15,13 +19,27 @@ def build_chunks_from_row(row: dict):
         chunks.append(("lokasi", f"Lokasi Google Maps: {row['link_lokasi']}"))
     return chunks
 
-def load_corpus():
-    data = fetch_pura_data()
+def _coordinate(value):
+    # DECIMAL columns arrive as Decimal; metadata is stored as JSON
+    return float(value) if value is not None else None
+
+def display_fields(row: dict) -> dict:
+    """Per-pura fields the chat attachments show, carried on every chunk of that pura"""
+    return {
+        "link_lokasi": row.get("link_lokasi") or "",
+        "link_gambar": row.get("link_gambar") or "",
+        "latitude": _coordinate(row.get("latitude")),
+        "longitude": _coordinate(row.get("longitude")),
+    }
+
+def chunks_from_rows(rows):
+    """Deduplicated (texts, metadata) chunks for pura rows, in row order"""
     seen_hashes = set()
     texts = []
     metadata = []
-    for row in data:
+    for row in rows:
         chunks = build_chunks_from_row(row)
+        display = display_fields(row)
         for chunk_type, chunk in chunks:
             h = hash_chunk(chunk)
             if h in seen_hashes:
@@ -34,6 +52,11 @@ def load_corpus():
                 "jenis": row["nama_jenis_pura"],
                 "kabupaten": row["nama_kabupaten"],
                 "type": chunk_type,
-                "chunk": chunk
+                "chunk": chunk,
+                "hash": h,
+                **display
             })
     return texts, metadata
+
+def load_corpus():
+    return chunks_from_rows(fetch_pura_data())
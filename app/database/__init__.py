@@ -3,12 +3,19 @@ Database layer for the application.
 """
 
 from .connection import get_db_connection, DatabaseConnection
+from .async_connection import get_async_db_connection, AsyncDatabaseConnection
 from .models import PuraRepository, KabupatenRepository, JenisPuraRepository
+from .async_models import AsyncPuraRepository, AsyncKabupatenRepository, AsyncJenisPuraRepository
 
 __all__ = [
     "get_db_connection",
     "DatabaseConnection", 
+    "get_async_db_connection",
+    "AsyncDatabaseConnection",
     "PuraRepository",
     "KabupatenRepository",
-    "JenisPuraRepository"
-] 
\ No newline at end of file
+    "JenisPuraRepository",
+    "AsyncPuraRepository",
+    "AsyncKabupatenRepository",
+    "AsyncJenisPuraRepository"
+] 
@@ -0,0 +1,175 @@
+"""
+Asyncio-native database connection pool.
+
+Route handlers query MySQL through an aiomysql pool so a slow query parks the
+coroutine instead of blocking the event loop. When every connection is in use,
+callers wait in a bounded queue up to an acquire timeout rather than failing at
+once; beyond the queue limit they are rejected immediately. The synchronous
+pool in connection.py stays for scripts and thread-pool code.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import aiomysql
+
+from ..core.config import settings
+from ..core.exceptions import DatabaseException
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseConnection:
+    """aiomysql pool with acquire timeouts, a bounded wait queue and metrics."""
+
+    def __init__(self):
+        self._pool: Optional[aiomysql.Pool] = None
+        self._init_lock: Optional[asyncio.Lock] = None
+        self._min_size = settings.DB_POOL_MIN
+        self._max_size = settings.DB_POOL_MAX
+        self._acquire_timeout = settings.DB_POOL_ACQUIRE_TIMEOUT
+        self._max_waiters = settings.DB_POOL_MAX_WAITERS
+
+        # Metrics
+        self._waiters = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._errors = 0
+        self._acquire_times = deque(maxlen=1024)
+
+    async def initialize_pool(self) -> None:
+        """Create the pool (idempotent)."""
+        if self._pool is not None:
+            return
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._pool is not None:
+                return
+            try:
+                self._pool = await aiomysql.create_pool(
+                    minsize=self._min_size,
+                    maxsize=self._max_size,
+                    host=settings.MYSQL_HOST,
+                    port=settings.MYSQL_PORT,
+                    user=settings.MYSQL_USER,
+                    password=settings.MYSQL_PASSWORD,
+                    db=settings.MYSQL_DATABASE,
+                    charset="utf8mb4",
+                    autocommit=True,
+                    pool_recycle=settings.DB_POOL_RECYCLE,
+                )
+                logger.info(f"Async database pool initialized ({self._min_size}-{self._max_size} connections)")
+            except Exception as e:
+                logger.error(f"Failed to initialize async database pool: {e}")
+                raise DatabaseException(f"Async database pool initialization failed: {e}")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection, waiting up to the acquire timeout when the pool is busy."""
+        if self._pool is None:
+            await self.initialize_pool()
+
+        if self._waiters >= self._max_waiters:
+            self._rejected += 1
+            raise DatabaseException("Database pool wait queue is full")
+
+        started = time.perf_counter()
+        self._waiters += 1
+        try:
+            connection = await asyncio.wait_for(self._pool.acquire(), timeout=self._acquire_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise DatabaseException(f"Timed out after {self._acquire_timeout}s waiting for a database connection")
+        finally:
+            self._waiters -= 1
+        self._acquired += 1
+        self._acquire_times.append(time.perf_counter() - started)
+
+        try:
+            yield connection
+        finally:
+            self._pool.release(connection)
+
+    async def execute_query(self, query: str, params: Optional[tuple] = None) -> list:
+        """Execute a SELECT query and return results as dicts."""
+        async with self.acquire() as connection:
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(query, params or ())
+                    return list(await cursor.fetchall())
+            except Exception as e:
+                self._errors += 1
+                logger.error(f"Database operation failed: {e}")
+                raise DatabaseException(f"Database operation failed: {e}")
+
+    async def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
+        """Execute an UPDATE/INSERT/DELETE query and return affected rows."""
+        async with self.acquire() as connection:
+            try:
+                async with connection.cursor() as cursor:
+                    return await cursor.execute(query, params or ())
+            except Exception as e:
+                self._errors += 1
+                logger.error(f"Database operation failed: {e}")
+                raise DatabaseException(f"Database operation failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        times = sorted(self._acquire_times)
+
+        def percentile(p: float) -> Optional[float]:
+            if not times:
+                return None
+            return round(times[min(len(times) - 1, int(p * len(times)))] * 1000, 3)
+
+        size = self._pool.size if self._pool else 0
+        free = self._pool.freesize if self._pool else 0
+        return {
+            "initialized": self._pool is not None,
+            "min_size": self._min_size,
+            "max_size": self._max_size,
+            "size": size,
+            "in_use": size - free,
+            "free": free,
+            "waiters": self._waiters,
+            "max_waiters": self._max_waiters,
+            "acquired": self._acquired,
+            "timeouts": self._timeouts,
+            "rejected": self._rejected,
+            "errors": self._errors,
+            "acquire_ms_p50": percentile(0.50),
+            "acquire_ms_p99": percentile(0.99),
+            "acquire_ms_max": round(times[-1] * 1000, 3) if times else None,
+        }
+
+    async def close_pool(self) -> None:
+        """Close the pool and wait for connections to be released."""
+        if self._pool:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+            logger.info("Async database pool closed")
+
+
+# Global async database connection instance
+_async_db_connection = AsyncDatabaseConnection()
+
+
+def get_async_db_connection() -> AsyncDatabaseConnection:
+    """Get the global async database connection instance."""
+    return _async_db_connection
+
+
+async def initialize_async_database() -> None:
+    """Initialize the async connection pool."""
+    await _async_db_connection.initialize_pool()
+
+
+async def close_async_database() -> None:
+    """Close the async connection pool."""
+    await _async_db_connection.close_pool()
@@ -0,0 +1,105 @@
+"""
+Async repositories for route handlers, backed by the aiomysql pool.
+
+Same queries and return shapes as the sync repositories in models.py.
+"""
+
+from typing import List, Dict, Any, Optional
+import logging
+
+from .async_connection import get_async_db_connection
+from .models import (
+    ALL_PURA_QUERY, PURA_BY_ID_QUERY, PURA_GAMBAR_QUERY, KABUPATEN_QUERY, JENIS_PURA_QUERY,
+    pura_by_ids_query, order_by_ids, build_search_queries,
+    count_cache_key, decode_cursor, search_page, ranked_offset, ranked_page,
+)
+from ..cache import cache
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPuraRepository:
+    """Async repository for Pura (temple) data operations."""
+    
+    def __init__(self):
+        self.db = get_async_db_connection()
+    
+    async def get_all_pura(self) -> List[Dict[str, Any]]:
+        """Get all pura data with joins."""
+        return await self.db.execute_query(ALL_PURA_QUERY)
+    
+    async def get_pura_by_id(self, id_pura: str) -> Optional[Dict[str, Any]]:
+        """Get pura by ID."""
+        results = await self.db.execute_query(PURA_BY_ID_QUERY, (id_pura,))
+        return results[0] if results else None
+    
+    async def get_pura_gambar(self, id_pura: str) -> str:
+        """Get pura image link."""
+        results = await self.db.execute_query(PURA_GAMBAR_QUERY, (id_pura,))
+        if results and results[0]:
+            return str(results[0].get("link_gambar", ""))
+        return ""
+    
+    async def get_pura_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Get pura by primary key, in the order of `ids`."""
+        if not ids:
+            return []
+        return order_by_ids(await self.db.execute_query(pura_by_ids_query(len(ids)), list(ids)), ids)
+    
+    async def rank_pura(
+        self,
+        ranked_ids: List[str],
+        page: int = 1,
+        limit: int = 12,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Paginate an already ranked list of pura ids (e.g. from the lexical index)."""
+        offset = ranked_offset(page, limit, cursor)
+        data_results = await self.get_pura_by_ids(ranked_ids[offset:offset + limit])
+        return ranked_page(data_results, offset, limit, len(ranked_ids), None if cursor else page)
+    
+    async def search_pura(
+        self,
+        query: Optional[str] = None,
+        jenis: Optional[str] = None,
+        kabupaten: Optional[str] = None,
+        page: int = 1,
+        limit: int = 12,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Search pura with filters and pagination (keyset when `cursor` is given)."""
+        after = decode_cursor(cursor) if cursor else None
+        count_query, params, data_query, data_params = build_search_queries(query, jenis, kabupaten, page, limit, after)
+        
+        count_key = count_cache_key(query, jenis, kabupaten)
+        total_count = cache.get(count_key)
+        if total_count is None:
+            count_result = await self.db.execute_query(count_query, params)
+            total_count = int(count_result[0]["total"]) if count_result else 0
+            cache.set(count_key, total_count, settings.CACHE_PURA_DATA_TTL)
+        data_results = await self.db.execute_query(data_query, data_params)
+        
+        return search_page(data_results, None if cursor else page, limit, total_count)
+
+
+class AsyncKabupatenRepository:
+    """Async repository for Kabupaten (regency) data operations."""
+    
+    def __init__(self):
+        self.db = get_async_db_connection()
+    
+    async def get_all_kabupaten(self) -> List[Dict[str, Any]]:
+        """Get all kabupaten with pura count."""
+        return await self.db.execute_query(KABUPATEN_QUERY)
+
+
+class AsyncJenisPuraRepository:
+    """Async repository for Jenis Pura (temple type) data operations."""
+    
+    def __init__(self):
+        self.db = get_async_db_connection()
+    
+    async def get_all_jenis_pura(self) -> List[Dict[str, Any]]:
+        """Get all jenis pura with pura count."""
+        return await self.db.execute_query(JENIS_PURA_QUERY)
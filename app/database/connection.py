@@ -2,9 +2,10 @@
 Database connection management.
 """
 
+import threading
 import mysql.connector
 from mysql.connector import pooling
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Sequence
 from contextlib import contextmanager
 import logging
 
@@ -19,12 +20,14 @@ class DatabaseConnection:
     
     def __init__(self):
         self._pool: Optional[pooling.MySQLConnectionPool] = None
+        # mysql.connector fails at once on an exhausted pool; threads wait here instead
+        self._slots = threading.BoundedSemaphore(settings.DB_SYNC_POOL_SIZE)
     
     def _get_pool_config(self) -> Dict[str, Any]:
         """Get connection pool configuration."""
         return {
             "pool_name": "purabali_pool",
-            "pool_size": 5,
+            "pool_size": settings.DB_SYNC_POOL_SIZE,
             "host": settings.MYSQL_HOST,
             "port": settings.MYSQL_PORT,
             "user": settings.MYSQL_USER,
@@ -58,24 +61,39 @@ class DatabaseConnection:
             raise DatabaseException(f"Failed to get database connection: {e}")
     
     @contextmanager
-    def get_cursor(self, dictionary: bool = True):
-        """Context manager for database cursor."""
-        connection = None
-        cursor = None
+    def connection(self):
+        """Borrow a pooled connection, waiting up to DB_POOL_ACQUIRE_TIMEOUT when all are in use."""
+        if not self._slots.acquire(timeout=settings.DB_POOL_ACQUIRE_TIMEOUT):
+            raise DatabaseException(
+                f"Timed out after {settings.DB_POOL_ACQUIRE_TIMEOUT}s waiting for a database connection"
+            )
         try:
             connection = self.get_connection()
-            cursor = connection.cursor(dictionary=dictionary)
-            yield cursor
-        except Exception as e:
-            if connection:
-                connection.rollback()
-            logger.error(f"Database operation failed: {e}")
-            raise DatabaseException(f"Database operation failed: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
+            try:
+                yield connection
+            finally:
                 connection.close()
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def get_cursor(self, dictionary: bool = True, prepared: bool = False):
+        """Context manager for database cursor."""
+        with self.connection() as connection:
+            cursor = None
+            try:
+                if prepared:
+                    cursor = connection.cursor(prepared=True)
+                else:
+                    cursor = connection.cursor(dictionary=dictionary)
+                yield cursor
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Database operation failed: {e}")
+                raise DatabaseException(f"Database operation failed: {e}")
+            finally:
+                if cursor:
+                    cursor.close()
     
     def execute_query(self, query: str, params: Optional[tuple] = None) -> list:
         """Execute a SELECT query and return results."""
@@ -83,6 +101,40 @@ class DatabaseConnection:
             cursor.execute(query, params or ())
             return cursor.fetchall()
     
+    def execute_prepared(self, query: str, params: Optional[Sequence] = None) -> List[Dict[str, Any]]:
+        """Execute a SELECT as a server-side prepared statement and return rows as dicts."""
+        return self.execute_prepared_many(query, [params or ()])[0]
+    
+    def execute_prepared_many(self, query: str, params_list: Sequence[Sequence]) -> List[List[Dict[str, Any]]]:
+        """Prepare `query` once and execute it for every parameter set on one connection."""
+        results = []
+        with self.get_cursor(prepared=True) as cursor:
+            for params in params_list:
+                cursor.execute(query, tuple(params))
+                columns = cursor.column_names
+                results.append([dict(zip(columns, _decode_row(row))) for row in cursor.fetchall()])
+        return results
+    
+    def stream_query(self, query: str, params: Optional[tuple] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield the rows of a large SELECT through an unbuffered cursor, `batch_size` at a time."""
+        with self.connection() as connection:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            try:
+                cursor.execute(query, params or ())
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+            except mysql.connector.Error as e:
+                logger.error(f"Database operation failed: {e}")
+                raise DatabaseException(f"Database operation failed: {e}")
+            finally:
+                # A half-read result would poison the connection for its next user
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
+    
     def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
         """Execute an UPDATE/INSERT/DELETE query and return affected rows."""
         with self.get_cursor() as cursor:
@@ -92,11 +144,17 @@ class DatabaseConnection:
     def close_pool(self) -> None:
         """Close the connection pool."""
         if self._pool:
-            self._pool.close()
+            # MySQLConnectionPool has no close(); this closes the idle connections
+            self._pool._remove_connections()
             self._pool = None
             logger.info("Database connection pool closed")
 
 
+def _decode_row(row: Sequence) -> list:
+    # The binary protocol can hand back text columns as bytes, depending on the driver build
+    return [value.decode("utf-8") if isinstance(value, (bytes, bytearray)) else value for value in row]
+
+
 # Global database connection instance
 _db_connection = DatabaseConnection()
 
@@ -2,12 +2,17 @@
 Database models and repositories for data access.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+import re
+import json
+import base64
 import logging
 
 from .connection import get_db_connection
-from ..core.exceptions import NotFoundException, DatabaseException
+from ..cache import cache
+from ..core.config import settings
+from ..core.exceptions import NotFoundException, DatabaseException, ValidationException
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +48,238 @@ class JenisPura:
     pura_count: int
 
 
+# Shared by the sync repositories below and the async ones in async_models.py
+PURA_COLUMNS = """
+    p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri, 
+    p.link_lokasi, p.latitude, p.longitude, p.link_gambar, 
+    j.nama_jenis_pura, k.nama_kabupaten
+"""
+
+PURA_FROM = """
+    FROM pura p
+    LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
+    LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
+"""
+
+ALL_PURA_QUERY = f"SELECT {PURA_COLUMNS} {PURA_FROM} ORDER BY p.nama_pura ASC"
+PURA_BY_ID_QUERY = f"SELECT {PURA_COLUMNS} {PURA_FROM} WHERE p.id_pura = %s"
+PURA_GAMBAR_QUERY = "SELECT link_gambar FROM pura WHERE id_pura = %s"
+
+# Cached search totals per filter combination; dropped by invalidate_pura_cache
+COUNT_CACHE_PREFIX = "pura_count"
+
+KABUPATEN_QUERY = """
+    SELECT k.id_kabupaten, k.nama_kabupaten, COUNT(p.id_pura) as pura_count
+    FROM kabupaten k
+    LEFT JOIN pura p ON k.id_kabupaten = p.id_kabupaten
+    GROUP BY k.id_kabupaten, k.nama_kabupaten
+    ORDER BY k.nama_kabupaten
+"""
+
+JENIS_PURA_QUERY = """
+    SELECT j.id_jenis_pura, j.nama_jenis_pura, COUNT(p.id_pura) as pura_count
+    FROM jenis_pura j
+    LEFT JOIN pura p ON j.id_jenis_pura = p.id_jenis_pura
+    GROUP BY j.id_jenis_pura, j.nama_jenis_pura
+    ORDER BY j.nama_jenis_pura
+"""
+
+
+def pura_by_ids_query(count: int) -> str:
+    placeholders = ", ".join(["%s"] * count)
+    return f"SELECT {PURA_COLUMNS} {PURA_FROM} WHERE p.id_pura IN ({placeholders})"
+
+
+def order_by_ids(rows: List[Dict[str, Any]], ids: List[str]) -> List[Dict[str, Any]]:
+    """Rows from an IN (...) query, in the order of `ids`."""
+    by_id = {str(row["id_pura"]): row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+# InnoDB's default full-text stopword list (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+INNODB_FT_STOPWORDS = frozenset(
+    "a about an are as at be by com de en for from how i in is it la of on or that the "
+    "this to was what when where who will with und www".split()
+)
+
+
+def fulltext_query(query: str) -> str:
+    """
+    BOOLEAN MODE search string: every indexed word required, the last one as a
+    prefix. Words InnoDB never indexes (shorter than innodb_ft_min_token_size, or
+    stopwords such as "di") can't match, so requiring them would empty the
+    result; they are dropped. An empty string means nothing is searchable.
+    """
+    words = [
+        word for word in re.findall(r"\w+", query)
+        if len(word) >= settings.DB_FULLTEXT_MIN_TOKEN and word.lower() not in INNODB_FT_STOPWORDS
+    ]
+    return " ".join(f"+{word}" for word in words[:-1]) + (f" +{words[-1]}*" if words else "")
+
+
+def _search_where(query: Optional[str], jenis: Optional[str], kabupaten: Optional[str]) -> Tuple[str, list]:
+    where_clause = "WHERE 1=1"
+    params = []
+    
+    # Add search filters
+    if query:
+        terms = fulltext_query(query) if settings.DB_FULLTEXT_SEARCH else ""
+        if terms.strip():
+            # Backed by ft_pura_text (migrations/001_pura_search_indexes.sql)
+            where_clause += " AND MATCH(p.nama_pura, p.deskripsi_singkat) AGAINST (%s IN BOOLEAN MODE)"
+            params.append(terms.strip())
+        else:
+            where_clause += " AND (p.nama_pura LIKE %s OR p.deskripsi_singkat LIKE %s)"
+            params.extend([f"%{query}%", f"%{query}%"])
+    
+    if jenis:
+        where_clause += " AND j.nama_jenis_pura = %s"
+        params.append(jenis)
+    
+    if kabupaten:
+        where_clause += " AND k.nama_kabupaten = %s"
+        params.append(kabupaten)
+    
+    return where_clause, params
+
+
+def build_search_queries(
+    query: Optional[str],
+    jenis: Optional[str],
+    kabupaten: Optional[str],
+    page: int,
+    limit: int,
+    after: Optional[Tuple[str, str]] = None
+) -> Tuple[str, list, str, list]:
+    """
+    (count query, params, data query, params) for search_pura. With `after`
+    (the sort key of the previous page's last row) the data query seeks past it
+    instead of using OFFSET. One extra row is fetched to detect a next page.
+    """
+    where_clause, params = _search_where(query, jenis, kabupaten)
+    
+    # The count only joins the tables its filters need
+    count_from = "FROM pura p"
+    if jenis:
+        count_from += " JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura"
+    if kabupaten:
+        count_from += " JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten"
+    count_query = f"SELECT COUNT(*) as total {count_from} {where_clause}"
+    
+    data_params = list(params)
+    if after is not None:
+        where_clause += " AND (p.nama_pura > %s OR (p.nama_pura = %s AND p.id_pura > %s))"
+        data_params.extend([after[0], after[0], after[1]])
+        page_clause = "LIMIT %s"
+        data_params.append(limit + 1)
+    else:
+        page_clause = "LIMIT %s OFFSET %s"
+        data_params.extend([limit + 1, (page - 1) * limit])
+    
+    data_query = f"""
+        SELECT {PURA_COLUMNS} {PURA_FROM}
+        {where_clause}
+        ORDER BY p.nama_pura ASC, p.id_pura ASC
+        {page_clause}
+    """
+    return count_query, params, data_query, data_params
+
+
+def count_cache_key(query: Optional[str], jenis: Optional[str], kabupaten: Optional[str]) -> str:
+    return f"{COUNT_CACHE_PREFIX}:{query or ''}|{jenis or ''}|{kabupaten or ''}"
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    raw = json.dumps([row["nama_pura"], str(row["id_pura"])], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        nama_pura, id_pura = json.loads(raw)
+        return str(nama_pura), str(id_pura)
+    except (ValueError, TypeError) as e:
+        raise ValidationException(f"Invalid pagination cursor: {cursor}") from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque cursor for a ranked result list, which has no sort key to seek on."""
+    raw = json.dumps({"offset": offset}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        offset = json.loads(raw)["offset"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return offset
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationException(f"Invalid pagination cursor: {cursor}") from e
+
+
+def ranked_offset(page: int, limit: int, cursor: Optional[str] = None) -> int:
+    """Start of the requested page in a ranked id list."""
+    return decode_offset_cursor(cursor) if cursor else (page - 1) * limit
+
+
+def ranked_page(
+    data: List[Dict[str, Any]],
+    offset: int,
+    limit: int,
+    total_count: int,
+    page: Optional[int]
+) -> Dict[str, Any]:
+    """Paginate one window of a ranked id list (`page` None for a cursor page)."""
+    has_next = offset + limit < total_count
+    next_cursor = encode_offset_cursor(offset + limit) if has_next else None
+    return paginate(data, page, limit, total_count, has_next=has_next, next_cursor=next_cursor)
+
+
+def paginate(
+    data: List[Dict[str, Any]],
+    page: Optional[int],
+    limit: int,
+    total_count: int,
+    has_next: Optional[bool] = None,
+    next_cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Response body with pagination metadata. `page` is None for a cursor page:
+    its number is unknown, and a cursor is only ever issued past the first page.
+    """
+    total_pages = (total_count + limit - 1) // limit
+    if has_next is None:
+        has_next = page < total_pages
+    has_prev = page is None or page > 1
+    
+    return {
+        "data": data,
+        "pagination": {
+            "page": page,
+            "limit": limit,
+            "total": total_count,
+            "total_pages": total_pages,
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "next_page": page + 1 if has_next and page is not None else None,
+            "prev_page": page - 1 if has_prev and page is not None else None,
+            "next_cursor": next_cursor
+        }
+    }
+
+
+def search_page(rows: List[Dict[str, Any]], page: Optional[int], limit: int, total_count: int) -> Dict[str, Any]:
+    """Paginate the `limit + 1` rows of a search data query (`page` None for a cursor page)."""
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]) if has_next and rows else None
+    return paginate(rows, page, limit, total_count, has_next=has_next, next_cursor=next_cursor)
+
+
 class PuraRepository:
     """Repository for Pura (temple) data operations."""
     
@@ -51,119 +288,60 @@ class PuraRepository:
     
     def get_all_pura(self) -> List[Dict[str, Any]]:
         """Get all pura data with joins."""
-        query = """
-            SELECT 
-                p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri,
-                p.link_lokasi, p.latitude, p.longitude, p.link_gambar,
-                j.nama_jenis_pura, k.nama_kabupaten
-            FROM pura p
-            LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-            LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-            ORDER BY p.nama_pura ASC
-        """
-        return self.db.execute_query(query)
+        return self.db.execute_query(ALL_PURA_QUERY)
     
     def get_pura_by_id(self, id_pura: str) -> Optional[Dict[str, Any]]:
         """Get pura by ID."""
-        query = """
-            SELECT p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri, 
-                   p.link_lokasi, p.latitude, p.longitude, p.link_gambar, 
-                   j.nama_jenis_pura, k.nama_kabupaten
-            FROM pura p
-            LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-            LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-            WHERE p.id_pura = %s
-        """
-        results = self.db.execute_query(query, (id_pura,))
+        results = self.db.execute_query(PURA_BY_ID_QUERY, (id_pura,))
         return results[0] if results else None
     
     def get_pura_gambar(self, id_pura: str) -> str:
         """Get pura image link."""
-        query = "SELECT link_gambar FROM pura WHERE id_pura = %s"
-        results = self.db.execute_query(query, (id_pura,))
+        results = self.db.execute_query(PURA_GAMBAR_QUERY, (id_pura,))
         if results and results[0]:
             return str(results[0].get("link_gambar", ""))
         return ""
     
+    def get_pura_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Get pura by primary key, in the order of `ids`."""
+        if not ids:
+            return []
+        return order_by_ids(self.db.execute_query(pura_by_ids_query(len(ids)), list(ids)), ids)
+    
+    def rank_pura(
+        self,
+        ranked_ids: List[str],
+        page: int = 1,
+        limit: int = 12,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Paginate an already ranked list of pura ids (e.g. from the lexical index)."""
+        offset = ranked_offset(page, limit, cursor)
+        data_results = self.get_pura_by_ids(ranked_ids[offset:offset + limit])
+        return ranked_page(data_results, offset, limit, len(ranked_ids), None if cursor else page)
+    
     def search_pura(
         self,
         query: Optional[str] = None,
         jenis: Optional[str] = None,
         kabupaten: Optional[str] = None,
         page: int = 1,
-        limit: int = 12
+        limit: int = 12,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Search pura with filters and pagination."""
-        offset = (page - 1) * limit
-        
-        # Base query parts
-        select_clause = """
-            SELECT p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri, 
-                   p.link_lokasi, p.latitude, p.longitude, p.link_gambar, 
-                   j.nama_jenis_pura, k.nama_kabupaten
-            FROM pura p
-            LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-            LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-        """
-        
-        where_clause = "WHERE 1=1"
-        params = []
-        
-        # Add search filters
-        if query:
-            where_clause += " AND (p.nama_pura LIKE %s OR p.deskripsi_singkat LIKE %s)"
-            params.extend([f"%{query}%", f"%{query}%"])
+        """Search pura with filters and pagination (keyset when `cursor` is given)."""
+        after = decode_cursor(cursor) if cursor else None
+        count_query, params, data_query, data_params = build_search_queries(query, jenis, kabupaten, page, limit, after)
         
-        if jenis:
-            where_clause += " AND j.nama_jenis_pura = %s"
-            params.append(jenis)
-        
-        if kabupaten:
-            where_clause += " AND k.nama_kabupaten = %s"
-            params.append(kabupaten)
-        
-        # Count query
-        count_query = f"""
-            SELECT COUNT(*) as total
-            FROM pura p
-            LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-            LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-            {where_clause}
-        """
-        
-        # Data query
-        data_query = f"""
-            {select_clause}
-            {where_clause}
-            ORDER BY p.nama_pura ASC 
-            LIMIT %s OFFSET %s
-        """
-        
-        # Execute queries
-        count_result = self.db.execute_query(count_query, params)
-        total_count = int(count_result[0]["total"]) if count_result else 0
-        
-        data_params = params + [limit, offset]
+        count_key = count_cache_key(query, jenis, kabupaten)
+        total_count = cache.get(count_key)
+        if total_count is None:
+            count_result = self.db.execute_query(count_query, params)
+            total_count = int(count_result[0]["total"]) if count_result else 0
+            cache.set(count_key, total_count, settings.CACHE_PURA_DATA_TTL)
         data_results = self.db.execute_query(data_query, data_params)
         
-        # Calculate pagination metadata
-        total_pages = (total_count + limit - 1) // limit
-        has_next = page < total_pages
-        has_prev = page > 1
-        
-        return {
-            "data": data_results,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total_count,
-                "total_pages": total_pages,
-                "has_next": has_next,
-                "has_prev": has_prev,
-                "next_page": page + 1 if has_next else None,
-                "prev_page": page - 1 if has_prev else None
-            }
-        }
+        return search_page(data_results, None if cursor else page, limit, total_count)
 
 
 class KabupatenRepository:
@@ -174,14 +352,7 @@ class KabupatenRepository:
     
     def get_all_kabupaten(self) -> List[Dict[str, Any]]:
         """Get all kabupaten with pura count."""
-        query = """
-            SELECT k.id_kabupaten, k.nama_kabupaten, COUNT(p.id_pura) as pura_count
-            FROM kabupaten k
-            LEFT JOIN pura p ON k.id_kabupaten = p.id_kabupaten
-            GROUP BY k.id_kabupaten, k.nama_kabupaten
-            ORDER BY k.nama_kabupaten
-        """
-        return self.db.execute_query(query)
+        return self.db.execute_query(KABUPATEN_QUERY)
 
 
 class JenisPuraRepository:
@@ -192,11 +363,4 @@ class JenisPuraRepository:
     
     def get_all_jenis_pura(self) -> List[Dict[str, Any]]:
         """Get all jenis pura with pura count."""
-        query = """
-            SELECT j.id_jenis_pura, j.nama_jenis_pura, COUNT(p.id_pura) as pura_count
-            FROM jenis_pura j
-            LEFT JOIN pura p ON j.id_jenis_pura = p.id_jenis_pura
-            GROUP BY j.id_jenis_pura, j.nama_jenis_pura
-            ORDER BY j.nama_jenis_pura
-        """
-        return self.db.execute_query(query) 
\ No newline at end of file
+        return self.db.execute_query(JENIS_PURA_QUERY)
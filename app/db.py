@@ -1,112 +1,76 @@
-import mysql.connector
-import os
-from dotenv import load_dotenv
 from app.cache import cached, cache
 from app.config import CacheConfig
+from app.database.connection import get_db_connection
+from app.database.models import (
+    PURA_BY_ID_QUERY, PURA_GAMBAR_QUERY, KABUPATEN_QUERY, JENIS_PURA_QUERY, COUNT_CACHE_PREFIX
+)
 
-load_dotenv()
+# Every query goes through the shared sync pool; no per-call connect/auth handshake
 
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST", "localhost"),
-        user=os.getenv("MYSQL_USER", "root"),
-        password=os.getenv("MYSQL_PASSWORD", ""),
-        database=os.getenv("MYSQL_DATABASE", "purabali")
-    )
+# Rows the RAG corpus is chunked from; shared by fetch_pura_data and the index rebuilds
+PURA_CORPUS_QUERY = """
+    SELECT 
+        p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri,
+        p.link_lokasi, p.latitude, p.longitude, p.link_gambar,
+        j.nama_jenis_pura, k.nama_kabupaten
+    FROM pura p
+    LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
+    LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
+"""
 
-@cached(ttl=CacheConfig.PURA_DATA_TTL, key_prefix="pura_data")
+@cached(ttl=CacheConfig.PURA_DATA_TTL, key_prefix="pura_data", stale_ttl=CacheConfig.STALE_TTL)
 def fetch_pura_data():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT 
-            p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri,
-            p.link_lokasi, p.link_gambar,
-            j.nama_jenis_pura, k.nama_kabupaten
-        FROM pura p
-        LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-        LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return rows
+    return list(stream_pura_data())
+
+def stream_pura_data(batch_size: int = 1000):
+    """Yield corpus rows without buffering the whole result set (uncached)"""
+    yield from get_db_connection().stream_query(PURA_CORPUS_QUERY, batch_size=batch_size)
 
 @cached(ttl=CacheConfig.PURA_GAMBAR_TTL, key_prefix="pura_gambar")
 def get_pura_gambar(pura_id: str) -> str:
     """Get image link for a specific pura - cached version"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT link_gambar FROM pura WHERE id_pura = %s", (pura_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if not row:
+    rows = get_db_connection().execute_prepared(PURA_GAMBAR_QUERY, (pura_id,))
+    if not rows or rows[0].get("link_gambar") is None:
         return ""
-    if isinstance(row, dict):
-        return str(row.get("link_gambar", ""))
-    return str(row[0]) if row[0] is not None else ""
+    return str(rows[0]["link_gambar"])
 
 @cached(ttl=CacheConfig.PURA_DETAIL_TTL, key_prefix="pura_detail")
 def get_pura_by_id_cached(id_pura: str):
     """Get pura details by ID - cached version"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT p.id_pura, p.nama_pura, p.deskripsi_singkat, p.tahun_berdiri, 
-               p.link_lokasi, p.latitude, p.longitude, p.link_gambar, 
-               j.nama_jenis_pura, k.nama_kabupaten
-        FROM pura p
-        LEFT JOIN jenis_pura j ON p.id_jenis_pura = j.id_jenis_pura
-        LEFT JOIN kabupaten k ON p.id_kabupaten = k.id_kabupaten
-        WHERE p.id_pura = %s
-    """, (id_pura,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return row
+    rows = get_db_connection().execute_prepared(PURA_BY_ID_QUERY, (id_pura,))
+    return rows[0] if rows else None
 
-@cached(ttl=CacheConfig.FILTER_TTL, key_prefix="kabupaten_list")
+@cached(ttl=CacheConfig.FILTER_TTL, key_prefix="kabupaten_list", stale_ttl=CacheConfig.STALE_TTL)
 def get_kabupaten_list_cached():
     """Get kabupaten list with pura count - cached version"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT k.id_kabupaten, k.nama_kabupaten, COUNT(p.id_pura) as pura_count
-        FROM kabupaten k
-        LEFT JOIN pura p ON k.id_kabupaten = p.id_kabupaten
-        GROUP BY k.id_kabupaten, k.nama_kabupaten
-        ORDER BY k.nama_kabupaten
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return rows
+    return get_db_connection().execute_query(KABUPATEN_QUERY)
 
-@cached(ttl=CacheConfig.FILTER_TTL, key_prefix="jenis_pura_list")
+@cached(ttl=CacheConfig.FILTER_TTL, key_prefix="jenis_pura_list", stale_ttl=CacheConfig.STALE_TTL)
 def get_jenis_pura_list_cached():
     """Get jenis_pura list with pura count - cached version"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT j.id_jenis_pura, j.nama_jenis_pura, COUNT(p.id_pura) as pura_count
-        FROM jenis_pura j
-        LEFT JOIN pura p ON j.id_jenis_pura = p.id_jenis_pura
-        GROUP BY j.id_jenis_pura, j.nama_jenis_pura
-        ORDER BY j.nama_jenis_pura
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return rows
+    return get_db_connection().execute_query(JENIS_PURA_QUERY)
+
+# Bumped on every pura invalidation so the catalogue snapshot rebuilds. The token
+# is kept in the cache backend, so with CACHE_BACKEND=sqlite it reaches every worker.
+def pura_cache_generation():
+    return cache.generation("pura")
 
 def invalidate_pura_cache():
     """Invalidate all pura-related cache entries"""
-    cache.invalidate_pattern("pura_data")
-    cache.invalidate_pattern("pura_gambar")
-    cache.invalidate_pattern("pura_detail")
+    # Key-prefix tags: the tag index removes these without scanning every key
+    cache.invalidate_tag("pura_data")
+    cache.invalidate_tag("pura_gambar")
+    cache.invalidate_tag("pura_detail")
+    cache.invalidate_tag(COUNT_CACHE_PREFIX)
+    cache.bump_generation("pura")
+
+# Bumped on every filter invalidation so vocabulary consumers (the entity matcher,
+# the catalogue) rebuild; shared across workers like the pura token
+def filter_cache_generation():
+    return cache.generation("filters")
 
 def invalidate_filter_cache():
     """Invalidate filter-related cache entries"""
-    cache.invalidate_pattern("kabupaten_list")
-    cache.invalidate_pattern("jenis_pura_list")
+    cache.invalidate_tag("kabupaten_list")
+    cache.invalidate_tag("jenis_pura_list")
+    cache.bump_generation("filters")
@@ -1,11 +1,37 @@
 from sentence_transformers import SentenceTransformer
-from .model_cache import get_cached_model
+from .model_cache import get_cached_model, model_cache
+from .batcher import QueryEmbeddingBatcher
+from .core.config import settings
+
+# Prefix scheme used for e5-style asymmetric retrieval
+DOCUMENT_PREFIX = "Dokumen: "
+QUERY_PREFIX = "Pertanyaan: "
+# Includes the inference backend so int8 and fp32 embeddings never share an index
+MODEL_NAME = model_cache.model_id
 
 # Get the cached model
 model = get_cached_model()
 
 def embed_texts(texts: list[str]):
-    return model.encode([f"Dokumen: {t}" for t in texts], convert_to_numpy=True, normalize_embeddings=True)
+    # Large corpora: build offline with build_index.py instead (sharded, resumable)
+    return model.encode(
+        [f"{DOCUMENT_PREFIX}{t}" for t in texts],
+        batch_size=settings.EMBED_DOC_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+
+def embed_queries(queries: list[str]):
+    return model.encode([f"{QUERY_PREFIX}{q}" for q in queries], batch_size=len(queries), convert_to_numpy=True, normalize_embeddings=True)
+
+# Concurrent embed_query calls share one encode call
+query_batcher = QueryEmbeddingBatcher(
+    embed_queries,
+    max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+    max_wait_ms=settings.EMBED_BATCH_WAIT_MS,
+)
 
 def embed_query(query: str):
-    return model.encode(f"Pertanyaan: {query}", convert_to_numpy=True, normalize_embeddings=True)
+    if settings.EMBED_BATCH_ENABLED:
+        return query_batcher.embed(query)
+    return model.encode(f"{QUERY_PREFIX}{query}", convert_to_numpy=True, normalize_embeddings=True)
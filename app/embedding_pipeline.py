@@ -0,0 +1,206 @@
+"""
+Offline corpus embedding pipeline.
+
+Streams pura rows from MySQL, chunks them exactly like load_corpus, sorts the
+chunks by token length so every batch pads to a similar length, and embeds
+fixed-size shards across a process pool (each worker with its own model and a
+fixed torch thread count). Every finished shard is written to disk, so an
+interrupted run resumes with the shards still missing. The assembled
+embeddings are published as the same index artifact SemanticSearch would
+build, which the server then loads instead of re-encoding.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PLAN_FILE = "plan.json"
+
+# Set in each worker process by _init_worker
+_worker_model = None
+
+
+def shard_path(run_dir: Path, shard: int) -> Path:
+    return run_dir / f"shard_{shard:05d}.npy"
+
+
+def token_lengths(texts: List[str], snapshot_path: Path, prefix: str) -> np.ndarray:
+    """Token count per chunk from the model's tokenizer (word count if it can't be loaded)."""
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(str(snapshot_path))
+        encoded = tokenizer([f"{prefix}{t}" for t in texts], add_special_tokens=True, truncation=False)["input_ids"]
+        return np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(texts))
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, sorting by word count: {e}")
+        return np.fromiter((len(t.split()) for t in texts), dtype=np.int64, count=len(texts))
+
+
+def _init_worker(threads: int, model_name: str, backend: str) -> None:
+    # Thread counts must be fixed before torch starts its pools
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    import torch
+    torch.set_num_threads(threads)
+
+    from app.model_cache import ModelCache
+    global _worker_model
+    _worker_model = ModelCache(model_name=model_name, backend=backend).load_model()
+
+
+def _embed_shard(path: str, texts: List[str], prefix: str, batch_size: int) -> int:
+    embeddings = _worker_model.encode(
+        [f"{prefix}{t}" for t in texts],
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    # Write-then-rename: a shard file on disk is always complete
+    tmp_path = f"{path}.tmp-{os.getpid()}.npy"
+    np.save(tmp_path, np.asarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, path)
+    return len(texts)
+
+
+def _load_plan(run_dir: Path, key: str, count: int) -> Optional[dict]:
+    try:
+        with open(run_dir / PLAN_FILE, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if plan.get("key") != key or plan.get("count") != count:
+        return None
+    return plan
+
+
+def _write_plan(run_dir: Path, plan: dict) -> None:
+    tmp_path = run_dir / f"{PLAN_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f)
+    os.replace(tmp_path, run_dir / PLAN_FILE)
+
+
+def build_corpus_index(
+    work_dir: str,
+    workers: int = 2,
+    threads: int = 0,
+    batch_size: int = 32,
+    shard_size: int = 1024,
+    fresh: bool = False,
+    keep_shards: bool = False,
+    progress: Callable[[str], None] = print,
+) -> dict:
+    """
+    Embed the corpus and publish it as an index artifact. Returns a summary.
+    `threads=0` splits the machine's cores evenly across the workers.
+    """
+    from app.data_loader import chunks_from_rows, chunk_id
+    from app.db import stream_pura_data
+    from app.embed import DOCUMENT_PREFIX
+    from app.model_cache import model_cache
+    from app.index_store import index_store
+    from app.ann import IndexSpec, build_index
+    from app.search import index_identity
+
+    started = time.time()
+    progress("Streaming rows from MySQL...")
+    texts, metadata = chunks_from_rows(stream_pura_data())
+    spec = IndexSpec.from_settings()
+    key, info = index_identity(index_store, spec, texts, metadata)
+    summary = {"key": key, "chunks": len(texts)}
+
+    if not texts:
+        progress("No chunks to embed")
+        return {**summary, "status": "empty"}
+    if not fresh and index_store.load(key, info) is not None:
+        progress(f"Index artifact {key} is already up to date ({len(texts)} chunks)")
+        return {**summary, "status": "up_to_date"}
+
+    run_dir = Path(work_dir) / f"run_{key}"
+    # Shards of other corpus versions can never be resumed
+    for stale in Path(work_dir).glob("run_*"):
+        if stale != run_dir or fresh:
+            shutil.rmtree(stale, ignore_errors=True)
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    plan = _load_plan(run_dir, key, len(texts))
+    if plan is None:
+        progress(f"Planning {len(texts)} chunks...")
+        lengths = token_lengths(texts, model_cache.snapshot_path, DOCUMENT_PREFIX)
+        order = np.argsort(lengths, kind="stable")
+        plan = {"key": key, "count": len(texts), "shard_size": shard_size, "order": order.tolist()}
+        _write_plan(run_dir, plan)
+    order = np.asarray(plan["order"], dtype=np.int64)
+    shard_size = plan["shard_size"]
+    shards = [order[start:start + shard_size] for start in range(0, len(order), shard_size)]
+
+    todo = [i for i in range(len(shards)) if not shard_path(run_dir, i).exists()]
+    done_chunks = len(texts) - sum(len(shards[i]) for i in todo)
+    if done_chunks:
+        progress(f"Resuming: {len(shards) - len(todo)}/{len(shards)} shards already embedded")
+
+    if todo:
+        workers = max(1, workers)
+        threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        progress(f"Embedding {len(todo)} shards with {workers} workers x {threads} threads, batch size {batch_size}")
+        embed_started = time.time()
+        embedded = 0
+        # spawn: torch and the MySQL driver don't survive fork reliably
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(threads, model_cache.model_name, model_cache.backend),
+        ) as pool:
+            queue = list(todo)
+            running = set()
+            while queue or running:
+                # Keep at most two shards per worker in flight so texts aren't all pickled up front
+                while queue and len(running) < workers * 2:
+                    shard = queue.pop(0)
+                    running.add(pool.submit(
+                        _embed_shard, str(shard_path(run_dir, shard)),
+                        [texts[i] for i in shards[shard]], DOCUMENT_PREFIX, batch_size,
+                    ))
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    embedded += future.result()
+                rate = embedded / max(time.time() - embed_started, 1e-9)
+                remaining = len(texts) - done_chunks - embedded
+                progress(
+                    f"  {done_chunks + embedded}/{len(texts)} chunks "
+                    f"({rate:.1f} chunks/s, ETA {remaining / rate if rate else 0:.0f}s)"
+                )
+
+    progress("Assembling embeddings and building the index...")
+    embeddings = None
+    for i, positions in enumerate(shards):
+        shard = np.load(shard_path(run_dir, i), mmap_mode="r")
+        if embeddings is None:
+            embeddings = np.empty((len(texts), shard.shape[1]), dtype=np.float32)
+        embeddings[positions] = shard
+
+    ids = np.array([chunk_id(m["hash"]) for m in metadata], dtype=np.int64)
+    index = build_index(embeddings, ids, spec)
+    index_store.save(key, info, embeddings, index, metadata)
+    index_store.prune(keep=key)
+
+    if not keep_shards:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    elapsed = time.time() - started
+    progress(f"Published index artifact {key}: {len(texts)} chunks in {elapsed:.1f}s")
+    return {**summary, "status": "built", "shards": len(shards), "elapsed_s": round(elapsed, 2)}
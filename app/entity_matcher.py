@@ -0,0 +1,176 @@
+"""
+Single-pass entity detection for user questions.
+
+An Aho-Corasick automaton over the kabupaten and jenis_pura vocabularies (from
+the database) plus the temple names of the corpus. Patterns and queries go
+through the same normalization (case folding, diacritics stripped, punctuation
+collapsed to spaces), and matches must fall on word boundaries.
+"""
+
+import logging
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KABUPATEN = "kabupaten"
+JENIS = "jenis"
+NAMA = "nama"
+
+# Alternative spellings and regency seats users write instead of the canonical name
+ALIASES: Dict[str, Dict[str, List[str]]] = {
+    KABUPATEN: {
+        "Badung": ["Mangupura"],
+        "Buleleng": ["Singaraja"],
+        "Denpasar": ["Kota Denpasar"],
+        "Karangasem": ["Karang Asem", "Amlapura"],
+        "Klungkung": ["Semarapura"],
+    },
+    JENIS: {
+        "Dang Kahyangan": ["Dang Kayangan"],
+        "Kahyangan Jagat": ["Kayangan Jagat", "Kahyangan Jagad"],
+        "Sad Kahyangan": ["Sad Kayangan"],
+    },
+}
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip diacritics and collapse everything but letters/digits to single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+@dataclass(frozen=True)
+class EntityMatch:
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton mapping normalized surface forms to (kind, canonical value)."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        # Node i: transitions in _goto[i], failure link in _fail[i], patterns ending here in _out[i]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str, str]]] = [[]]
+        self.size = 0
+
+        seen = set()
+        for kind, value, surface in entries:
+            pattern = normalize_text(surface)
+            if not pattern or (kind, value, pattern) in seen:
+                continue
+            seen.add((kind, value, pattern))
+            self._add(pattern, kind, value)
+        self._link()
+
+    def _add(self, pattern: str, kind: str, value: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), kind, value))
+        self.size += 1
+
+    def _link(self) -> None:
+        # Breadth-first, so every failure target is linked before its dependants
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child].extend(self._out[self._fail[child]])
+
+    def find_all(self, query: str) -> List[EntityMatch]:
+        """
+        All entities in `query` from one scan, resolved leftmost-longest so that
+        e.g. a temple named "Pura Segara Rupek" is not also reported as jenis "Pura Segara".
+        """
+        text = normalize_text(query)
+        candidates = []
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, kind, value in self._out[node]:
+                start, end = pos - length + 1, pos + 1
+                # Whole words only: "bangli" must not match inside "bangliani"
+                if (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " "):
+                    candidates.append(EntityMatch(kind, value, start, end))
+
+        candidates.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        matches, covered = [], 0
+        for match in candidates:
+            if match.start >= covered:
+                matches.append(match)
+                covered = match.end
+        return matches
+
+    def detect_filters(self, query: str) -> Dict[str, str]:
+        """First kabupaten and jenis mentioned in `query`, as search filters."""
+        filters: Dict[str, str] = {}
+        for match in self.find_all(query):
+            if match.kind in (KABUPATEN, JENIS):
+                filters.setdefault(match.kind, match.value)
+        return filters
+
+
+def vocabulary_entries(
+    kabupaten: Iterable[str], jenis: Iterable[str], names: Iterable[str]
+) -> List[Tuple[str, str, str]]:
+    """(kind, canonical value, surface form) triples, including aliases."""
+    entries = []
+    for kind, values in ((KABUPATEN, kabupaten), (JENIS, jenis)):
+        for value in values:
+            if not value:
+                continue
+            entries.append((kind, value, value))
+            entries.extend((kind, value, alias) for alias in ALIASES[kind].get(value, ()))
+            if kind == KABUPATEN:
+                entries.append((kind, value, f"Kabupaten {value}"))
+    entries.extend((NAMA, name, name) for name in names if name)
+    return entries
+
+
+def build_entity_matcher(metadata: list[dict], kabupaten: Optional[list] = None, jenis: Optional[list] = None) -> EntityMatcher:
+    """
+    Matcher over the kabupaten/jenis_pura tables and the corpus temple names.
+    Values present in the corpus metadata are always included, so detection
+    keeps working if the vocabulary queries fail.
+    """
+    if kabupaten is None or jenis is None:
+        from app.db import get_kabupaten_list_cached, get_jenis_pura_list_cached
+        try:
+            kabupaten = [row["nama_kabupaten"] for row in get_kabupaten_list_cached()]
+            jenis = [row["nama_jenis_pura"] for row in get_jenis_pura_list_cached()]
+        except Exception as e:
+            logger.warning(f"Failed to load filter vocabularies, using corpus values only: {e}")
+            kabupaten, jenis = [], []
+
+    kabupaten = sorted(set(kabupaten) | {m["kabupaten"] for m in metadata if m.get("kabupaten")})
+    jenis = sorted(set(jenis) | {m["jenis"] for m in metadata if m.get("jenis")})
+    names = sorted({m["nama"] for m in metadata if m.get("nama")})
+    matcher = EntityMatcher(vocabulary_entries(kabupaten, jenis, names))
+    logger.info(f"Entity matcher built: {len(kabupaten)} kabupaten, {len(jenis)} jenis, {len(names)} names")
+    return matcher
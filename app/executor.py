@@ -0,0 +1,123 @@
+"""
+Bounded executors that keep blocking RAG work off the event loop.
+"""
+
+import asyncio
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-bound work (query embedding, FAISS search) with a cap
+    on how many calls may be running or queued at once. Callers beyond the cap
+    wait on a semaphore instead of piling unbounded work onto the pool.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, name: str = "rag"):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._semaphore = asyncio.Semaphore(max_pending)
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func` on the pool and await its result."""
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            future = self._pool.submit(partial(func, *args, **kwargs))
+        except BaseException:
+            self._finished()
+            raise
+        # The slot is freed when the work ends, not when the caller stops waiting: a
+        # cancelled request (client disconnect) leaves its thread running to completion
+        future.add_done_callback(lambda _: self._release_from_thread(loop))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop) -> None:
+        # asyncio.Semaphore is not thread-safe; release on the loop's own thread
+        try:
+            loop.call_soon_threadsafe(self._finished)
+        except RuntimeError:
+            # Loop already closed (shutdown); nothing is waiting for the slot
+            pass
+
+    def _finished(self) -> None:
+        self._in_flight -= 1
+        self._completed += 1
+        self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": self._completed,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+class ConcurrencyLimiter:
+    """Async semaphore for I/O-bound calls such as Gemini generation."""
+
+    def __init__(self, limit: int):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._limit = limit
+        self._in_flight = 0
+        self._waiting = 0
+        self._total_wait = 0.0
+        self._acquired = 0
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._total_wait += time.perf_counter() - start
+        self._acquired += 1
+        self._in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._in_flight -= 1
+        self._semaphore.release()
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        avg_wait = self._total_wait / self._acquired if self._acquired else 0.0
+        return {
+            "limit": self._limit,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "avg_wait_ms": round(avg_wait * 1000, 2),
+        }
+
+
+# Global executors
+search_executor = BoundedExecutor(
+    max_workers=settings.SEARCH_EXECUTOR_WORKERS,
+    max_pending=settings.SEARCH_MAX_PENDING,
+    name="rag-search",
+)
+llm_limiter = ConcurrencyLimiter(settings.GEMINI_MAX_CONCURRENCY)
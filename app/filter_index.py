@@ -0,0 +1,69 @@
+"""
+Per-facet id sets for filtered vector search.
+
+For every kabupaten and jenis value the corpus positions and chunk ids of its
+chunks are collected once when the engine is built, so a filtered query can
+restrict the FAISS search to the matching ids instead of discarding unfiltered
+hits afterwards.
+"""
+
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+FACETS = ("kabupaten", "jenis")
+
+
+class FilterSelection:
+    """Chunks matching one filter combination: corpus positions, ids and a FAISS selector."""
+
+    def __init__(self, positions: np.ndarray, ids: np.ndarray):
+        self.positions = positions
+        self.ids = ids
+        self._selector = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def selector(self) -> faiss.IDSelector:
+        if self._selector is None:
+            # IDSelectorBatch keeps a pointer into self.ids, which lives as long as this object
+            self._selector = faiss.IDSelectorBatch(len(self.ids), faiss.swig_ptr(self.ids))
+        return self._selector
+
+
+class FilterIndex:
+    def __init__(self, metadata: list[dict], ids: np.ndarray):
+        self.ids = ids
+        self._facets: Dict[str, Dict[str, np.ndarray]] = {}
+        for facet in FACETS:
+            column = np.array([meta.get(facet) or "" for meta in metadata], dtype=object)
+            values, inverse = np.unique(column, return_inverse=True)
+            # Group positions by value: stable sort on the value code, then slice each run
+            order = np.argsort(inverse, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+            self._facets[facet] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values) if value
+            }
+        self._selections: Dict[tuple, FilterSelection] = {}
+
+    def select(self, filters: dict) -> Optional[FilterSelection]:
+        """Selection for `filters` (facet -> value), or None when no filter applies."""
+        key = tuple(sorted((facet, value) for facet, value in filters.items() if facet in FACETS))
+        if not key:
+            return None
+        selection = self._selections.get(key)
+        if selection is None:
+            positions = None
+            for facet, value in key:
+                matched = self._facets[facet].get(value, np.empty(0, dtype=np.int64))
+                positions = matched if positions is None else np.intersect1d(positions, matched, assume_unique=True)
+            ids = np.ascontiguousarray(self.ids[positions], dtype=np.int64)
+            selection = FilterSelection(positions, ids)
+            self._selections[key] = selection
+        return selection
+
+    def get_stats(self) -> dict:
+        return {facet: len(values) for facet, values in self._facets.items()}
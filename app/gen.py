@@ -2,6 +2,7 @@ import os
 from google import genai
 from google.genai import types
 from .config import GeminiConfig
+from .executor import llm_limiter
 
 # Initialize client with key rotation
 def get_gemini_client():
@@ -13,7 +14,7 @@ def get_gemini_client():
 
 GENERATIVE_MODEL = "gemini-2.0-flash"
 
-def generate_response(user_query: str, retrieved: list[dict]) -> str:
+def build_prompt(user_query: str, retrieved: list[dict]) -> str:
     system_instruction = (
         "Anda adalah seorang ahli di bidang pariwisata Bali. "
         "Anda akan membantu pengunjung untuk mengetahui informasi tentang tempat wisata di Bali. "
@@ -28,12 +29,17 @@ def generate_response(user_query: str, retrieved: list[dict]) -> str:
         for r in retrieved
     )
     user_section = f"\n\nPertanyaan: {user_query}\nJawaban:"
-    prompt = system_instruction + docs + user_section
-    config = types.GenerateContentConfig(
+    return system_instruction + docs + user_section
+
+def build_config() -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
         temperature=0.2,
         top_p=0.9,
         max_output_tokens=512,
     )
+
+def generate_response(user_query: str, retrieved: list[dict]) -> str:
+    prompt = build_prompt(user_query, retrieved)
     
     # Get client with rotated key
     client = get_gemini_client()
@@ -41,6 +47,40 @@ def generate_response(user_query: str, retrieved: list[dict]) -> str:
     resp = client.models.generate_content(
         model=GENERATIVE_MODEL,
         contents=prompt,
-        config=config
+        config=build_config()
     )
     return resp.text.strip() if resp.text else ""
+
+async def generate_response_async(user_query: str, retrieved: list[dict]) -> str:
+    """Non-blocking variant of generate_response using the async Gemini client"""
+    prompt = build_prompt(user_query, retrieved)
+    client = get_gemini_client()
+    
+    async with llm_limiter:
+        resp = await client.aio.models.generate_content(
+            model=GENERATIVE_MODEL,
+            contents=prompt,
+            config=build_config()
+        )
+    return resp.text.strip() if resp.text else ""
+
+async def stream_response(user_query: str, retrieved: list[dict]):
+    """Yield answer text chunks as Gemini produces them"""
+    prompt = build_prompt(user_query, retrieved)
+    client = get_gemini_client()
+    
+    async with llm_limiter:
+        stream = await client.aio.models.generate_content_stream(
+            model=GENERATIVE_MODEL,
+            contents=prompt,
+            config=build_config()
+        )
+        try:
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            # Closing the stream aborts the HTTP request so Gemini stops generating
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
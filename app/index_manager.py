@@ -0,0 +1,169 @@
+"""
+Lifecycle of the live SemanticSearch engine.
+
+The engine is built off the event loop, started from the FastAPI lifespan hook,
+and rebuilt on demand or on a timer. A finished build replaces the engine with a
+single reference assignment: requests read `index_manager.engine` once and
+finish on whichever engine they got, so a swap never disturbs in-flight
+queries. A failed build keeps serving the previous engine and is retried.
+"""
+
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDLE = "idle"
+BUILDING = "building"
+READY = "ready"
+FAILED = "failed"
+
+
+class IndexManager:
+    def __init__(self, loader: Callable, factory: Callable, interval_seconds: float = 0, retry_seconds: float = 30):
+        self._loader = loader
+        self._factory = factory
+        self._interval = interval_seconds
+        self._retry = retry_seconds
+        self._engine = None
+        # Builds are serialized; a request during a build waits and then rebuilds from fresh data
+        self._build_lock = Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-build")
+        self._task: Optional[asyncio.Task] = None
+        self._requested: set = set()
+
+        self.state = IDLE
+        self._builds = 0
+        self._failures = 0
+        self._last_reason: Optional[str] = None
+        self._last_error: Optional[str] = None
+        self._last_built_at: Optional[str] = None
+        self._last_duration: Optional[float] = None
+        self._building_since: Optional[float] = None
+
+    @property
+    def engine(self):
+        """The live engine (None until the first build succeeds)"""
+        return self._engine
+
+    @property
+    def ready(self) -> bool:
+        return self._engine is not None
+
+    def build(self, reason: str = "manual") -> Dict[str, Any]:
+        """Load the corpus, build a new engine and swap it in (blocking)."""
+        with self._build_lock:
+            self.state = BUILDING
+            self._last_reason = reason
+            self._building_since = time.time()
+            previous = self._engine
+            try:
+                texts, metadata = self._loader()
+                # Unchanged chunks reuse the previous engine's vectors instead of re-encoding
+                engine = self._factory(texts, metadata, previous=previous)
+            except Exception as e:
+                self._failures += 1
+                self._last_error = str(e)
+                self.state = READY if previous is not None else FAILED
+                logger.error(f"Index build ({reason}) failed: {e}")
+                return self.get_status()
+            finally:
+                self._last_duration = round(time.time() - self._building_since, 2)
+                self._building_since = None
+
+            self._engine = engine
+            self._builds += 1
+            self._last_error = None
+            self._last_built_at = datetime.utcnow().isoformat()
+            self.state = READY
+            if previous is None or previous.index_key != engine.index_key:
+                logger.info(f"Index {engine.index_key} live ({len(texts)} chunks, {reason})")
+            return self.get_status()
+
+    async def rebuild(self, reason: str = "manual") -> Dict[str, Any]:
+        """Run a build on the build thread and wait for it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.build, reason)
+
+    def schedule(self, reason: str = "manual") -> None:
+        """Start a build in the background without waiting for it."""
+        task = asyncio.get_running_loop().create_task(self.rebuild(reason))
+        # The loop only keeps weak references to tasks
+        self._requested.add(task)
+        task.add_done_callback(self._requested.discard)
+
+    async def _run(self) -> None:
+        reason = "startup"
+        while True:
+            try:
+                await self.rebuild(reason)
+            except Exception as e:
+                logger.error(f"Index build loop error: {e}")
+            if self.state == FAILED and self._retry > 0:
+                delay, reason = self._retry, "retry"
+            elif self._interval > 0:
+                delay, reason = self._interval, "scheduled"
+            else:
+                return
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """Start the initial build (and the rebuild timer) without blocking startup."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._pool.shutdown(wait=False)
+
+    def get_status(self) -> Dict[str, Any]:
+        engine = self._engine
+        building_since = self._building_since
+        return {
+            "ready": engine is not None,
+            "state": self.state,
+            "version": engine.index_key if engine is not None else None,
+            "chunks": len(engine.texts) if engine is not None else 0,
+            "builds": self._builds,
+            "failures": self._failures,
+            "last_reason": self._last_reason,
+            "last_error": self._last_error,
+            "last_built_at": self._last_built_at,
+            "last_duration_s": self._last_duration,
+            "building_for_s": round(time.time() - building_since, 2) if building_since else None,
+            "rebuild_interval_s": self._interval,
+        }
+
+
+def _load_fresh_corpus():
+    from .db import stream_pura_data
+    from .data_loader import chunks_from_rows
+    # Current rows straight from MySQL, bypassing the cached fetch_pura_data. Invalidating
+    # instead would flush every worker's pura caches (and the catalogue) on each timer tick.
+    return chunks_from_rows(stream_pura_data())
+
+
+def _create_engine(texts, metadata, previous=None):
+    from .search import SemanticSearch
+    return SemanticSearch(texts, metadata, previous=previous)
+
+
+index_manager = IndexManager(
+    _load_fresh_corpus,
+    _create_engine,
+    interval_seconds=settings.INDEX_REBUILD_INTERVAL,
+    retry_seconds=settings.INDEX_BUILD_RETRY_SECONDS,
+)
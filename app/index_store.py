@@ -0,0 +1,242 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes so stale artifacts are ignored
+INDEX_FORMAT_VERSION = 2
+
+EMBEDDINGS_FILE = "embeddings.npy"
+INDEX_FILE = "index.faiss"
+METADATA_FILE = "metadata.json"
+MANIFEST_FILE = "manifest.json"
+
+# Zero-copy mapping of index.faiss needs faiss >= 1.8; older builds read it into memory
+INDEX_MMAP_SUPPORTED = hasattr(faiss, "IO_FLAG_MMAP_IFC")
+
+
+# Chunk metadata that identifies what was embedded and how it is filtered. Display
+# fields (image and map links, coordinates) are left out, so editing them doesn't
+# produce a new artifact key and a rebuild.
+HASHED_FIELDS = ("id", "nama", "jenis", "kabupaten", "type", "hash")
+
+
+def corpus_hash(texts: list[str], metadata: list[dict]) -> str:
+    """Content hash of the chunks produced by load_corpus"""
+    digest = hashlib.sha256()
+    for text, meta in zip(texts, metadata):
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+        indexed = {field: meta.get(field) for field in HASHED_FIELDS}
+        digest.update(json.dumps(indexed, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()
+
+
+class IndexStore:
+    """
+    Versioned on-disk store for the corpus embeddings and FAISS index.
+
+    Each artifact lives in its own directory named after a key derived from the
+    model name, the prefix scheme and the corpus content hash. Artifacts are
+    written once and never modified, so any number of workers can map the same
+    files read-only.
+    """
+
+    def __init__(self, cache_dir: str = "", use_mmap: Optional[bool] = None):
+        if not cache_dir:
+            cache_dir = settings.INDEX_CACHE_DIR
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.use_mmap = settings.INDEX_MMAP if use_mmap is None else use_mmap
+        self.index_mmap = self.use_mmap and INDEX_MMAP_SUPPORTED
+        if self.use_mmap and not INDEX_MMAP_SUPPORTED:
+            logger.warning(f"faiss {faiss.__version__} cannot map indexes; only the embeddings are mapped")
+
+    def get_index_info(
+        self,
+        model_name: str,
+        document_prefix: str,
+        query_prefix: str,
+        content_hash: str,
+        index_params: Optional[dict] = None,
+    ) -> dict:
+        """Get index information for cache validation"""
+        return {
+            "format_version": INDEX_FORMAT_VERSION,
+            "model_name": model_name,
+            "document_prefix": document_prefix,
+            "query_prefix": query_prefix,
+            "content_hash": content_hash,
+            "index": index_params or {"type": "flat"},
+        }
+
+    def make_key(
+        self,
+        model_name: str,
+        document_prefix: str,
+        query_prefix: str,
+        content_hash: str,
+        index_params: Optional[dict] = None,
+    ) -> str:
+        """Derive the artifact key for a model/prefix/corpus/index-type combination"""
+        info = self.get_index_info(model_name, document_prefix, query_prefix, content_hash, index_params)
+        raw = json.dumps(info, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()[:16]
+
+    def _artifact_path(self, key: str) -> Path:
+        return self.cache_dir / f"index_{key}"
+
+    def _read_manifest(self, path: Path) -> Optional[dict]:
+        try:
+            with open(path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, key: str, expected_info: dict):
+        """
+        Load an artifact if it exists and matches the expected info.
+        Returns (embeddings, index, metadata, manifest) or None.
+        """
+        path = self._artifact_path(key)
+        manifest = self._read_manifest(path)
+        if manifest is None:
+            return None
+
+        if any(manifest.get(k) != v for k, v in expected_info.items()):
+            logger.warning(f"Index artifact {key} does not match current corpus/model, ignoring")
+            return None
+
+        try:
+            mmap_mode = "r" if self.use_mmap else None
+            embeddings = np.load(path / EMBEDDINGS_FILE, mmap_mode=mmap_mode)
+            io_flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if self.index_mmap else 0
+            index = faiss.read_index(str(path / INDEX_FILE), io_flags)
+            with open(path / METADATA_FILE, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load index artifact {key}: {e}")
+            return None
+
+        if embeddings.shape[0] != manifest.get("count") or index.ntotal != manifest.get("count"):
+            logger.warning(f"Index artifact {key} is incomplete, ignoring")
+            return None
+
+        logger.info(f"Loaded index artifact {key} ({manifest['count']} chunks, mmap={self.use_mmap}, index mmap={self.index_mmap})")
+        return embeddings, index, metadata, manifest
+
+    def save(self, key: str, info: dict, embeddings: np.ndarray, index, metadata: list[dict]) -> Path:
+        """
+        Write an artifact atomically: everything goes to a temporary directory
+        which is renamed into place once complete.
+        """
+        path = self._artifact_path(key)
+        if self._read_manifest(path) is not None:
+            return path
+
+        tmp_path = self.cache_dir / f".index_{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+
+        try:
+            np.save(tmp_path / EMBEDDINGS_FILE, np.ascontiguousarray(embeddings, dtype=np.float32))
+            faiss.write_index(index, str(tmp_path / INDEX_FILE))
+            with open(tmp_path / METADATA_FILE, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, ensure_ascii=False, default=str)
+
+            manifest = dict(info)
+            manifest.update({
+                "key": key,
+                "count": int(embeddings.shape[0]),
+                "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+                "created_at": datetime.utcnow().isoformat(),
+            })
+            # Manifest last: its presence marks the artifact as complete
+            with open(tmp_path / MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            os.rename(tmp_path, path)
+            logger.info(f"Index artifact saved at {path}")
+        except OSError as e:
+            # Another worker may have published the same artifact first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if self._read_manifest(path) is None:
+                raise
+            logger.debug(f"Index artifact {key} already published: {e}")
+
+        return path
+
+    def load_vectors(self, model_name: str, document_prefix: str, query_prefix: str):
+        """
+        (chunk hashes, embeddings) of the newest artifact embedded with this model
+        and prefix scheme, whatever its corpus or index type. Chunk vectors depend
+        only on those and the chunk text, so a rebuild after a restart can reuse
+        them for every unchanged chunk. Returns None when no artifact qualifies.
+        """
+        candidates = []
+        for path in self.cache_dir.glob("index_*"):
+            manifest = self._read_manifest(path)
+            if manifest and manifest.get("format_version") == INDEX_FORMAT_VERSION \
+                    and manifest.get("model_name") == model_name \
+                    and manifest.get("document_prefix") == document_prefix \
+                    and manifest.get("query_prefix") == query_prefix:
+                candidates.append((manifest.get("created_at") or "", path))
+
+        for _, path in sorted(candidates, reverse=True):
+            try:
+                embeddings = np.load(path / EMBEDDINGS_FILE, mmap_mode="r")
+                with open(path / METADATA_FILE, "r", encoding="utf-8") as f:
+                    hashes = [meta["hash"] for meta in json.load(f)]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable index artifact {path.name}: {e}")
+                continue
+            if embeddings.ndim == 2 and embeddings.shape[0] == len(hashes):
+                return hashes, embeddings
+        return None
+
+    def prune(self, keep: str) -> int:
+        """Remove artifacts other than `keep`. Mapped files stay valid for running workers."""
+        removed = 0
+        for path in self.cache_dir.glob("index_*"):
+            if path.is_dir() and path.name != f"index_{keep}":
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"Pruned {removed} stale index artifacts")
+        return removed
+
+    def get_cache_info(self) -> dict:
+        """Get information about the stored artifacts"""
+        artifacts = []
+        for path in sorted(self.cache_dir.glob("index_*")):
+            manifest = self._read_manifest(path)
+            if manifest:
+                artifacts.append({
+                    "key": manifest.get("key"),
+                    "count": manifest.get("count"),
+                    "model_name": manifest.get("model_name"),
+                    "created_at": manifest.get("created_at"),
+                })
+        return {
+            "cache_dir": str(self.cache_dir),
+            "mmap": self.use_mmap,
+            "index_mmap": self.index_mmap,
+            "artifacts": artifacts,
+        }
+
+
+# Global index store instance
+index_store = IndexStore()
@@ -0,0 +1,112 @@
+"""
+In-process BM25 index over the corpus chunks.
+
+Dense retrieval sometimes misses exact-match entities such as temple names;
+a lexical index catches them, and SemanticSearch fuses both rankings with
+reciprocal rank fusion. The same index serves `/api/pura?q=` without a
+LIKE '%q%' scan on MySQL.
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .entity_matcher import normalize_text
+
+# Indonesian function words plus the chunk labels added by build_chunks_from_row
+STOPWORDS = frozenset("""
+    ada adalah agar akan apa apakah atau bagaimana berada bisa dalam dan dari
+    dengan di dimana diperkirakan ini itu kapan berapa juga ke kepada mana oleh pada para saja
+    nya sebagai sejak siapa tentang tersebut untuk yang
+    deskripsi lokasi google maps https http www com
+""".split())
+
+# Enclitic particles and possessives: "puranya" -> "pura", "dimanakah" -> "dimana"
+_SUFFIXES = ("nya", "lah", "kah", "pun")
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized, stopword-free tokens with Indonesian particles stripped."""
+    tokens = []
+    for token in normalize_text(text).split():
+        for suffix in _SUFFIXES:
+            if len(token) > len(suffix) + 3 and token.endswith(suffix):
+                token = token[: -len(suffix)]
+                break
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for pos, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[pos] = len(tokens)
+            for token in tokens:
+                doc_tf = postings.setdefault(token, {})
+                doc_tf[pos] = doc_tf.get(pos, 0) + 1
+
+        avg_length = float(lengths.mean()) if self.size else 0.0
+        # Per-document length normalization, precomputed once
+        self._norm = k1 * (1 - b + b * lengths / avg_length) if avg_length else np.full(self.size, k1, dtype=np.float32)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._idf: Dict[str, float] = {}
+        for term, doc_tf in postings.items():
+            docs = np.fromiter(doc_tf.keys(), dtype=np.int64, count=len(doc_tf))
+            tf = np.fromiter(doc_tf.values(), dtype=np.float32, count=len(doc_tf))
+            self._postings[term] = (docs, tf)
+            self._idf[term] = float(np.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5)))
+        self._vocabulary = sorted(self._postings)
+
+    def _expand(self, token: str) -> List[str]:
+        """Vocabulary terms starting with `token` (search-as-you-type on the last word)."""
+        start = bisect.bisect_left(self._vocabulary, token)
+        end = bisect.bisect_left(self._vocabulary, token + "\uffff")
+        return self._vocabulary[start:end]
+
+    def scores(self, query: str, prefix: bool = False) -> np.ndarray:
+        """BM25 score of every chunk for `query` (0 where no term matches)."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        tokens = tokenize(query)
+        if prefix and tokens:
+            terms = tokens[:-1] + (self._expand(tokens[-1]) or [tokens[-1]])
+        else:
+            terms = tokens
+        for term in dict.fromkeys(terms):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tf = posting
+            scores[docs] += self._idf[term] * tf * (self.k1 + 1) / (tf + self._norm[docs])
+        return scores
+
+    def search(self, query: str, top_k: int, positions: Optional[np.ndarray] = None, prefix: bool = False) -> List[Tuple[float, int]]:
+        """(score, position) pairs of the best matching chunks, restricted to `positions` when given."""
+        scores = self.scores(query, prefix=prefix)
+        candidates = np.flatnonzero(scores) if positions is None else positions[scores[positions] > 0]
+        scores = scores[candidates]
+        if 0 < top_k < len(scores):
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, candidates = scores[part], candidates[part]
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return list(zip(scores[order].tolist(), candidates[order].tolist()))
+
+    def get_stats(self) -> dict:
+        return {"documents": self.size, "terms": len(self._postings)}
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Tuple[float, int]]], k: int = 60) -> List[Tuple[float, int]]:
+    """Fuse (score, position) rankings: each list contributes 1 / (k + rank) per position."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (_, pos) in enumerate(ranking, start=1):
+            fused[pos] = fused.get(pos, 0.0) + 1.0 / (k + rank)
+    return sorted(((score, pos) for pos, score in fused.items()), key=lambda item: -item[0])
@@ -18,7 +18,14 @@ from .core.config import settings
 from .core.logging import get_logger
 from .core.exceptions import PuraBaliException, NotFoundException
 from .database.connection import initialize_database, close_database
+from .database.async_connection import initialize_async_database, close_async_database
 from .api.v1.router import api_router
+from .executor import search_executor
+from .reranker import reranker
+from .index_manager import index_manager
+from .catalogue import catalogue
+from .embed import model
+from .model_cache import LazyModel
 
 logger = get_logger(__name__)
 
@@ -34,18 +41,33 @@ async def lifespan(app: FastAPI):
     try:
         # Initialize database
         initialize_database()
+        await initialize_async_database()
         logger.info("Database initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
-        raise
+        # Not fatal: both pools initialize lazily on first use, and the index
+        # manager and catalogue retry their builds until MySQL is reachable
+        logger.error(f"Failed to initialize database, continuing without it: {e}")
+    
+    if isinstance(model, LazyModel):
+        # Serve /health right away; the model becomes resident in the background
+        model.load_in_background()
+    reranker.warm_up()
+    # Read endpoints switch from MySQL to the in-memory catalogue once it is built
+    catalogue.refresh_in_background()
+    # Build (or load) the search index off the event loop; /ready reports progress
+    index_manager.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down PuraBali RAG Backend...")
     try:
+        await index_manager.stop()
         close_database()
+        await close_async_database()
         logger.info("Database connections closed")
+        search_executor.shutdown()
+        reranker.shutdown()
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
@@ -140,9 +162,21 @@ def create_app() -> FastAPI:
             "status": "healthy",
             "version": settings.VERSION,
             "timestamp": datetime.utcnow().isoformat(),
-            "environment": settings.ENVIRONMENT
+            "environment": settings.ENVIRONMENT,
+            "model": model.state if isinstance(model, LazyModel) else "ready",
+            "index": index_manager.state
         }
     
+    # Readiness endpoint: 503 until a search index is live
+    @app.get("/ready")
+    async def readiness_check():
+        """Readiness check with index version and build state."""
+        index_status = index_manager.get_status()
+        return JSONResponse(
+            status_code=status.HTTP_200_OK if index_status["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=index_status
+        )
+    
     # Frontend routes
     @app.get("/", response_class=HTMLResponse)
     async def index(request: Request):
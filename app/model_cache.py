@@ -1,109 +1,392 @@
-import os
-import pickle
+"""
+Snapshot store for the sentence-transformers model.
+
+The model is saved once as a save_pretrained-style directory with safetensors
+weights. Later loads go through from_pretrained, which memory-maps the weight
+files instead of unpickling a full copy of the model object, so a snapshot
+starts faster, uses less peak memory and survives torch/sentence-transformers
+upgrades. A manifest records the library versions and weight checksums the
+snapshot was written with.
+"""
+
+import json
+import time
+import shutil
+import hashlib
 import logging
+import tempfile
+import threading
+from importlib import metadata
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
+
 from sentence_transformers import SentenceTransformer
 
+from .core.config import settings
+from .core.exceptions import ConfigurationException
+
 logger = logging.getLogger(__name__)
 
+# Bump when the snapshot layout changes
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Libraries whose versions are recorded in (and checked against) the manifest
+_TRACKED_LIBRARIES = ("sentence-transformers", "transformers", "torch", "safetensors")
+
+# Inference backends: plain fp32 torch, or torch with dynamic int8 Linear layers
+MODEL_BACKENDS = ("torch", "torch-int8")
+
+# Files produced by the pickle-based cache before snapshots existed
+_LEGACY_FILES = ("model_info.pkl",)
+
+
+def library_versions() -> Dict[str, Optional[str]]:
+    """Installed versions of the libraries a snapshot depends on."""
+    versions = {}
+    for name in _TRACKED_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def file_sha256(path: Path, chunk_size: int = 8 * 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    return version.split(".", 1)[0] if version else None
+
+
+def _file_entries(root: Path, pattern: str) -> Dict[str, Dict[str, Any]]:
+    return {
+        str(path.relative_to(root)): {"size": path.stat().st_size, "sha256": file_sha256(path)}
+        for path in sorted(root.rglob(pattern))
+    }
+
+
+def _files_intact(root: Path, files: Dict[str, Dict[str, Any]], verify: bool) -> bool:
+    for rel_path, expected in files.items():
+        path = root / rel_path
+        if not path.is_file() or path.stat().st_size != expected["size"]:
+            logger.warning(f"Model snapshot file missing or truncated: {rel_path}")
+            return False
+        if verify and file_sha256(path) != expected["sha256"]:
+            logger.warning(f"Model snapshot checksum mismatch: {rel_path}")
+            return False
+    return True
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to read {path}: {e}")
+        return None
+
+
+def _publish(tmp_path: Path, target: Path) -> None:
+    if target.exists():
+        shutil.rmtree(target)
+    tmp_path.rename(target)
+
+
 class ModelCache:
     """Model caching system for sentence-transformers models"""
-    
-    def __init__(self, cache_dir: str = ""):
-        # Use environment variable or default to a separate storage location
-        if not cache_dir:
-            cache_dir = os.getenv("MODEL_CACHE_DIR", "./models")
-        
-        self.cache_dir = Path(cache_dir)
+
+    def __init__(
+        self,
+        cache_dir: str = "",
+        model_name: str = "",
+        backend: str = "",
+        verify_checksums: Optional[bool] = None,
+    ):
+        self.cache_dir = Path(cache_dir or settings.MODEL_CACHE_DIR)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.model_name = "intfloat/multilingual-e5-large"
-        self.model_cache_path = self.cache_dir / f"{self.model_name.replace('/', '_')}.pkl"
-        
+        self.model_name = model_name or settings.MODEL_NAME
+        self.backend = (backend or settings.MODEL_BACKEND).lower()
+        if self.backend not in MODEL_BACKENDS:
+            raise ConfigurationException(f"Unknown MODEL_BACKEND '{self.backend}', expected one of {MODEL_BACKENDS}")
+        self.verify_checksums = settings.MODEL_VERIFY_CHECKSUMS if verify_checksums is None else verify_checksums
+        self.snapshot_path = self.cache_dir / "snapshots" / self.model_name.replace("/", "_")
+        self.manifest_path = self.snapshot_path / "manifest.json"
+        self.quantized_path = self.cache_dir / "snapshots" / f"{self.model_name.replace('/', '_')}-int8"
+        self.quantized_manifest_path = self.quantized_path / "manifest.json"
+        self.legacy_cache_path = self.cache_dir / f"{self.model_name.replace('/', '_')}.pkl"
+
+    @property
+    def model_id(self) -> str:
+        """Model name qualified by backend; embeddings differ between backends."""
+        return self.model_name if self.backend == "torch" else f"{self.model_name}@{self.backend}"
+
     def _get_model_info(self) -> dict:
         """Get model information for cache validation"""
         return {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
             "model_name": self.model_name,
-            "cache_version": "1.0"
+            "cache_version": settings.MODEL_CACHE_VERSION,
         }
-    
-    def _is_cache_valid(self) -> bool:
-        """Check if the cached model is valid"""
-        if not self.model_cache_path.exists():
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        return _read_json(self.manifest_path)
+
+    def _is_cache_valid(self, verify_checksums: Optional[bool] = None) -> bool:
+        """
+        Check the snapshot against its manifest. File sizes are always checked;
+        full weight checksums only when `verify_checksums` is set, since hashing
+        2 GB of weights would cost more than the load it protects.
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
             return False
-            
-        try:
-            with open(self.cache_dir / "model_info.pkl", "rb") as f:
-                cached_info = pickle.load(f)
-            current_info = self._get_model_info()
-            return cached_info == current_info
-        except Exception as e:
-            logger.warning(f"Failed to validate cache: {e}")
+
+        if manifest.get("info") != self._get_model_info():
+            logger.info("Model snapshot was written for a different model or format")
+            return False
+
+        # Weights are version independent; config/module layout is only stable within a major version
+        current = library_versions()
+        for name in ("sentence-transformers", "transformers"):
+            recorded = manifest.get("libraries", {}).get(name)
+            if _major(recorded) != _major(current.get(name)):
+                logger.info(f"Model snapshot written with {name} {recorded}, installed {current.get(name)}")
+                return False
+
+        verify = self.verify_checksums if verify_checksums is None else verify_checksums
+        return _files_intact(self.snapshot_path, manifest.get("files", {}), verify)
+
+    def _is_quantized_valid(self, verify_checksums: Optional[bool] = None) -> bool:
+        """
+        The int8 weights are tied to the exact torch version (quantized kernels)
+        and to the fp32 snapshot they were derived from.
+        """
+        manifest = _read_json(self.quantized_manifest_path)
+        base = self._read_manifest()
+        if manifest is None or base is None:
+            return False
+        if manifest.get("info") != self._get_model_info():
+            return False
+        if manifest.get("torch") != library_versions()["torch"]:
+            logger.info(f"Quantized snapshot written with torch {manifest.get('torch')}, re-quantizing")
             return False
-    
+        if manifest.get("base_files") != base.get("files"):
+            logger.info("fp32 snapshot changed since quantization, re-quantizing")
+            return False
+        verify = self.verify_checksums if verify_checksums is None else verify_checksums
+        return _files_intact(self.quantized_path, manifest.get("files", {}), verify)
+
+    def _save_snapshot(self, model: SentenceTransformer) -> None:
+        """Write the snapshot to a temp dir and rename it into place; the manifest is written last."""
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=self.snapshot_path.parent, prefix=".tmp-"))
+        try:
+            model.save(str(tmp_path), safe_serialization=True)
+            manifest = {
+                "info": self._get_model_info(),
+                "libraries": library_versions(),
+                "files": _file_entries(tmp_path, "*.safetensors"),
+                "created_at": time.time(),
+            }
+            with open(tmp_path / "manifest.json", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            _publish(tmp_path, self.snapshot_path)
+        finally:
+            if tmp_path.exists():
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        self._remove_legacy_files()
+
+    def _remove_legacy_files(self) -> None:
+        for path in (self.legacy_cache_path, *(self.cache_dir / name for name in _LEGACY_FILES)):
+            if path.exists():
+                path.unlink()
+                logger.info(f"Removed legacy model cache file {path}")
+
     def load_model(self) -> SentenceTransformer:
-        """Load model from cache or download if not cached"""
-        if self._is_cache_valid():
-            logger.info("Loading model from cache...")
+        """Load the model for the configured backend"""
+        model = self.load_base_model()
+        if self.backend == "torch-int8":
+            model = self._load_quantized(model)
+        return model
+
+    def _load_quantized(self, model: SentenceTransformer) -> SentenceTransformer:
+        """Apply cached int8 weights to the fp32 model, quantizing (and caching) on first run"""
+        from .quantization import load_quantized, quantize_model, save_quantized
+
+        weights_path = self.quantized_path / "weights.safetensors"
+        if self._is_quantized_valid():
+            started = time.perf_counter()
             try:
-                with open(self.model_cache_path, "rb") as f:
-                    model = pickle.load(f)
-                logger.info("Model loaded successfully from cache")
+                load_quantized(model, weights_path)
+                logger.info(f"Loaded int8 weights in {time.perf_counter() - started:.2f}s")
                 return model
             except Exception as e:
-                logger.warning(f"Failed to load from cache: {e}")
-        
-        logger.info("Downloading and caching model...")
-        model = SentenceTransformer(self.model_name)
-        
-        # Cache the model
+                logger.warning(f"Failed to load quantized snapshot: {e}")
+                # A partial swap leaves the model unusable; start again from fp32
+                model = self.load_base_model()
+
+        logger.info("Quantizing model to dynamic int8...")
+        started = time.perf_counter()
+        quantize_model(model)
+        logger.info(f"Model quantized in {time.perf_counter() - started:.2f}s")
+
+        tmp_path = Path(tempfile.mkdtemp(dir=self.quantized_path.parent, prefix=".tmp-"))
         try:
-            with open(self.model_cache_path, "wb") as f:
-                pickle.dump(model, f)
-            
-            # Save model info
-            with open(self.cache_dir / "model_info.pkl", "wb") as f:
-                pickle.dump(self._get_model_info(), f)
-                
-            logger.info(f"Model cached successfully at {self.model_cache_path}")
+            save_quantized(model, tmp_path / "weights.safetensors")
+            manifest = {
+                "info": self._get_model_info(),
+                "torch": library_versions()["torch"],
+                "base_files": (self._read_manifest() or {}).get("files"),
+                "files": _file_entries(tmp_path, "*.safetensors"),
+                "created_at": time.time(),
+            }
+            with open(tmp_path / "manifest.json", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            _publish(tmp_path, self.quantized_path)
+            logger.info(f"Quantized snapshot saved at {self.quantized_path}")
         except Exception as e:
-            logger.warning(f"Failed to cache model: {e}")
-        
+            logger.warning(f"Failed to cache quantized model: {e}")
+        finally:
+            if tmp_path.exists():
+                shutil.rmtree(tmp_path, ignore_errors=True)
         return model
-    
+
+    def load_base_model(self) -> SentenceTransformer:
+        """Load the fp32 model from the snapshot, or download and snapshot it if missing"""
+        if self._is_cache_valid():
+            logger.info("Loading model from snapshot...")
+            started = time.perf_counter()
+            try:
+                model = SentenceTransformer(str(self.snapshot_path), device="cpu")
+                logger.info(f"Model loaded from snapshot in {time.perf_counter() - started:.2f}s")
+                return model
+            except Exception as e:
+                logger.warning(f"Failed to load from snapshot: {e}")
+
+        logger.info("Downloading and caching model...")
+        # Download into a scratch hub cache so the weights only live on disk once, in the snapshot
+        with tempfile.TemporaryDirectory(dir=self.cache_dir, prefix=".download-") as download_dir:
+            model = SentenceTransformer(self.model_name, device="cpu", cache_folder=download_dir)
+            try:
+                self._save_snapshot(model)
+                logger.info(f"Model snapshot saved at {self.snapshot_path}")
+            except Exception as e:
+                logger.warning(f"Failed to cache model: {e}")
+
+        return model
+
+    def verify(self) -> bool:
+        """Validate the snapshot including full weight checksums."""
+        valid = self._is_cache_valid(verify_checksums=True)
+        if valid and self.backend == "torch-int8":
+            valid = self._is_quantized_valid(verify_checksums=True)
+        return valid
+
     def clear_cache(self) -> bool:
         """Clear the model cache"""
         try:
-            if self.model_cache_path.exists():
-                self.model_cache_path.unlink()
-            if (self.cache_dir / "model_info.pkl").exists():
-                (self.cache_dir / "model_info.pkl").unlink()
+            for path in (self.snapshot_path, self.quantized_path):
+                if path.exists():
+                    shutil.rmtree(path)
+            self._remove_legacy_files()
             logger.info("Model cache cleared")
             return True
         except Exception as e:
             logger.error(f"Failed to clear cache: {e}")
             return False
-    
+
     def get_cache_size(self) -> int:
-        """Get the size of the cached model in bytes"""
-        if self.model_cache_path.exists():
-            return self.model_cache_path.stat().st_size
-        return 0
-    
+        """Get the size of the model snapshots in bytes"""
+        return sum(
+            f.stat().st_size
+            for path in (self.snapshot_path, self.quantized_path) if path.exists()
+            for f in path.rglob("*") if f.is_file()
+        )
+
     def get_cache_info(self) -> dict:
         """Get information about the cache"""
+        manifest = self._read_manifest() or {}
         return {
             "cache_dir": str(self.cache_dir),
             "model_name": self.model_name,
-            "cache_path": str(self.model_cache_path),
-            "exists": self.model_cache_path.exists(),
+            "backend": self.backend,
+            "cache_path": str(self.snapshot_path),
+            "exists": self.manifest_path.exists(),
             "size_bytes": self.get_cache_size(),
-            "is_valid": self._is_cache_valid()
+            "is_valid": self._is_cache_valid(),
+            "libraries": manifest.get("libraries", {}),
+            "installed_libraries": library_versions(),
+            "quantized_path": str(self.quantized_path),
+            "quantized_valid": self._is_quantized_valid() if self.backend == "torch-int8" else None,
+            "legacy_pickle_present": self.legacy_cache_path.exists(),
         }
 
+
+class LazyModel:
+    """
+    Stand-in for the SentenceTransformer that loads it on first use, so the
+    server can bind its port and answer /health before the model is resident.
+    Attribute access is forwarded to the real model once loaded.
+    """
+
+    def __init__(self, cache: ModelCache):
+        self._cache = cache
+        self._model: Optional[SentenceTransformer] = None
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def state(self) -> str:
+        if self._model is not None:
+            return "ready"
+        if self._error is not None:
+            return "failed"
+        return "loading" if self._lock.locked() else "not_loaded"
+
+    def load(self) -> SentenceTransformer:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        self._model = self._cache.load_model()
+                        self._error = None
+                    except BaseException as e:
+                        self._error = e
+                        raise
+        return self._model
+
+    def load_in_background(self) -> threading.Thread:
+        """Start loading the model on a daemon thread."""
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Background model load failed: {e}")
+
+        thread = threading.Thread(target=run, name="model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+
 # Global model cache instance
 model_cache = ModelCache()
 
-def get_cached_model() -> SentenceTransformer:
-    """Get the cached sentence-transformers model"""
-    return model_cache.load_model() 
\ No newline at end of file
+def get_cached_model(lazy: Optional[bool] = None):
+    """Get the cached sentence-transformers model (a LazyModel when MODEL_LAZY_LOAD is set)"""
+    if settings.MODEL_LAZY_LOAD if lazy is None else lazy:
+        return LazyModel(model_cache)
+    return model_cache.load_model()
@@ -9,10 +9,10 @@ import sys
 import logging
 from pathlib import Path
 
-# Add the app directory to the path
-sys.path.insert(0, str(Path(__file__).parent))
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from model_cache import model_cache, get_cached_model
+from app.model_cache import model_cache, get_cached_model
 
 def main():
     """Preload the model and cache it"""
@@ -28,10 +28,10 @@ def main():
         
         if cache_info['is_valid']:
             logger.info("Model cache is valid, loading from cache...")
-            model = get_cached_model()
+            model = get_cached_model(lazy=False)
         else:
             logger.info("Model cache is invalid or missing, downloading model...")
-            model = get_cached_model()
+            model = get_cached_model(lazy=False)
         
         # Test the model
         test_text = "Test embedding"
@@ -0,0 +1,127 @@
+"""
+Dynamic int8 quantization for CPU inference of the embedding model.
+
+Every nn.Linear in the transformer is replaced by a dynamically quantized
+Linear (int8 weights, activations quantized per batch), which is where almost
+all of the encode time goes on CPU. Quantized weights are stored as plain
+int8 tensors plus scale/zero point in a safetensors file, so the first-run
+quantization is cached without pickling torch packed params.
+"""
+
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import torch
+from torch import nn
+from torch.ao.nn.quantized import dynamic as qdynamic
+from safetensors.torch import load_file, save_file
+
+logger = logging.getLogger(__name__)
+
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """Quantize all Linear layers of `model` in place to dynamic int8."""
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _quantized_linears(model: nn.Module) -> Dict[str, qdynamic.Linear]:
+    return {name: m for name, m in model.named_modules() if isinstance(m, qdynamic.Linear)}
+
+
+def save_quantized(model: nn.Module, path: Path) -> None:
+    """Write the int8 Linear weights of a quantized model to a safetensors file."""
+    tensors = {}
+    for name, module in _quantized_linears(model).items():
+        weight, bias = module.weight(), module.bias()
+        tensors[f"{name}.weight_int8"] = weight.int_repr().contiguous()
+        tensors[f"{name}.scale"] = torch.tensor([weight.q_scale()], dtype=torch.float64)
+        tensors[f"{name}.zero_point"] = torch.tensor([weight.q_zero_point()], dtype=torch.int64)
+        if bias is not None:
+            tensors[f"{name}.bias"] = bias.detach().contiguous()
+    save_file(tensors, str(path))
+
+
+def load_quantized(model: nn.Module, path: Path) -> nn.Module:
+    """
+    Swap the Linear layers of an fp32 model for int8 ones using weights from
+    `save_quantized`, skipping the quantization pass itself.
+    """
+    tensors = load_file(str(path))
+    linears = [name for name, m in model.named_modules() if isinstance(m, nn.Linear)]
+    missing = [name for name in linears if f"{name}.weight_int8" not in tensors]
+    if missing:
+        raise ValueError(f"Quantized weights missing for {len(missing)} layers (e.g. {missing[0]})")
+
+    for name in linears:
+        parent_name, _, attr = name.rpartition(".")
+        parent = model.get_submodule(parent_name) if parent_name else model
+        fp32 = getattr(parent, attr)
+        qlinear = qdynamic.Linear(fp32.in_features, fp32.out_features, bias_=fp32.bias is not None, dtype=torch.qint8)
+        weight = torch._make_per_tensor_quantized_tensor(
+            tensors[f"{name}.weight_int8"],
+            float(tensors[f"{name}.scale"][0]),
+            int(tensors[f"{name}.zero_point"][0]),
+        )
+        qlinear.set_weight_bias(weight, tensors.get(f"{name}.bias"))
+        setattr(parent, attr, qlinear)
+    model.eval()
+    return model
+
+
+def recall_at_k(baseline: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """Mean overlap between two top-k id lists (rows are queries)."""
+    overlaps = [len(set(b[:k]) & set(c[:k])) / k for b, c in zip(baseline, candidate)]
+    return float(np.mean(overlaps)) if overlaps else 0.0
+
+
+def compare_models(
+    baseline_model,
+    candidate_model,
+    texts: Sequence[str],
+    queries: Sequence[str],
+    document_prefix: str,
+    query_prefix: str,
+    ks: Sequence[int] = (1, 3, 10),
+) -> Dict[str, object]:
+    """
+    Retrieval quality of `candidate_model` against `baseline_model`: each model
+    embeds the corpus and the queries, and the candidate's top-k chunks are
+    compared with the baseline's (recall@k = share of the baseline top-k the
+    candidate also returns).
+    """
+    def encode(model, items: List[str]) -> np.ndarray:
+        return model.encode(items, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+
+    docs = [f"{document_prefix}{t}" for t in texts]
+    qs = [f"{query_prefix}{q}" for q in queries]
+
+    results = {}
+    rankings = {}
+    for label, model in (("fp32", baseline_model), ("candidate", candidate_model)):
+        doc_vecs = encode(model, docs)
+        encode(model, qs[:4])  # warm up before timing
+        started = time.perf_counter()
+        query_vecs = np.stack([encode(model, [q])[0] for q in qs])
+        elapsed = time.perf_counter() - started
+        rankings[label] = (doc_vecs, query_vecs, np.argsort(-(query_vecs @ doc_vecs.T), axis=1))
+        results[f"{label}_query_ms"] = round(elapsed / max(1, len(qs)) * 1000, 2)
+
+    max_k = min(max(ks), len(texts))
+    base_rank = rankings["fp32"][2][:, :max_k]
+    cand_rank = rankings["candidate"][2][:, :max_k]
+    for k in ks:
+        if k <= len(texts):
+            results[f"recall@{k}"] = round(recall_at_k(base_rank, cand_rank, k), 4)
+
+    # How far the candidate's query vectors drift from the fp32 ones
+    cosine = np.sum(rankings["fp32"][1] * rankings["candidate"][1], axis=1)
+    results["query_cosine_mean"] = round(float(cosine.mean()), 4)
+    results["query_cosine_min"] = round(float(cosine.min()), 4)
+    results["queries"] = len(qs)
+    results["documents"] = len(docs)
+    results["speedup"] = round(results["fp32_query_ms"] / results["candidate_query_ms"], 2) if results["candidate_query_ms"] else None
+    return results
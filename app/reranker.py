@@ -0,0 +1,193 @@
+"""
+Cross-encoder second stage for semantic search.
+
+The top-N bi-encoder candidates are scored together with the query by a small
+multilingual cross-encoder on CPU, in one batch. Each request has a latency
+budget: if scoring does not finish in time the caller keeps the bi-encoder
+order, while the batch completes in the background and fills the pair cache
+for the next identical question.
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .cache import LRUCache
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: str,
+        budget_ms: float,
+        cache_size: int = 8192,
+        max_length: int = 256,
+        batch_size: int = 32,
+        enabled: bool = True,
+        probe_seconds: float = 10.0,
+    ):
+        self.model_name = model_name
+        self.enabled = enabled
+        self._budget = max(0.0, budget_ms) / 1000.0
+        self._max_length = max_length
+        self._batch_size = batch_size
+        self._model = None
+        self._load_lock = Lock()
+        # One worker: batches are CPU bound and queueing them is what the budget guards against
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._pending = 0
+        self._max_pending = 2
+        # An over-budget estimate only changes when a batch runs: let one through
+        # this often so a slow cold start or load spike doesn't disable reranking
+        self._probe_seconds = probe_seconds
+        self._last_submit = 0.0
+        # Scores depend on the query and the chunk text only; chunk ids are content hashes
+        self._scores = LRUCache(cache_size, name="rerank_pairs")
+        self._scores.set_version(model_name)
+
+        # Statistics
+        self._stats_lock = Lock()
+        self._requests = 0
+        self._reranked = 0
+        self._timeouts = 0
+        self._skipped = 0
+        self._probes = 0
+        self._errors = 0
+        self._pairs_scored = 0
+        self._seconds_per_pair: Optional[float] = None
+
+    def _get_model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    started = time.time()
+                    self._model = CrossEncoder(self.model_name, max_length=self._max_length, device="cpu")
+                    logger.info(f"Cross-encoder {self.model_name} loaded in {time.time() - started:.2f}s")
+        return self._model
+
+    def warm_up(self) -> None:
+        """Load the model on the rerank thread so the first requests don't pay for it."""
+        if self.enabled:
+            self._pool.submit(self._get_model)
+
+    def _score(self, query: str, pairs: List[tuple], probe: bool = False) -> Dict[int, float]:
+        """Score (chunk_id, text) pairs in one batch and store them in the pair cache."""
+        try:
+            return self._score_batch(query, pairs, probe)
+        finally:
+            with self._stats_lock:
+                self._pending -= 1
+
+    def _score_batch(self, query: str, pairs: List[tuple], probe: bool = False) -> Dict[int, float]:
+        model = self._get_model()
+        started = time.perf_counter()
+        predicted = model.predict([(query, text) for _, text in pairs], batch_size=self._batch_size, show_progress_bar=False)
+        elapsed = time.perf_counter() - started
+        scores = dict(zip((cid for cid, _ in pairs), np.asarray(predicted, dtype=np.float32).tolist()))
+        for cid, score in scores.items():
+            self._scores.set((query, cid), score)
+        with self._stats_lock:
+            self._pairs_scored += len(pairs)
+            per_pair = elapsed / len(pairs)
+            # A probe replaces the estimate: averaging would keep it over budget for many more probes
+            if self._seconds_per_pair is None or probe:
+                self._seconds_per_pair = per_pair
+            else:
+                self._seconds_per_pair = 0.8 * self._seconds_per_pair + 0.2 * per_pair
+        return scores
+
+    def scores(self, query: str, chunk_ids: Sequence[int], texts: Sequence[str]) -> Optional[List[float]]:
+        """
+        Cross-encoder scores for the candidates, or None when they could not be
+        produced within the latency budget (the caller keeps its own order).
+        `query` is scored as given and also keys the pair cache, so callers pass
+        the normalized text.
+        """
+        with self._stats_lock:
+            self._requests += 1
+
+        cached = [self._scores.get((query, int(cid))) for cid in chunk_ids]
+        missing = [(int(cid), text) for cid, text, score in zip(chunk_ids, texts, cached) if score is None]
+        if missing:
+            with self._stats_lock:
+                now = time.monotonic()
+                estimate = self._seconds_per_pair
+                over_budget = estimate is not None and estimate * len(missing) > self._budget
+                probe = over_budget and now - self._last_submit >= self._probe_seconds
+                # Known to be too slow for this budget, or stuck behind other batches:
+                # don't queue work we won't wait for
+                if self._pending >= self._max_pending or (over_budget and not probe):
+                    self._skipped += 1
+                    return None
+                if probe:
+                    self._probes += 1
+                self._pending += 1
+                self._last_submit = now
+
+            try:
+                future = self._pool.submit(self._score, query, missing, probe)
+            except Exception as e:
+                # _score never ran, so it can't release the slot itself
+                with self._stats_lock:
+                    self._pending -= 1
+                    self._errors += 1
+                logger.warning(f"Cross-encoder rerank not scheduled: {e}")
+                return None
+            try:
+                fresh = future.result(timeout=self._budget)
+            except FutureTimeout:
+                # Still running (or loading the model): it fills the cache for later calls
+                with self._stats_lock:
+                    self._timeouts += 1
+                return None
+            except Exception as e:
+                logger.warning(f"Cross-encoder rerank failed: {e}")
+                with self._stats_lock:
+                    self._errors += 1
+                return None
+            cached = [fresh[int(cid)] if score is None else score for cid, score in zip(chunk_ids, cached)]
+
+        with self._stats_lock:
+            self._reranked += 1
+        return cached
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = {
+                "enabled": self.enabled,
+                "model": self.model_name,
+                "loaded": self._model is not None,
+                "budget_ms": round(self._budget * 1000, 1),
+                "pending": self._pending,
+                "requests": self._requests,
+                "reranked": self._reranked,
+                "timeouts": self._timeouts,
+                "skipped_over_budget": self._skipped,
+                "probes": self._probes,
+                "errors": self._errors,
+                "pairs_scored": self._pairs_scored,
+                "ms_per_pair": round(self._seconds_per_pair * 1000, 3) if self._seconds_per_pair is not None else None,
+            }
+        stats["pair_cache"] = self._scores.get_stats()
+        return stats
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+reranker = CrossEncoderReranker(
+    settings.RERANK_MODEL,
+    budget_ms=settings.RERANK_BUDGET_MS,
+    cache_size=settings.RERANK_CACHE_SIZE,
+    max_length=settings.RERANK_MAX_LENGTH,
+    enabled=settings.RERANK_ENABLED,
+    probe_seconds=settings.RERANK_PROBE_SECONDS,
+)
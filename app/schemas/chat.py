@@ -29,6 +29,8 @@ class PuraAttachment(BaseModel):
     deskripsi: str = Field(..., description="Description")
     link_lokasi: Optional[str] = Field(None, description="Location link")
     link_gambar: Optional[str] = Field(None, description="Image link")
+    latitude: Optional[float] = Field(None, description="Latitude")
+    longitude: Optional[float] = Field(None, description="Longitude")
     
     class Config:
         json_schema_extra = {
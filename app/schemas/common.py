@@ -9,7 +9,7 @@ from pydantic import BaseModel, Field
 class PaginationResponse(BaseModel):
     """Pagination metadata for list responses."""
     
-    page: int = Field(..., description="Current page number")
+    page: Optional[int] = Field(..., description="Current page number (null for a cursor page)")
     limit: int = Field(..., description="Number of items per page")
     total: int = Field(..., description="Total number of items")
     total_pages: int = Field(..., description="Total number of pages")
@@ -17,6 +17,7 @@ class PaginationResponse(BaseModel):
     has_prev: bool = Field(..., description="Whether there is a previous page")
     next_page: Optional[int] = Field(None, description="Next page number")
     prev_page: Optional[int] = Field(None, description="Previous page number")
+    next_cursor: Optional[str] = Field(None, description="Keyset cursor for the next page")
 
 
 class ErrorResponse(BaseModel):
@@ -1,52 +1,262 @@
+import logging
+from threading import Lock
 import faiss
 import numpy as np
-from app.embed import embed_texts, embed_query, model
+from app.embed import embed_texts, embed_query, model, MODEL_NAME, DOCUMENT_PREFIX, QUERY_PREFIX
+from app.index_store import index_store, corpus_hash
+from app.ann import IndexSpec, build_index, configure_search, index_description, search_parameters
+from app.filter_index import FilterIndex
+from app.entity_matcher import build_entity_matcher
+from app.db import filter_cache_generation
+from app.reranker import reranker
+from app.lexical import BM25Index, reciprocal_rank_fusion
+from app.data_loader import chunk_id
+from app.cache import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Shared across engine instances; both are dropped whenever the index version changes
+query_embedding_cache = LRUCache(settings.SEARCH_EMBED_CACHE_SIZE, name="query_embedding")
+retrieval_cache = LRUCache(settings.SEARCH_RESULT_CACHE_SIZE, name="retrieval")
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def index_identity(store, spec: IndexSpec, texts: list[str], metadata: list[dict]):
+    """(artifact key, manifest info) of the index for this corpus, model and index type"""
+    params = spec.build_params()
+    info = store.get_index_info(MODEL_NAME, DOCUMENT_PREFIX, QUERY_PREFIX, corpus_hash(texts, metadata), params)
+    key = store.make_key(MODEL_NAME, DOCUMENT_PREFIX, QUERY_PREFIX, info["content_hash"], params)
+    return key, info
 
 class SemanticSearch:
-    def __init__(self, texts: list[str], metadata: list[dict]):
+    def __init__(self, texts: list[str], metadata: list[dict], store=index_store, spec: IndexSpec = None, previous=None):
         self.texts = texts
         self.metadata = metadata
-        self.embeddings = embed_texts(texts)
-        self.index = faiss.IndexFlatIP(self.embeddings.shape[1])
-        self.index.add(self.embeddings)
+        self.store = store
+        self.spec = spec or IndexSpec.from_settings()
+        # Only guards the entity matcher rebuild; retrieval itself is lock-free
+        self._lock = Lock()
+        self.ids = np.array([chunk_id(m["hash"]) for m in metadata], dtype=np.int64)
+        self._index_positions()
+        self.filters = FilterIndex(metadata, self.ids)
+        self.lexical = BM25Index(texts)
+        self._build_entities(metadata)
+        self.index_key, info = self._index_info(texts, metadata)
+
+        loaded = store.load(self.index_key, info)
+        if loaded is not None:
+            self.embeddings, self.index, _, _ = loaded
+            configure_search(self.index, self.spec)
+            return
+
+        logger.info(f"Building index for {len(texts)} chunks...")
+        self.embeddings = self._embed_corpus(texts, previous)
+        self.index = self._build_index(self.embeddings, self.ids)
+        self.persist(info)
+
+    def _known_vectors(self, previous=None):
+        """
+        ({chunk id: row}, embeddings) of an already embedded corpus: the live
+        engine when there is one, else the newest stored artifact (after a restart).
+        """
+        if previous is not None and len(previous.ids):
+            return previous._positions, previous.embeddings
+        stored = self.store.load_vectors(MODEL_NAME, DOCUMENT_PREFIX, QUERY_PREFIX)
+        if stored is None:
+            return None
+        hashes, embeddings = stored
+        return {chunk_id(h): row for row, h in enumerate(hashes)}, embeddings
+
+    def _embed_corpus(self, texts: list[str], previous=None) -> np.ndarray:
+        """Embed the corpus, copying vectors of unchanged chunks (same chunk hash) from known vectors"""
+        known = self._known_vectors(previous)
+        if known is None:
+            return np.asarray(embed_texts(texts), dtype=np.float32)
+
+        known_rows, known_embeddings = known
+        reused = [(pos, known_rows.get(int(cid))) for pos, cid in enumerate(self.ids)]
+        missing = [pos for pos, prev in reused if prev is None]
+        embeddings = np.empty((len(texts), known_embeddings.shape[1]), dtype=np.float32)
+        for pos, prev in reused:
+            if prev is not None:
+                embeddings[pos] = known_embeddings[prev]
+        if missing:
+            embeddings[missing] = np.asarray(embed_texts([texts[pos] for pos in missing]), dtype=np.float32)
+        logger.info(f"Reused {len(texts) - len(missing)} embeddings, embedded {len(missing)} new chunks")
+        return embeddings
+
+    def _index_positions(self) -> None:
+        self._positions = {int(cid): pos for pos, cid in enumerate(self.ids)}
+        # Sorted ids for vectorized id -> position lookups on the search path
+        self._id_order = np.argsort(self.ids, kind="stable")
+        self._sorted_ids = self.ids[self._id_order]
+
+    def _index_info(self, texts: list[str], metadata: list[dict]):
+        return index_identity(self.store, self.spec, texts, metadata)
+
+    def _build_index(self, embeddings: np.ndarray, ids: np.ndarray):
+        return build_index(embeddings, ids, self.spec)
+
+    def persist(self, info: dict = None) -> None:
+        """Publish the current state as an index artifact"""
+        if info is None:
+            _, info = self._index_info(self.texts, self.metadata)
+        try:
+            self.store.save(self.index_key, info, self.embeddings, self.index, self.metadata)
+            self.store.prune(keep=self.index_key)
+        except Exception as e:
+            logger.warning(f"Failed to persist index: {e}")
+
+    def _sync_cache_version(self) -> None:
+        # Cached embeddings/results are only valid for the index they came from
+        query_embedding_cache.set_version(self.index_key)
+        retrieval_cache.set_version(self.index_key)
+
+    def get_index_stats(self) -> dict:
+        return {
+            "key": self.index_key,
+            "configured": self.spec.type,
+            "filter_values": self.filters.get_stats(),
+            "lexical": self.lexical.get_stats(),
+            **index_description(self.index),
+        }
+
+    def _build_entities(self, metadata: list[dict]) -> None:
+        generation = filter_cache_generation()
+        self.entities = build_entity_matcher(metadata)
+        # Published after the matcher, so a reader never pairs the new generation with the old matcher
+        self._entity_generation = generation
+
+    def _current_entities(self):
+        # Kabupaten/jenis vocabularies are re-read after a filter cache invalidation
+        if self._entity_generation != filter_cache_generation():
+            with self._lock:
+                if self._entity_generation != filter_cache_generation():
+                    self._build_entities(self.metadata)
+        return self.entities
+
+    def detect_entities(self, query: str):
+        """Kabupaten, jenis and temple names mentioned in `query`"""
+        return self._current_entities().find_all(query)
 
     def detect_filters(self, query: str):
-        kabupaten_list = ['Badung', 'Bangli', 'Buleleng', 'Denpasar', 'Gianyar', 'Jembrana', 'Karangasem', 'Klungkung', 'Tabanan']
-        jenis_list = ['Dang Kahyangan', 'Kahyangan Jagat', 'Pura Beji', 'Pura Gunung', 'Pura Melanting', 'Pura Puseh', 'Pura Segara', 'Pura Sejarah', 'Pura Taman', 'Sad Kahyangan']
-        filters = {}
-        for kab in kabupaten_list:
-            if kab.lower() in query.lower():
-                filters['kabupaten'] = kab
-        for jenis in jenis_list:
-            if jenis.lower() in query.lower():
-                filters['jenis'] = jenis
-        return filters
+        return self._current_entities().detect_filters(query)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, positions: np.ndarray, top_k: int):
+        """(score, position) pairs of the `top_k` highest scores, best first"""
+        if 0 < top_k < len(scores):
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, positions = scores[part], positions[part]
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return list(zip(scores[order].tolist(), positions[order].tolist()))
 
     def rerank(self, query_vec, candidates, top_k=3):
-        reranked = []
-        for idx in candidates:
-            score = np.dot(self.embeddings[idx], query_vec)
-            reranked.append((score, idx))
-        reranked.sort(reverse=True)
-        return reranked[:top_k]
+        """Score `candidates` (corpus positions) against the query in one batch"""
+        candidates = np.asarray(candidates, dtype=np.int64)
+        scores = self.embeddings[candidates] @ np.asarray(query_vec, dtype=np.float32)
+        return self._top_k(scores, candidates, top_k)
+
+    def embed_query_cached(self, query: str):
+        """Embed the normalized query, reusing the vector for repeated questions"""
+        # The text embedded is the cache key, so every spelling sharing a key gets the same vector
+        query = normalize_query(query)
+        query_vec = query_embedding_cache.get(query)
+        if query_vec is None:
+            query_vec = embed_query(query)
+            query_embedding_cache.set(query, query_vec)
+        return query_vec
+
+    def _build_results(self, reranked, texts=None, metadata=None):
+        texts = self.texts if texts is None else texts
+        metadata = self.metadata if metadata is None else metadata
+        return [{"score": score, "text": texts[idx], "meta": metadata[idx]} for score, idx in reranked]
+
+    def _id_positions(self, ids: np.ndarray) -> np.ndarray:
+        """Corpus positions of chunk ids returned by the index"""
+        return self._id_order[np.searchsorted(self._sorted_ids, ids)]
+
+    def search_vector(self, query_vec, top_k: int = 3, selection=None):
+        """
+        (score, position) pairs of the best chunks for an embedded query,
+        restricted to `selection` when given.
+        """
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        if selection is not None and len(selection) <= settings.SEARCH_FILTER_EXACT_MAX:
+            # Small filters: exact scores over the matching rows beat any index traversal
+            scores = self.embeddings[selection.positions] @ query_vec
+            return self._top_k(scores, selection.positions, top_k)
+
+        k = max(settings.SEARCH_MAX_CANDIDATES, top_k)
+        params = search_parameters(self.index, selection.selector) if selection is not None else None
+        D, I = self.index.search(query_vec[None, :], k, params=params)
+        found = I[0] != -1
+        positions = self._id_positions(I[0][found])
+        if self.spec.exact_scores:
+            # FAISS already returned the inner products
+            return self._top_k(D[0][found], positions, top_k)
+        # PQ distances are approximate; rescore the shortlist against the stored vectors
+        return self.rerank(query_vec, positions, top_k)
+
+    def retrieve(self, query: str, query_vec, top_k: int, selection=None):
+        """
+        (score, position) candidates for a query: dense hits, fused with BM25 hits
+        by reciprocal rank fusion when hybrid search is enabled.
+        """
+        if not settings.SEARCH_HYBRID_ENABLED:
+            return self.search_vector(query_vec, top_k, selection)
+        depth = max(settings.SEARCH_HYBRID_CANDIDATES, top_k)
+        dense = self.search_vector(query_vec, depth, selection)
+        lexical = self.lexical.search(query, depth, selection.positions if selection is not None else None)
+        if not lexical:
+            return dense[:top_k]
+        return reciprocal_rank_fusion([dense, lexical], k=settings.SEARCH_RRF_K)[:top_k]
+
+    def search_pura_ids(self, query: str, jenis: str = None, kabupaten: str = None) -> list[str]:
+        """
+        Pura ids whose chunks match `query` lexically, best first. The last word
+        matches as a prefix so partially typed names still find their temple.
+        """
+        filters = {facet: value for facet, value in (("jenis", jenis), ("kabupaten", kabupaten)) if value}
+        selection = self.filters.select(filters)
+        if selection is not None and not selection:
+            return []
+        hits = self.lexical.search(query, self.lexical.size, selection.positions if selection is not None else None, prefix=True)
+        # A pura ranks by its best chunk
+        return list(dict.fromkeys(str(self.metadata[pos]["id"]) for _, pos in hits))
 
     def search(self, query: str, top_k: int = 3):
-        query_vec = embed_query(query)
-        D, I = self.index.search(np.array([query_vec]), 10)
+        # Engines are immutable and swapped whole on rebuild, so retrieval runs
+        # without a lock. Results are keyed on the index as well: a request still
+        # finishing on the previous engine can't fill the new engine's cache.
         filters = self.detect_filters(query)
-        filtered = []
-        for i in I[0]:
-            meta = self.metadata[i]
-            if ('kabupaten' in filters and filters['kabupaten'] != meta['kabupaten']) or                ('jenis' in filters and filters['jenis'] != meta['jenis']):
-                continue
-            filtered.append(i)
-        candidate_indices = filtered if filtered else list(I[0])
-        reranked = self.rerank(query_vec, candidate_indices, top_k=top_k)
-        results = []
-        for score, idx in reranked:
-            results.append({
-                "score": float(score),
-                "text": self.texts[idx],
-                "meta": self.metadata[idx]
-            })
-        return results
+        cache_key = (self.index_key, normalize_query(query), top_k, tuple(sorted(filters.items())))
+        self._sync_cache_version()
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return self._build_results(cached)
+
+        query_vec = self.embed_query_cached(query)
+        selection = self.filters.select(filters)
+        depth = max(settings.RERANK_CANDIDATES, top_k) if reranker.enabled else top_k
+        # A filter matching no chunk falls back to unfiltered results
+        candidates = self.retrieve(query, query_vec, depth, selection if selection else None)
+        if not reranker.enabled:
+            retrieval_cache.set(cache_key, candidates)
+            return self._build_results(candidates)
+
+        scores = reranker.scores(
+            cache_key[1],
+            [int(self.ids[idx]) for _, idx in candidates],
+            [self.texts[idx] for _, idx in candidates],
+        )
+        if scores is None:
+            # Over budget: keep the first-stage order and don't cache it, so a later call can rerank
+            return self._build_results(candidates[:top_k])
+
+        order = np.argsort(-np.asarray(scores, dtype=np.float32), kind="stable")[:top_k]
+        reranked = [(scores[i], candidates[i][1]) for i in order.tolist()]
+        retrieval_cache.set(cache_key, reranked)
+        return self._build_results(reranked)
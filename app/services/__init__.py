@@ -2,14 +2,8 @@
 Business logic services layer.
 """
 
-from .pura_service import PuraService
-from .chat_service import ChatService
-from .search_service import SearchService
 from .cache_service import CacheService
 
 __all__ = [
-    "PuraService",
-    "ChatService", 
-    "SearchService",
     "CacheService"
 ] 
\ No newline at end of file
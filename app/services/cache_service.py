@@ -2,13 +2,13 @@
 Cache service for managing application caching.
 """
 
-import time
 import logging
-from typing import Any, Dict, Optional, Tuple
-from threading import Lock
+from typing import Any, Dict, Iterable, Optional
 from functools import wraps
 
 from ..core.config import settings
+from ..core.cache_engine import SingleFlight, read_through
+from ..core.cache_backends import create_cache_backend
 from ..core.exceptions import CacheException
 
 logger = logging.getLogger(__name__)
@@ -17,133 +17,112 @@ logger = logging.getLogger(__name__)
 class CacheService:
     """
     Thread-safe in-memory cache service with TTL functionality.
+    
+    Storage is a pluggable backend (CACHE_BACKEND): the bounded per-process
+    CacheEngine, or a SQLite database on tmpfs shared by all workers so fills
+    and invalidations are visible everywhere.
     """
     
     def __init__(self):
-        self._cache: Dict[str, Tuple[Any, float]] = {}
-        self._lock = Lock()
         self._enabled = settings.CACHE_ENABLED
         self._default_ttl = settings.CACHE_DEFAULT_TTL
+        self._engine = create_cache_backend(
+            settings.CACHE_BACKEND,
+            namespace="service",
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            max_bytes=settings.CACHE_MAX_BYTES,
+            default_ttl=self._default_ttl,
+            stripes=settings.CACHE_LOCK_STRIPES,
+            sqlite_path=settings.CACHE_SQLITE_PATH,
+        )
         
         if self._enabled:
             logger.info("Cache service enabled")
         else:
             logger.info("Cache service disabled")
     
-    def _is_expired(self, timestamp: float) -> bool:
-        """Check if a cache entry has expired."""
-        return time.time() > timestamp
-    
-    def _cleanup_expired(self) -> None:
-        """Remove expired entries from cache."""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self._cache.items()
-            if self._is_expired(timestamp)
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
-    
     def get(self, key: str) -> Optional[Any]:
         """Get a value from cache."""
         if not self._enabled:
             return None
         
-        with self._lock:
-            if key not in self._cache:
-                return None
-            
-            value, timestamp = self._cache[key]
-            if self._is_expired(timestamp):
-                del self._cache[key]
-                return None
-            
+        value = self._engine.get(key)
+        if value is not None:
             logger.debug(f"Cache hit for key: {key}")
-            return value
+        return value
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set a value in cache with optional TTL."""
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> None:
+        """Set a value in cache with optional TTL and invalidation tags."""
         if not self._enabled:
             return
         
         ttl = ttl or self._default_ttl
-        timestamp = time.time() + ttl
-        
-        with self._lock:
-            self._cache[key] = (value, timestamp)
-            logger.debug(f"Cached key: {key} with TTL: {ttl}s")
+        self._engine.set(key, value, ttl, tags=tags)
+        logger.debug(f"Cached key: {key} with TTL: {ttl}s")
     
     def delete(self, key: str) -> bool:
         """Delete a key from cache."""
         if not self._enabled:
             return False
         
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                logger.debug(f"Deleted cache key: {key}")
-                return True
-            return False
+        deleted = self._engine.delete(key)
+        if deleted:
+            logger.debug(f"Deleted cache key: {key}")
+        return deleted
     
     def clear(self) -> None:
         """Clear all cache entries."""
         if not self._enabled:
             return
         
-        with self._lock:
-            self._cache.clear()
-            logger.info("Cache cleared")
+        self._engine.clear()
+        logger.info("Cache cleared")
     
     def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate all keys matching a pattern."""
+        """Invalidate all keys containing `pattern` (scans every key; prefer invalidate_tag)."""
         if not self._enabled:
             return 0
         
-        with self._lock:
-            keys_to_delete = [key for key in self._cache.keys() if pattern in key]
-            for key in keys_to_delete:
-                del self._cache[key]
-            
-            if keys_to_delete:
-                logger.info(f"Invalidated {len(keys_to_delete)} cache entries matching pattern: {pattern}")
-            
-            return len(keys_to_delete)
+        removed = self._engine.invalidate_pattern(pattern)
+        if removed:
+            logger.info(f"Invalidated {removed} cache entries matching pattern: {pattern}")
+        return removed
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """Invalidate all keys stored with `tag`."""
+        if not self._enabled:
+            return 0
+        
+        return self._engine.invalidate_tag(tag)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        with self._lock:
-            self._cleanup_expired()
-            total_entries = len(self._cache)
-            
-            # Calculate memory usage (rough estimate)
-            memory_usage = sum(
-                len(str(key)) + len(str(value)) 
-                for key, (value, _) in self._cache.items()
-            )
-            
-            return {
-                "enabled": self._enabled,
-                "total_entries": total_entries,
-                "memory_usage_bytes": memory_usage,
-                "default_ttl": self._default_ttl
-            }
+        stats = self._engine.get_stats()
+        stats.update({
+            "enabled": self._enabled,
+            "default_ttl": self._default_ttl,
+            "coalesced_misses": _flight.coalesced
+        })
+        return stats
 
 
 # Global cache service instance
 cache_service = CacheService()
+_flight = SingleFlight()
 
 
-def cached(ttl: Optional[int] = None, key_prefix: str = ""):
+def cached(ttl: Optional[int] = None, key_prefix: str = "", stale_ttl: int = 0):
     """
     Decorator to cache function results.
     
+    Concurrent misses for the same key are coalesced: one caller runs the
+    function while the others wait for its result.
+    
     Args:
         ttl: Time to live in seconds (uses default if None)
         key_prefix: Prefix for cache key
+        stale_ttl: Seconds an expired value may still be served while a
+            single background refresh runs (0 disables stale-while-revalidate)
     """
     def decorator(func):
         @wraps(func)
@@ -161,15 +140,13 @@ def cached(ttl: Optional[int] = None, key_prefix: str = ""):
             
             cache_key = "|".join(key_parts)
             
-            # Try to get from cache
-            cached_result = cache_service.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache_service.set(cache_key, result, ttl)
-            
-            return result
+            return read_through(
+                cache_service,
+                _flight,
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl or cache_service._default_ttl,
+                stale_ttl,
+            )
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator
\ No newline at end of file
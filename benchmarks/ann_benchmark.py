@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Recall/latency harness for the configurable FAISS index types.
+
+Builds each index type from app/ann.py on synthetic clustered corpora,
+measures recall@k against exact (Flat) search, single-query p50/p99
+latency, build time and index size.
+
+    python benchmarks/ann_benchmark.py --sizes 1000,10000,100000
+    python benchmarks/ann_benchmark.py --sizes 1000000 --types hnsw,ivf_pq,opq --dim 1024
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ann import INDEX_TYPES, IndexSpec, build_index
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """
+    Normalized vectors drawn around random centres, closer to real embedding
+    distributions than uniform noise (which no ANN index handles well).
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    step = 100_000
+    for start in range(0, n, step):
+        end = min(n, start + step)
+        assignment = rng.integers(0, clusters, end - start)
+        vectors[start:end] = centres[assignment] + 0.6 * rng.standard_normal((end - start, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(corpus: np.ndarray, nq: int, seed: int) -> np.ndarray:
+    """Perturbed corpus vectors, so every query has meaningful near neighbours."""
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(corpus), nq)
+    noise = rng.standard_normal((nq, corpus.shape[1])) * (0.3 / np.sqrt(corpus.shape[1]))
+    queries = (corpus[picks] + noise).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def recall(truth: np.ndarray, found: np.ndarray, k: int) -> float:
+    hits = sum(len(set(t[:k]) & set(f[:k])) for t, f in zip(truth, found))
+    return hits / (len(truth) * k)
+
+
+def run_case(spec: IndexSpec, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    ids = np.arange(len(corpus), dtype=np.int64)
+    started = time.perf_counter()
+    index = build_index(corpus, ids, spec)
+    build_s = time.perf_counter() - started
+
+    # Recall from one batched search, latency from single-query calls (as served)
+    _, found = index.search(queries, k)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "type": spec.type,
+        "n": len(corpus),
+        f"recall@{k}": round(recall(truth, found, k), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "build_s": round(build_s, 2),
+        "size_mb": round(len(faiss.serialize_index(index)) / (1024 * 1024), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency benchmark for FAISS index types")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated corpus sizes (up to 1000000)")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="Comma-separated index types")
+    parser.add_argument("--dim", type=int, default=1024, help="Vector dimension (multilingual-e5-large: 1024)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (default: 4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    results = []
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        corpus = synthetic_corpus(n, args.dim, args.clusters, args.seed)
+        queries = make_queries(corpus, args.queries, args.seed)
+        exact = faiss.IndexFlatIP(args.dim)
+        exact.add(corpus)
+        _, truth = exact.search(queries, args.k)
+        del exact
+
+        for index_type in types:
+            spec = IndexSpec(
+                type=index_type,
+                nlist=args.nlist or int(4 * np.sqrt(n)),
+                nprobe=args.nprobe,
+                hnsw_m=args.hnsw_m,
+                ef_search=args.ef_search,
+                pq_m=args.pq_m,
+            )
+            result = run_case(spec, corpus, queries, truth, args.k)
+            results.append(result)
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(
+                    f"{result['type']:>9} n={n:<8} recall@{args.k}={result[f'recall@{args.k}']:.4f} "
+                    f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms "
+                    f"build={result['build_s']:.2f}s size={result['size_mb']}MB"
+                )
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
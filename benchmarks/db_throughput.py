@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Queries/sec of the legacy app/db.py access pattern against the pooled layer.
+
+"connect" opens a fresh mysql.connector connection per query, as app/db.py did
+before; "pooled" runs the same query through the shared pool (text protocol),
+and "prepared" through the pool as a server-side prepared statement. The
+corpus query is compared buffered on a fresh connection against the pool's
+unbuffered stream.
+
+Point it at a disposable MySQL-compatible server loaded with migration.sql,
+for example:
+
+    docker run -d --rm --name purabali-bench -p 3307:3306 \\
+        -e MARIADB_ALLOW_EMPTY_ROOT_PASSWORD=1 mariadb:11
+    docker exec -i purabali-bench mariadb -uroot < migration.sql
+    MYSQL_PORT=3307 python benchmarks/db_throughput.py --threads 1,8
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mysql.connector
+
+from app.core.config import settings
+from app.database.connection import DatabaseConnection
+from app.database.models import PURA_GAMBAR_QUERY
+from app.db import PURA_CORPUS_QUERY
+
+
+def connect():
+    return mysql.connector.connect(
+        host=settings.MYSQL_HOST,
+        port=settings.MYSQL_PORT,
+        user=settings.MYSQL_USER,
+        password=settings.MYSQL_PASSWORD,
+        database=settings.MYSQL_DATABASE,
+    )
+
+
+def legacy_query(query, params=()):
+    conn = connect()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def run(label, fn, args_list, threads):
+    # Warm-up outside the timing (pool creation, server caches)
+    fn(*args_list[0])
+    started = time.perf_counter()
+    if threads == 1:
+        for args in args_list:
+            fn(*args)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda args: fn(*args), args_list))
+    elapsed = time.perf_counter() - started
+    qps = len(args_list) / elapsed
+    print(f"  {label:<22} {qps:>10.1f} q/s   ({len(args_list)} queries in {elapsed:.2f}s)")
+    return qps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000, help="Point lookups per mode")
+    parser.add_argument("--corpus-runs", type=int, default=50, help="Full corpus fetches per mode")
+    parser.add_argument("--threads", default="1,8", help="Comma-separated client thread counts")
+    args = parser.parse_args()
+
+    ids = [row["id_pura"] for row in legacy_query("SELECT id_pura FROM pura")]
+    if not ids:
+        sys.exit("The pura table is empty; load migration.sql first")
+    lookups = [(PURA_GAMBAR_QUERY, (ids[i % len(ids)],)) for i in range(args.queries)]
+    corpus = [(PURA_CORPUS_QUERY,)] * args.corpus_runs
+    print(f"{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DATABASE}, {len(ids)} pura rows, "
+          f"sync pool size {settings.DB_SYNC_POOL_SIZE}")
+
+    for threads in [int(t) for t in args.threads.split(",")]:
+        db = DatabaseConnection()
+        print(f"\n{threads} thread(s), point lookup by id")
+        base = run("connect per query", legacy_query, lookups, threads)
+        pooled = run("pooled", db.execute_query, lookups, threads)
+        prepared = run("pooled + prepared", db.execute_prepared, lookups, threads)
+        print(f"  speedup: pooled {pooled / base:.1f}x, prepared {prepared / base:.1f}x")
+
+        print(f"{threads} thread(s), full corpus query")
+        base = run("connect per query", legacy_query, corpus, threads)
+        streamed = run("pooled + streamed", lambda q: list(db.stream_query(q)), corpus, threads)
+        print(f"  speedup: {streamed / base:.1f}x")
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
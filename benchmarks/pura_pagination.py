@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+/api/pura query cost at scale: OFFSET vs keyset pages, the join COUNT(*) vs a
+cached total, and the LIKE '%q%' text filter vs the FULLTEXT index.
+
+Creates a scratch database (default purabali_bench) on the configured MySQL
+server, loads the schema from migration.sql and the indexes from
+migrations/001_pura_search_indexes.sql, and fills it with
+synthetic temples. Point it at a disposable server, for example:
+
+    docker run -d --rm --name purabali-bench -p 3307:3306 \\
+        -e MARIADB_ALLOW_EMPTY_ROOT_PASSWORD=1 mariadb:11
+    MYSQL_PORT=3307 python benchmarks/pura_pagination.py --temples 100000
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mysql.connector
+
+from app.core.config import settings
+from app.database import models
+
+KABUPATEN = ["Badung", "Bangli", "Buleleng", "Denpasar", "Gianyar", "Jembrana", "Karangasem", "Klungkung", "Tabanan"]
+JENIS = ["Dang Kahyangan", "Kahyangan Jagat", "Pura Beji", "Pura Puseh", "Pura Segara", "Pura Taman", "Sad Kahyangan"]
+WORDS = ["agung", "batur", "besakih", "dalem", "desa", "gunung", "lempuyang", "mas", "puseh", "segara", "taman", "tirta", "ulun", "danu"]
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def synthetic_id(i: int) -> str:
+    # id_pura is VARCHAR(5): "S" + four base-36 digits
+    digits = ""
+    for _ in range(4):
+        i, rem = divmod(i, 36)
+        digits = DIGITS[rem] + digits
+    return "S" + digits
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def sql_statements(path: Path):
+    """Statements of a SQL file, comment lines dropped."""
+    sql = "\n".join(line for line in path.read_text(encoding="utf-8").splitlines() if not line.lstrip().startswith("--"))
+    return [s.strip() for s in sql.split(";") if s.strip()]
+
+
+def schema_statements():
+    """CREATE TABLE statements from migration.sql (no sample data), then the index migration."""
+    tables = [s for s in sql_statements(ROOT / "migration.sql") if "CREATE TABLE" in s]
+    return tables + sql_statements(ROOT / "migrations" / "001_pura_search_indexes.sql")
+
+
+def seed(cursor, temples: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    cursor.executemany(
+        "INSERT INTO kabupaten (id_kabupaten, nama_kabupaten) VALUES (%s, %s)",
+        [(f"K{i + 1:03d}", name) for i, name in enumerate(KABUPATEN)],
+    )
+    cursor.executemany(
+        "INSERT INTO jenis_pura (id_jenis_pura, nama_jenis_pura) VALUES (%s, %s)",
+        [(f"J{i + 1:03d}", name) for i, name in enumerate(JENIS)],
+    )
+    batch = []
+    for i in range(temples):
+        name = "Pura " + " ".join(w.capitalize() for w in rng.sample(WORDS, 2)) + f" {i}"
+        batch.append((
+            synthetic_id(i), name, f"J{rng.randrange(len(JENIS)) + 1:03d}", f"K{rng.randrange(len(KABUPATEN)) + 1:03d}",
+            "https://maps.app.goo.gl/x", -8.4 + rng.random() * 0.5, 115.0 + rng.random() * 0.6,
+            "Pura " + " ".join(rng.choices(WORDS, k=12)), "Abad ke-" + str(rng.randrange(8, 20)), "https://example.com/p.jpg",
+        ))
+        if len(batch) == 5000:
+            cursor.executemany(INSERT_PURA, batch)
+            batch = []
+    if batch:
+        cursor.executemany(INSERT_PURA, batch)
+
+
+INSERT_PURA = """
+    INSERT INTO pura (id_pura, nama_pura, id_jenis_pura, id_kabupaten, link_lokasi, latitude, longitude,
+                      deskripsi_singkat, tahun_berdiri, link_gambar)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def timed(cursor, query, params, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    return (time.perf_counter() - started) / repeat * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--temples", type=int, default=100000)
+    parser.add_argument("--database", default="purabali_bench")
+    parser.add_argument("--limit", type=int, default=12)
+    parser.add_argument("--pages", default="1,100,1000,8000", help="Comma-separated page depths")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reseed", action="store_true", help="Drop and refill the scratch database")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=settings.MYSQL_HOST, port=settings.MYSQL_PORT,
+        user=settings.MYSQL_USER, password=settings.MYSQL_PASSWORD, autocommit=True,
+    )
+    cursor = conn.cursor(dictionary=True)
+    if args.reseed:
+        cursor.execute(f"DROP DATABASE IF EXISTS {args.database}")
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {args.database}")
+    cursor.execute(f"USE {args.database}")
+    cursor.execute("SHOW TABLES LIKE 'pura'")
+    if not cursor.fetchall():
+        print(f"Seeding {args.temples} synthetic temples into {args.database}...")
+        started = time.perf_counter()
+        for statement in schema_statements():
+            cursor.execute(statement)
+        seed(cursor, args.temples, args.seed)
+        cursor.execute("ANALYZE TABLE pura, kabupaten, jenis_pura")
+        cursor.fetchall()
+        print(f"  seeded in {time.perf_counter() - started:.1f}s")
+    cursor.execute("SELECT COUNT(*) AS total FROM pura")
+    print(f"{args.database}: {cursor.fetchall()[0]['total']} temples, page size {args.limit}\n")
+
+    print("Page depth     OFFSET ms   keyset ms")
+    for page in [int(p) for p in args.pages.split(",")]:
+        _, _, offset_query, offset_params = models.build_search_queries(None, None, None, page, args.limit)
+        offset_ms, rows = timed(cursor, offset_query, offset_params, args.repeat)
+        if not rows:
+            print(f"{page:>10}   (past the end)")
+            continue
+        # The keyset page starting at the same row: seek past the row before it
+        cursor.execute(
+            "SELECT nama_pura, id_pura FROM pura ORDER BY nama_pura, id_pura LIMIT 1 OFFSET %s",
+            ((page - 1) * args.limit - 1,) if page > 1 else (0,),
+        )
+        before = cursor.fetchall()[0]
+        after = (before["nama_pura"], before["id_pura"]) if page > 1 else None
+        _, _, keyset_query, keyset_params = models.build_search_queries(None, None, None, page, args.limit, after)
+        keyset_ms, keyset_rows = timed(cursor, keyset_query, keyset_params, args.repeat)
+        assert [r["id_pura"] for r in rows] == [r["id_pura"] for r in keyset_rows], "keyset page differs from OFFSET page"
+        print(f"{page:>10}   {offset_ms:>10.2f}  {keyset_ms:>10.2f}")
+
+    print("\nCOUNT(*) per request vs cached total")
+    for label, filters in [("no filter", (None, None, None)), ("kabupaten", (None, None, "Gianyar")),
+                           ("jenis + kabupaten", (None, "Pura Segara", "Gianyar"))]:
+        count_query, count_params, _, _ = models.build_search_queries(*filters, 1, args.limit)
+        count_ms, _ = timed(cursor, count_query, count_params, args.repeat)
+        print(f"  {label:<20} {count_ms:>8.2f} ms per COUNT(*), ~0 ms when cached")
+
+    print("\nText filter: LIKE '%q%' vs FULLTEXT")
+    for q in ["batur", "tirta ulun", "dalem 4242"]:
+        timings = []
+        for fulltext in (False, True):
+            settings.DB_FULLTEXT_SEARCH = fulltext
+            count_query, count_params, data_query, data_params = models.build_search_queries(q, None, None, 1, args.limit)
+            count_ms, _ = timed(cursor, count_query, count_params, args.repeat)
+            data_ms, _ = timed(cursor, data_query, data_params, args.repeat)
+            timings.append(count_ms + data_ms)
+        print(f"  {q!r:<14} LIKE {timings[0]:>8.2f} ms   FULLTEXT {timings[1]:>8.2f} ms   (count + first page)")
+
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Per-query overhead of SemanticSearch outside the encoder.
+
+The encoder is replaced by precomputed synthetic vectors and the query/result
+caches are disabled, so the timings cover filter detection, the FAISS search,
+scoring and result assembly. The per-candidate Python rerank loop the search
+path used before is timed alongside for comparison.
+
+    python benchmarks/search_overhead.py --chunks 2000,20000
+    python benchmarks/search_overhead.py --chunks 100000 --index-type hnsw
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Configure before the app modules read their settings
+os.environ.setdefault("MODEL_LAZY_LOAD", "true")
+os.environ["SEARCH_EMBED_CACHE_SIZE"] = "0"
+os.environ["SEARCH_RESULT_CACHE_SIZE"] = "0"
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.search as search_module
+from app.ann import IndexSpec
+from app.index_store import IndexStore
+from app.data_loader import hash_chunk
+
+KABUPATEN = ["Badung", "Bangli", "Buleleng", "Denpasar", "Gianyar", "Jembrana", "Karangasem", "Klungkung", "Tabanan"]
+JENIS = ["Dang Kahyangan", "Kahyangan Jagat", "Pura Beji", "Pura Puseh", "Pura Segara", "Pura Taman", "Sad Kahyangan"]
+QUERIES = [
+    "Apa sejarah pura ini?",
+    "Pura Segara di Jembrana",
+    "Di mana lokasi pura di Kabupaten Badung?",
+    "Ceritakan tentang Pura Sintetis 42",
+]
+
+
+def synthetic_corpus(n: int, dim: int, seed: int):
+    rng = np.random.default_rng(seed)
+    texts, metadata = [], []
+    for i in range(n):
+        text = f"Pura Sintetis {i} adalah pura jenis {JENIS[i % len(JENIS)]} di Kabupaten {KABUPATEN[i % len(KABUPATEN)]}."
+        texts.append(text)
+        metadata.append({
+            "id": str(i // 4),
+            "nama": f"Pura Sintetis {i // 4}",
+            "jenis": JENIS[i % len(JENIS)],
+            "kabupaten": KABUPATEN[i % len(KABUPATEN)],
+            "type": "intro",
+            "chunk": text,
+            "hash": hash_chunk(text),
+        })
+    embeddings = rng.standard_normal((n, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return texts, metadata, embeddings
+
+
+def legacy_rerank(engine, query_vec, candidates, top_k):
+    """The former per-candidate loop, kept here as the baseline"""
+    reranked = []
+    for idx in candidates:
+        reranked.append((np.dot(engine.embeddings[idx], query_vec), idx))
+    reranked.sort(reverse=True)
+    return reranked[:top_k]
+
+
+def timed(fn, repeat: int) -> tuple[float, float]:
+    """p50/p99 in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-query search overhead outside the encoder")
+    parser.add_argument("--chunks", default="2000,20000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=100, help="Candidates for the rerank comparison")
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed + 1)
+    query_vecs = {q: v / np.linalg.norm(v) for q, v in ((q, rng.standard_normal(args.dim).astype(np.float32)) for q in QUERIES)}
+    search_module.embed_query = lambda query: query_vecs[query]
+
+    for n in (int(s) for s in args.chunks.split(",")):
+        texts, metadata, embeddings = synthetic_corpus(n, args.dim, args.seed)
+        search_module.embed_texts = lambda batch: embeddings
+
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = search_module.SemanticSearch(
+                texts, metadata, store=IndexStore(tmp, use_mmap=False), spec=IndexSpec(type=args.index_type)
+            )
+            candidates = rng.choice(n, size=min(args.candidates, n), replace=False)
+            query = QUERIES[0]
+            query_vec = query_vecs[query]
+            selection = engine.filters.select({"kabupaten": "Jembrana", "jenis": "Pura Segara"})
+
+            cases = [
+                ("detect_filters", lambda: engine.detect_filters(QUERIES[2])),
+                ("search_vector", lambda: engine.search_vector(query_vec, args.top_k)),
+                ("search_vector filtered", lambda: engine.search_vector(query_vec, args.top_k, selection)),
+                (f"rerank x{len(candidates)}", lambda: engine.rerank(query_vec, candidates, args.top_k)),
+                (f"legacy rerank x{len(candidates)}", lambda: legacy_rerank(engine, query_vec, candidates, args.top_k)),
+            ]
+            cases += [(f"search {q!r}", (lambda q=q: engine.search(q, args.top_k))) for q in QUERIES]
+
+            print(f"\n{n} chunks, dim={args.dim}, index={args.index_type}, top_k={args.top_k}")
+            for name, fn in cases:
+                fn()  # warm up
+                p50, p99 = timed(fn, args.repeat)
+                print(f"  {name:<52} p50={p50:9.1f}us  p99={p99:9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
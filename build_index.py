@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Offline index build script
+Embeds the corpus in sharded, resumable batches across worker processes and
+publishes the result as the index artifact the server loads on startup.
+
+    python build_index.py
+    python build_index.py --workers 4 --threads 2 --batch-size 64
+    python build_index.py --fresh        # discard shards from an earlier run
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# The parent process only plans and assembles; workers load their own model
+os.environ.setdefault("MODEL_LAZY_LOAD", "true")
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent / "app"))
+
+from app.core.config import settings
+from app.embedding_pipeline import build_corpus_index
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the corpus and build the search index offline")
+    parser.add_argument("--workers", type=int, default=settings.INDEX_BUILD_WORKERS,
+                       help="Embedding worker processes")
+    parser.add_argument("--threads", type=int, default=0,
+                       help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBED_DOC_BATCH_SIZE,
+                       help="Encode batch size within a shard")
+    parser.add_argument("--shard-size", type=int, default=settings.INDEX_BUILD_SHARD_SIZE,
+                       help="Chunks per checkpointed shard")
+    parser.add_argument("--work-dir", default=settings.INDEX_BUILD_WORK_DIR,
+                       help="Directory for shards and the resume plan")
+    parser.add_argument("--fresh", action="store_true",
+                       help="Ignore existing shards and artifacts and rebuild")
+    parser.add_argument("--keep-shards", action="store_true",
+                       help="Keep the shard files after publishing")
+    
+    args = parser.parse_args()
+    
+    try:
+        summary = build_corpus_index(
+            work_dir=args.work_dir,
+            workers=args.workers,
+            threads=args.threads,
+            batch_size=args.batch_size,
+            shard_size=args.shard_size,
+            fresh=args.fresh,
+            keep_shards=args.keep_shards,
+        )
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted; finished shards are kept, run again to resume")
+        sys.exit(130)
+    print(f"✅ {summary}")
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,13 @@ from pathlib import Path
 # Add the app directory to the path
 sys.path.insert(0, str(Path(__file__).parent / "app"))
 
-from app.model_cache import model_cache, get_cached_model
+from app.model_cache import ModelCache, model_cache, get_cached_model
 
 def download_model():
     """Download and cache the model"""
     print("Downloading and caching model...")
     try:
-        model = get_cached_model()
+        model = get_cached_model(lazy=False)
         cache_info = model_cache.get_cache_info()
         cache_size_mb = cache_info['size_bytes'] / (1024 * 1024)
         print(f"✅ Model downloaded and cached successfully!")
@@ -53,6 +53,14 @@ def show_info():
     print(f"   Cache Path: {cache_info['cache_path']}")
     print(f"   Exists: {'✅ Yes' if cache_info['exists'] else '❌ No'}")
     print(f"   Valid: {'✅ Yes' if cache_info['is_valid'] else '❌ No'}")
+    print(f"   Backend: {cache_info['backend']}")
+    if cache_info['quantized_valid'] is not None:
+        print(f"   Quantized: {'✅ Yes' if cache_info['quantized_valid'] else '❌ No'} ({cache_info['quantized_path']})")
+    for name, version in cache_info['libraries'].items():
+        installed = cache_info['installed_libraries'].get(name)
+        print(f"   {name}: snapshot {version}, installed {installed}")
+    if cache_info['legacy_pickle_present']:
+        print("   ⚠️  Legacy pickle cache present (removed on next download)")
     
     if cache_info['exists']:
         cache_size_mb = cache_info['size_bytes'] / (1024 * 1024)
@@ -69,11 +77,20 @@ def show_info():
         total_size_mb = total_size / (1024 * 1024)
         print(f"   Total Size: {total_size_mb:.2f} MB")
 
+def verify_cache():
+    """Verify the snapshot including weight checksums"""
+    print("Verifying model snapshot checksums...")
+    if model_cache.verify():
+        print("✅ Model snapshot is valid")
+        return True
+    print("❌ Model snapshot is missing or corrupt (run 'download' to rebuild)")
+    return False
+
 def test_model():
     """Test the cached model"""
     print("Testing cached model...")
     try:
-        model = get_cached_model()
+        model = get_cached_model(lazy=False)
         test_text = "Test embedding for model validation"
         embedding = model.encode(test_text, convert_to_numpy=True, normalize_embeddings=True)
         print(f"✅ Model test successful!")
@@ -84,10 +101,52 @@ def test_model():
         print(f"❌ Model test failed: {e}")
         return False
 
+def default_queries(metadata, limit):
+    """Questions in the style users ask, built from the corpus itself"""
+    seen = []
+    for meta in metadata:
+        if meta["nama"] not in seen:
+            seen.append(meta["nama"])
+    queries = []
+    for nama in seen[:limit]:
+        queries.append(f"Di mana lokasi {nama}?")
+        queries.append(f"Ceritakan sejarah {nama}")
+    kabupaten = sorted({meta["kabupaten"] for meta in metadata})
+    queries.extend(f"Pura apa saja yang ada di Kabupaten {k}?" for k in kabupaten)
+    return queries
+
+def recall_check(limit, queries_file):
+    """Compare int8 retrieval against the fp32 baseline on the real corpus"""
+    from app.data_loader import load_corpus
+    from app.embed import DOCUMENT_PREFIX, QUERY_PREFIX
+    from app.quantization import compare_models
+
+    print("Loading corpus...")
+    texts, metadata = load_corpus()
+    if queries_file:
+        queries = [line.strip() for line in Path(queries_file).read_text(encoding="utf-8").splitlines() if line.strip()]
+    else:
+        queries = default_queries(metadata, limit)
+
+    print("Loading fp32 and int8 models...")
+    baseline = ModelCache(backend="torch").load_model()
+    candidate = ModelCache(backend="torch-int8").load_model()
+
+    print(f"Embedding {len(texts)} chunks and {len(queries)} queries with both models...")
+    results = compare_models(baseline, candidate, texts, queries, DOCUMENT_PREFIX, QUERY_PREFIX)
+    print("📋 int8 vs fp32 retrieval:")
+    for name, value in results.items():
+        print(f"   {name}: {value}")
+    return results
+
 def main():
     parser = argparse.ArgumentParser(description="Manage sentence-transformers model cache")
-    parser.add_argument("action", choices=["download", "clear", "info", "test"], 
+    parser.add_argument("action", choices=["download", "clear", "info", "test", "verify", "recall"], 
                        help="Action to perform")
+    parser.add_argument("--limit", type=int, default=50,
+                       help="recall: number of temples to generate queries for")
+    parser.add_argument("--queries-file", default="",
+                       help="recall: file with one query per line instead of generated queries")
     
     args = parser.parse_args()
     
@@ -99,6 +158,10 @@ def main():
         show_info()
     elif args.action == "test":
         test_model()
+    elif args.action == "verify":
+        verify_cache()
+    elif args.action == "recall":
+        recall_check(args.limit, args.queries_file)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,51 @@
+-- Indexes for /api/pura: keyset pagination on (nama_pura, id_pura), the
+-- kabupaten / jenis filters (including the name lookups behind them), and a
+-- FULLTEXT index for the text filter (set DB_FULLTEXT_SEARCH=true once it exists).
+--
+-- Idempotent: each index is created only if it is missing, so the file can be
+-- re-run on a database that already has some of them. Works on MySQL 8 and
+-- MariaDB. Apply it to the application database after migration.sql:
+--
+--     mysql purabali < migrations/001_pura_search_indexes.sql
+
+SET @sql := IF((SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'pura' AND index_name = 'idx_pura_nama') = 0,
+               'ALTER TABLE pura ADD INDEX idx_pura_nama (nama_pura, id_pura)', 'DO 0');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql := IF((SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'pura' AND index_name = 'idx_pura_kabupaten_nama') = 0,
+               'ALTER TABLE pura ADD INDEX idx_pura_kabupaten_nama (id_kabupaten, nama_pura, id_pura)', 'DO 0');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql := IF((SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'pura' AND index_name = 'idx_pura_jenis_nama') = 0,
+               'ALTER TABLE pura ADD INDEX idx_pura_jenis_nama (id_jenis_pura, nama_pura, id_pura)', 'DO 0');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql := IF((SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'pura' AND index_name = 'ft_pura_text') = 0,
+               'ALTER TABLE pura ADD FULLTEXT INDEX ft_pura_text (nama_pura, deskripsi_singkat)', 'DO 0');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql := IF((SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'kabupaten' AND index_name = 'idx_kabupaten_nama') = 0,
+               'ALTER TABLE kabupaten ADD INDEX idx_kabupaten_nama (nama_kabupaten)', 'DO 0');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql := IF((SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'jenis_pura' AND index_name = 'idx_jenis_pura_nama') = 0,
+               'ALTER TABLE jenis_pura ADD INDEX idx_jenis_pura_nama (nama_jenis_pura)', 'DO 0');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;